@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Command Mode Benchmark
+======================
+명령어 호출 방식(접두사 + 메시지 내용 인텐트 / 슬래시 명령어 + 내용 인텐트 없음)에 따른
+게이트웨이 수신량과 봇의 CPU 사용량을 비교하는 벤치마크
+
+- 길드마다 일반 대화 --chat-rate 개/초, 명령어 --command-rate 개/초가 들어오는 상황을 가정합니다.
+- prefix 모드: 대화와 명령어 모두 내용이 채워진 MESSAGE_CREATE 로 들어옵니다.
+- slash 모드: 대화는 내용이 빈 MESSAGE_CREATE(봇 멘션이 아니면 Discord 가 내용을 비워서 보냄),
+  명령어는 INTERACTION_CREATE 로 들어옵니다.
+- 같은 이벤트 목록을 게이트웨이 파서에 최대한 빨리 넣고 처리가 끝날 때까지의 프로세스 CPU 시간을 잽니다.
+  JSON 디코딩과 웹소켓 처리는 포함하지 않으므로 payload 크기(KB/s)를 따로 보고합니다.
+- 각 모드를 새 프로세스에서 실행해 캐시/JIT 상태가 섞이지 않게 합니다.
+
+사용법:
+    python bench_command_mode.py [--guilds 100] [--seconds 10] [--chat-rate 0.5] [--command-rate 0.05]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import subprocess
+import sys
+import time
+
+from discord_bot import DiscordBot, DiscordBotMetrics
+from gateway_harness import GatewayHarness, make_interaction, make_message
+
+CHAT = '오늘 저녁 뭐 먹을까? 다들 몇 시에 들어와요? ㅋㅋㅋ 어제 그거 봤어?'
+# (접두사 명령어, 슬래시 명령어 이름, 옵션)
+COMMANDS = (
+    ('?ping', 'ping', {}),
+    ('?roll 2d6', 'roll', {'dice': '2d6'}),
+    ('?choose 사과 바나나 오렌지', 'choose', {'choices': '사과 바나나 오렌지'}),
+    ('?add 2 3', 'add', {'left': 2, 'right': 3}),
+    ('?time', 'time', {}),
+)
+
+
+def build_events(mode: str, guilds: int, seconds: float, chat_rate: float, command_rate: float,
+                 next_id, seed: int = 0) -> list:
+    """(이벤트 종류, payload) 목록 (모든 모드가 같은 시드로 같은 순서를 만듦)"""
+    rng = random.Random(seed)
+    chats = int(guilds * chat_rate * seconds)
+    commands = int(guilds * command_rate * seconds)
+    kinds = ['chat'] * chats + ['command'] * commands
+    rng.shuffle(kinds)
+    events = []
+    for kind in kinds:
+        guild_id = rng.randint(1, guilds)
+        # 같은 사용자가 속도 제한에 걸리지 않도록 사용자를 넓게 분산
+        user_id = rng.randint(1000, 10 ** 6)
+        if kind == 'chat':
+            content = CHAT if mode == 'prefix' else ''
+            events.append(('MESSAGE_CREATE', make_message(next_id(), guild_id * 10, guild_id, user_id, content)))
+            continue
+        prefixed, name, options = rng.choice(COMMANDS)
+        if mode == 'prefix':
+            events.append(('MESSAGE_CREATE', make_message(next_id(), guild_id * 10, guild_id, user_id, prefixed)))
+        else:
+            events.append(('INTERACTION_CREATE', make_interaction(next_id(), guild_id, user_id, name, options)))
+    return events
+
+
+async def measure(mode: str, guilds: int, seconds: float, chat_rate: float, command_rate: float) -> dict:
+    """한 프로세스에서 이벤트를 처리하고 CPU 시간과 수신량을 반환"""
+    discord_bot = DiscordBot('bench_token', DiscordBotMetrics(), message_content=(mode == 'prefix'))
+    harness = GatewayHarness(discord_bot, guilds=guilds)
+    await harness.setup()
+    events = build_events(mode, guilds, seconds, chat_rate, command_rate, harness._next_id)
+    payload_bytes = sum(len(json.dumps({'t': kind, 'd': data}).encode()) for kind, data in events)
+    state = discord_bot.bot._connection
+    parsers = {'MESSAGE_CREATE': state.parse_message_create, 'INTERACTION_CREATE': state.parse_interaction_create}
+
+    cpu_started = time.process_time()
+    for index, (kind, data) in enumerate(events):
+        parsers[kind](data)
+        if index % 200 == 199:
+            # 한꺼번에 너무 많은 태스크가 쌓이지 않게 주기적으로 처리
+            await harness.drain(timeout=10, tick=0.001)
+    await harness.drain(timeout=10, tick=0.001)
+    cpu = time.process_time() - cpu_started
+    discord_bot.cpu_pool.close()
+    return {
+        'mode': mode,
+        'events': len(events),
+        # prefix 모드는 같은 채널의 응답을 합쳐 보내므로 명령어 수보다 적을 수 있음
+        'api_calls': harness.http.api_calls,
+        'events_per_sec': len(events) / seconds,
+        'kb_per_sec': payload_bytes / 1024 / seconds,
+        'cpu_us_per_event': cpu / len(events) * 1e6,
+        # 가정한 트래픽에서 길드 하나가 쓰는 CPU (코어의 백만분의 1 단위)
+        'cpu_ppm_per_guild': cpu / seconds / guilds * 1e6,
+    }
+
+
+def run_worker(mode: str, args) -> dict:
+    """새 파이썬 프로세스에서 measure() 를 실행"""
+    output = subprocess.run(
+        [sys.executable, __file__, '--worker', mode, '--guilds', str(args.guilds), '--seconds', str(args.seconds),
+         '--chat-rate', str(args.chat_rate), '--command-rate', str(args.command_rate)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='접두사/슬래시 명령어 모드별 수신량과 CPU 비교')
+    parser.add_argument('--guilds', type=int, default=100, help='길드 수')
+    parser.add_argument('--seconds', type=float, default=10, help='흉내 낼 트래픽 시간(초)')
+    parser.add_argument('--chat-rate', type=float, default=0.5, help='길드당 초당 일반 대화 수')
+    parser.add_argument('--command-rate', type=float, default=0.05, help='길드당 초당 명령어 수')
+    parser.add_argument('--worker', choices=('prefix', 'slash'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    if args.worker:
+        result = asyncio.run(measure(args.worker, args.guilds, args.seconds, args.chat_rate, args.command_rate))
+        print(json.dumps(result))
+        return
+
+    print(f"길드 {args.guilds}개, 길드당 대화 {args.chat_rate}/s, 명령어 {args.command_rate}/s")
+    print(f"{'mode':>7} {'events':>8} {'API calls':>9} {'events/s':>9} {'KB/s':>8} {'µs/event':>9} {'ppm/guild':>10}")
+    for mode in ('prefix', 'slash'):
+        result = run_worker(mode, args)
+        print(f"{mode:>7} {result['events']:>8,} {result['api_calls']:>9,} {result['events_per_sec']:>9,.1f} "
+              f"{result['kb_per_sec']:>8,.1f} {result['cpu_us_per_event']:>9,.1f} {result['cpu_ppm_per_guild']:>10,.1f}")
+
+
+if __name__ == '__main__':
+    main()
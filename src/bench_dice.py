@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Dice Engine Benchmark
+=====================
+주사위 식 크기별 초당 굴림 수와 1회 지연시간을 측정하는 벤치마크
+
+사용법:
+    python bench_dice.py [--seconds 0.5]
+"""
+
+import argparse
+import time
+
+import dice
+
+EXPRESSIONS = (
+    '2d6',
+    '4d6kh3',
+    '3d8+1d4-2',
+    '10d10!',
+    '100d6',
+    '1000d6',
+    '100000d6',
+    '1000000d6',
+    '1000000d6kh3',
+    '1000000d100!',
+)
+
+
+def measure(expression: str, seconds: float):
+    """seconds 동안 반복해서 굴리고 (초당 굴림 수, 1회 평균 마이크로초) 반환"""
+    dice.compile_expression(expression)
+    count = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        dice.roll(expression)
+        count += 1
+    elapsed = time.perf_counter() - started
+    return count / elapsed, elapsed / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='주사위 엔진 벤치마크')
+    parser.add_argument('--seconds', type=float, default=0.5, help='식별 측정 시간(초)')
+    args = parser.parse_args()
+
+    print(f"{'expression':<16} {'rolls/sec':>12} {'us/roll':>10}")
+    for expression in EXPRESSIONS:
+        rate, per_roll = measure(expression, args.seconds)
+        print(f"{expression:<16} {rate:>12,.0f} {per_roll:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
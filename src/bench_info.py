@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Info Command Benchmark
+======================
+길드 수에 따른 ?info 명령어 1회 처리 시간을 측정하는 벤치마크
+
+- rebuild:  매 호출마다 임베드를 새로 만드는 경우 (INFO_CACHE_TTL=0 과 같음)
+- snapshot: 입력이 바뀔 때만 임베드를 다시 만드는 경우
+- churn:    snapshot 이지만 호출 사이마다 멤버 가입 이벤트가 들어오는 경우
+
+전송은 속도 제한 없는 큐와 임베드를 직렬화만 하는 가짜 채널로 대체하므로
+봇 내부 처리 시간만 측정합니다.
+
+사용법:
+    python bench_info.py [--calls 20000]
+"""
+
+import argparse
+import asyncio
+import datetime
+import time
+from unittest.mock import MagicMock
+
+from discord_bot import DiscordBot, DiscordBotMetrics, InfoSnapshot
+from send_queue import OutboundQueue
+
+GUILD_COUNTS = (100, 10000, 100000)
+
+
+def make_bot(guilds: int, ttl: float) -> DiscordBot:
+    metrics = DiscordBotMetrics()
+    bot = DiscordBot('bench_token', metrics)
+    bot.outbound = OutboundQueue(metrics, global_rate=10 ** 9, channel_limit=10 ** 9, channel_per=1.0)
+    bot.info_snapshot = InfoSnapshot(ttl, metrics)
+    for guild_id in range(guilds):
+        metrics.guild_stats.add_guild(guild_id, 50)
+    return bot
+
+
+class FakeChannel:
+    """discord.py 가 전송 전에 하는 임베드 직렬화만 수행하는 채널"""
+
+    id = 1
+
+    async def send(self, content=None, embed=None):
+        return embed.to_dict()
+
+
+def make_ctx(bot: DiscordBot):
+    ctx = MagicMock()
+    ctx.channel = FakeChannel()
+    ctx.command = bot.bot.get_command('info')
+    ctx.guild.shard_id = 0
+    ctx.message.created_at = datetime.datetime.now(datetime.timezone.utc)
+    return ctx
+
+
+async def measure(guilds: int, ttl: float, calls: int, churn: bool) -> float:
+    """info 1회 평균 마이크로초"""
+    bot = make_bot(guilds, ttl)
+    ctx = make_ctx(bot)
+    callback = bot.bot.get_command('info').callback
+    stats = bot.metrics.guild_stats
+    started = time.perf_counter()
+    for _ in range(calls):
+        if churn:
+            stats.member_joined(0)
+        await callback(ctx)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+async def run(calls: int):
+    print(f"{'guilds':>8} {'rebuild us':>12} {'snapshot us':>12} {'churn us':>10}")
+    for guilds in GUILD_COUNTS:
+        rebuild = await measure(guilds, 0.0, calls, churn=False)
+        snapshot = await measure(guilds, 30.0, calls, churn=False)
+        churn = await measure(guilds, 30.0, calls, churn=True)
+        print(f"{guilds:>8,} {rebuild:>12.1f} {snapshot:>12.1f} {churn:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='?info 명령어 벤치마크')
+    parser.add_argument('--calls', type=int, default=20000, help='길드 수별 호출 횟수')
+    args = parser.parse_args()
+    asyncio.run(run(args.calls))
+
+
+if __name__ == '__main__':
+    main()
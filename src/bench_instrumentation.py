@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Instrumentation Overhead Benchmark
+==================================
+명령어 한 번 실행될 때 드는 메트릭 계측 비용을 비교하는 마이크로 벤치마크
+
+- labels: 매 호출마다 .labels(...) 로 자식을 찾는 기존 방식
+- bound:  bind_command/bind_error 로 미리 만들어 둔 자식을 쓰는 방식
+
+사용법:
+    python bench_instrumentation.py [--number 200000]
+"""
+
+import argparse
+import timeit
+
+from discord_bot import DiscordBotMetrics
+
+COMMANDS = ('add', 'roll', 'choose', 'time', 'ping', 'info')
+
+
+def make_cases(metrics: DiscordBotMetrics):
+    for command in COMMANDS:
+        metrics.bind_command(command, '0')
+    metrics.bind_error('command_error', '0')
+
+    def labels_success():
+        # after_invoke 의 기존 경로
+        metrics.message_latency.labels(command='roll', shard='0').observe(0.004)
+        metrics.command_counter.labels(command='roll', status='success', shard='0').inc()
+
+    def bound_success():
+        bound = metrics.bind_command('roll', '0')
+        bound.latency.observe(0.004)
+        bound.success.inc()
+
+    def labels_error():
+        # on_command_error 의 기존 경로
+        metrics.error_count.labels(error_type='command_error', shard='0').inc()
+        metrics.command_counter.labels(command='roll', status='error', shard='0').inc()
+
+    def bound_error():
+        metrics.bind_error('command_error', '0').inc()
+        metrics.bind_command('roll', '0').error.inc()
+
+    return [
+        ('success/labels', labels_success),
+        ('success/bound', bound_success),
+        ('error/labels', labels_error),
+        ('error/bound', bound_error),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='메트릭 계측 비용 벤치마크')
+    parser.add_argument('--number', type=int, default=200000, help='측정 반복 횟수')
+    parser.add_argument('--repeat', type=int, default=5, help='반복 측정 횟수 (최솟값 사용)')
+    args = parser.parse_args()
+
+    metrics = DiscordBotMetrics()
+    print(f"{'case':<16} {'ns/invocation':>14}")
+    for name, func in make_cases(metrics):
+        best = min(timeit.repeat(func, number=args.number, repeat=args.repeat))
+        print(f"{name:<16} {best / args.number * 1e9:>14.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Logging Benchmark
+=================
+로그 레코드 하나를 남길 때 호출한 스레드(봇 이벤트 루프)가 쓰는 시간을 비교하는 벤치마크
+
+- sync/f-string:  기존 방식 (basicConfig StreamHandler + f-string 으로 미리 포맷팅)
+- sync/%-style:   같은 핸들러에 인자만 넘김
+- queue/json:     log_pipeline (큐에 넣기만 하고 포맷팅/출력은 백그라운드 스레드)
+- queue/sampled:  같은 에러가 폭주해 샘플링으로 버려지는 경우
+- */exc:          예외 traceback 포함 (logger.exception)
+
+- */slow-io:      출력이 쓰기마다 0.2ms 막히는 경우
+
+wall 은 호출 스레드의 경과 시간(GIL 대기 포함), cpu 는 호출 스레드의 CPU 시간입니다.
+큐 방식은 포맷팅 CPU 를 다른 스레드로 옮길 뿐 없애지는 않으므로, 이득은 출력이 막힐 때와
+샘플링으로 버릴 때 나타납니다. 그 외 출력은 /dev/null 로 보냅니다.
+
+사용법:
+    python bench_logging.py [--records 20000]
+"""
+
+import argparse
+import logging
+import os
+import time
+
+from log_pipeline import TEXT_FORMAT, setup_logging
+
+
+class SlowStream:
+    """쓰기마다 delay 초 막히는 출력 (가득 찬 파이프/느린 로그 수집기 흉내)"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def write(self, text):
+        time.sleep(self.delay)
+
+    def flush(self):
+        pass
+
+
+class Command:
+    """ctx.command 처럼 str() 이 필요한 객체"""
+
+    name = 'roll'
+
+    def __str__(self):
+        return self.name
+
+
+def reset_root():
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+
+
+def use_sync(devnull):
+    reset_root()
+    handler = logging.StreamHandler(devnull)
+    handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    logging.getLogger().addHandler(handler)
+    logging.getLogger().setLevel(logging.INFO)
+
+
+def use_queue(devnull, burst: int):
+    reset_root()
+    setup_logging(logging.INFO, fmt='json', burst=burst, window=60, stream=devnull)
+
+
+def drain():
+    """큐 파이프라인이면 리스너가 이전 레코드를 다 쓸 때까지 대기 (다음 측정과 겹치지 않도록)"""
+    for handler in logging.getLogger().handlers:
+        records = getattr(handler, 'queue', None)
+        while records is not None and not records.empty():
+            time.sleep(0.01)
+    time.sleep(0.05)
+
+
+def measure(log_one, records: int) -> tuple:
+    """레코드 하나당 호출 스레드의 (경과 시간, CPU 시간) (us)"""
+    wall, cpu = time.perf_counter(), time.thread_time()
+    for i in range(records):
+        log_one(i)
+    wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+    drain()
+    return wall / records * 1e6, cpu / records * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='로그 레코드당 호출 스레드 비용 벤치마크')
+    parser.add_argument('--records', type=int, default=20000, help='케이스당 레코드 수')
+    args = parser.parse_args()
+
+    logger = logging.getLogger('discord_bot')
+    command = Command()
+    error = ValueError('invalid literal for int() with base 10')
+    try:
+        raise error
+    except ValueError as e:
+        caught = e
+
+    def fstring(i):
+        logger.error(f"Command error in {command}: {error} ({i})")
+
+    def percent(i):
+        logger.error("Command error in %s: %s (%s)", command, error, i)
+
+    def with_exc(i):
+        logger.error("Command error in %s: %s (%s)", command, error, i, exc_info=caught)
+
+    devnull = open(os.devnull, 'w')
+    slow = SlowStream(0.0002)
+    cases = [
+        ('sync/f-string', lambda: use_sync(devnull), fstring),
+        ('sync/%-style', lambda: use_sync(devnull), percent),
+        ('sync/exc', lambda: use_sync(devnull), with_exc),
+        # burst 를 크게 잡아 샘플링 없이 큐 비용만 측정
+        ('queue/json', lambda: use_queue(devnull, burst=10 ** 9), percent),
+        ('queue/exc', lambda: use_queue(devnull, burst=10 ** 9), with_exc),
+        ('queue/sampled', lambda: use_queue(devnull, burst=10), percent),
+        ('sync/slow-io', lambda: use_sync(slow), percent),
+        ('queue/slow-io', lambda: use_queue(slow, burst=10 ** 9), percent),
+    ]
+    print(f"{'case':<16} {'wall us':>9} {'cpu us':>9}")
+    for name, setup, log_one in cases:
+        setup()
+        measure(log_one, 1000)
+        records = args.records // 10 if 'slow' in name else args.records
+        wall, cpu = measure(log_one, records)
+        print(f"{name:<16} {wall:>9.2f} {cpu:>9.2f}")
+    logging.shutdown()
+
+
+if __name__ == '__main__':
+    main()
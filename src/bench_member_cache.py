@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Member Cache Benchmark
+======================
+멤버 캐시 모드(full / lean)에 따른 시작 비용과 메모리를 비교하는 벤치마크
+
+- 각 (모드, 길드 수) 조합을 새 프로세스에서 실행해 RSS 가 서로 섞이지 않게 합니다.
+- 시작 과정은 GUILD_CREATE(길드마다 member_count 만 포함)를 게이트웨이 파서에 넣고,
+  full 모드에서는 chunk_guilds_at_startup 이 요청하는 GUILD_MEMBERS_CHUNK(1000 명 단위)도 넣어 흉내 냅니다.
+- 실제 청킹은 길드마다 게이트웨이 왕복과 요청 속도 제한이 더해지므로 full 모드의 시작 시간은 하한값입니다.
+
+사용법:
+    python bench_member_cache.py [--guilds 10 100 500] [--members 500]
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import subprocess
+import sys
+import time
+
+from discord.state import ChunkRequest
+
+from discord_bot import DiscordBot, DiscordBotMetrics
+from gateway_harness import GatewayHarness, make_user
+from memory_debug import rss_mb
+
+CHUNK_SIZE = 1000
+
+
+def member_chunks(guild_id: int, members: int, first_user_id: int, nonce: str):
+    """길드 하나의 GUILD_MEMBERS_CHUNK 페이로드들"""
+    chunk_count = (members + CHUNK_SIZE - 1) // CHUNK_SIZE
+    for index in range(chunk_count):
+        start = index * CHUNK_SIZE
+        yield {
+            'guild_id': str(guild_id), 'chunk_index': index, 'chunk_count': chunk_count, 'nonce': nonce,
+            'members': [
+                {'user': make_user(first_user_id + offset), 'roles': [], 'joined_at': None,
+                 'deaf': False, 'mute': False, 'flags': 0}
+                for offset in range(start, min(start + CHUNK_SIZE, members))
+            ],
+        }
+
+
+async def startup(mode: str, guilds: int, members: int) -> dict:
+    """한 프로세스에서 시작 과정을 흉내 내고 시간/RSS/캐시 크기를 반환"""
+    gc.collect()
+    rss_before = rss_mb()
+    metrics = DiscordBotMetrics()
+    discord_bot = DiscordBot('bench_token', metrics, member_cache=mode)
+    harness = GatewayHarness(discord_bot, guilds=guilds, members_per_guild=members)
+
+    started = time.perf_counter()
+    await harness.setup()
+    state = discord_bot.bot._connection
+    if state._chunk_guilds:
+        for guild_id in range(1, guilds + 1):
+            # chunk_guild() 가 등록하는 요청 (게이트웨이로 보내는 부분만 생략)
+            request = ChunkRequest(guild_id, 0, state.loop, state._get_guild, cache=state.member_cache_flags.joined)
+            state._chunk_requests[guild_id] = request
+            # 길드마다 서로 다른 사용자 (겹치는 사용자가 없는 최악의 경우)
+            for chunk in member_chunks(guild_id, members, 10 ** 6 + guild_id * members, request.nonce):
+                state.parse_guild_members_chunk(chunk)
+    elapsed = time.perf_counter() - started
+
+    gc.collect()
+    return {
+        'mode': mode,
+        'guilds': guilds,
+        'startup_ms': round(elapsed * 1000, 1),
+        'rss_growth_mb': round(rss_mb() - rss_before, 1),
+        'caches': metrics.discord_caches.sizes(),
+    }
+
+
+def run_worker(mode: str, guilds: int, members: int) -> dict:
+    """새 파이썬 프로세스에서 startup() 을 실행"""
+    output = subprocess.run(
+        [sys.executable, __file__, '--worker', mode, str(guilds), str(members)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='멤버 캐시 모드별 시작 시간/메모리 벤치마크')
+    parser.add_argument('--guilds', type=int, nargs='+', default=[10, 100, 500], help='길드 수 목록')
+    parser.add_argument('--members', type=int, default=500, help='길드당 멤버 수')
+    parser.add_argument('--worker', nargs=3, metavar=('MODE', 'GUILDS', 'MEMBERS'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    if args.worker:
+        mode, guilds, members = args.worker
+        print(json.dumps(asyncio.run(startup(mode, int(guilds), int(members)))))
+        return
+
+    print(f"길드당 멤버 {args.members}명")
+    print(f"{'guilds':>7} {'mode':>5} {'startup ms':>11} {'RSS +MB':>8} {'members':>9} {'users':>9}")
+    for guilds in args.guilds:
+        for mode in ('full', 'lean'):
+            result = run_worker(mode, guilds, args.members)
+            caches = result['caches']
+            print(f"{guilds:>7} {mode:>5} {result['startup_ms']:>11,.1f} {result['rss_growth_mb']:>8,.1f} "
+                  f"{caches['members']:>9,} {caches['users']:>9,}")
+
+
+if __name__ == '__main__':
+    main()
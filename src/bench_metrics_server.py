@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Metrics Server Benchmark
+========================
+Flask 스레드 서버와 asyncio(aiohttp) 서버의 스크레이프 지연시간과
+동시에 돌아가는 봇 명령어 지연시간을 비교하는 벤치마크
+
+사용법:
+    python bench_metrics_server.py [--duration 5] [--scrapers 4] [--scrape-rate 100] [--rate 200]
+
+봇 이벤트 루프에서는 일정한 속도로 가짜 명령어 코루틴이 실행되고,
+별도 스레드의 클라이언트들이 keep-alive 연결로 /metrics 를 일정 속도로 긁어갑니다.
+두 모드 모두 같은 부하를 받도록 스크레이프 속도는 고정합니다.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import socket
+import statistics
+import threading
+import time
+
+import aiohttp
+from werkzeug.serving import make_server
+
+from discord_bot import DiscordBotMetrics, MetricsServer, AsyncMetricsServer
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _summary(values):
+    return {
+        'count': len(values),
+        'p50_ms': round(_percentile(values, 50) * 1000, 3),
+        'p99_ms': round(_percentile(values, 99) * 1000, 3),
+        'mean_ms': round(statistics.fmean(values) * 1000, 3) if values else 0.0,
+    }
+
+
+def _populate(metrics: DiscordBotMetrics):
+    """실제 운영과 비슷한 크기의 레지스트리 만들기"""
+    for command in ('add', 'roll', 'choose', 'time', 'ping', 'info'):
+        for status in ('success', 'error'):
+            metrics.command_counter.labels(command=command, status=status, shard='0').inc(10)
+    for error_type in ('command_error', 'metrics_update', 'test_error'):
+        metrics.error_count.labels(error_type=error_type, shard='0').inc()
+    for _ in range(1000):
+        metrics.message_latency.labels(command='roll', shard='0').observe(0.01)
+
+
+def _scrape_worker(url, stop_event, latencies, scrapers, scrape_rate):
+    """별도 스레드에서 keep-alive 연결로 /metrics 를 일정 속도로 호출"""
+    interval = scrapers / scrape_rate
+
+    async def scrape_loop(session):
+        while not stop_event.is_set():
+            started = time.perf_counter()
+            async with session.get(url, headers={'Accept-Encoding': 'gzip'}) as resp:
+                await resp.read()
+            elapsed = time.perf_counter() - started
+            latencies.append(elapsed)
+            await asyncio.sleep(max(0.0, interval - elapsed))
+
+    async def run():
+        connector = aiohttp.TCPConnector(limit=scrapers)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await asyncio.gather(*(scrape_loop(session) for _ in range(scrapers)))
+
+    asyncio.run(run())
+
+
+async def _command_load(duration, rate, latencies):
+    """초당 rate 개의 가짜 명령어를 예약하고 완료까지 걸린 시간을 기록"""
+    interval = 1.0 / rate
+    deadline = time.perf_counter() + duration
+    next_at = time.perf_counter()
+
+    async def fake_command(scheduled_at):
+        # 명령어 처리에 해당하는 짧은 CPU 작업
+        _ = ', '.join(str(i) for i in range(50))
+        await asyncio.sleep(0)
+        latencies.append(time.perf_counter() - scheduled_at)
+
+    pending = []
+    while next_at < deadline:
+        now = time.perf_counter()
+        if now < next_at:
+            await asyncio.sleep(next_at - now)
+        pending.append(asyncio.ensure_future(fake_command(next_at)))
+        next_at += interval
+    await asyncio.gather(*pending)
+
+
+async def _run_mode(mode, metrics, duration, scrapers, scrape_rate, rate):
+    port = _free_port()
+    url = f'http://127.0.0.1:{port}/metrics'
+    flask_server = None
+    async_server = None
+
+    if mode == 'flask':
+        flask_server = make_server('127.0.0.1', port, MetricsServer(metrics).app, threaded=True)
+        threading.Thread(target=flask_server.serve_forever, daemon=True).start()
+    else:
+        async_server = AsyncMetricsServer(metrics, host='127.0.0.1', port=port)
+        await async_server.start()
+
+    scrape_latencies, command_latencies = [], []
+    stop_event = threading.Event()
+    scrape_thread = threading.Thread(
+        target=_scrape_worker,
+        args=(url, stop_event, scrape_latencies, scrapers, scrape_rate),
+        daemon=True
+    )
+    scrape_thread.start()
+    try:
+        await _command_load(duration, rate, command_latencies)
+    finally:
+        stop_event.set()
+        await asyncio.get_running_loop().run_in_executor(None, scrape_thread.join)
+        if flask_server is not None:
+            flask_server.shutdown()
+        if async_server is not None:
+            await async_server.stop()
+
+    return {
+        'mode': mode,
+        'scrapes_per_sec': round(len(scrape_latencies) / duration, 1),
+        'scrape': _summary(scrape_latencies),
+        'command': _summary(command_latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='메트릭 서버 벤치마크')
+    parser.add_argument('--duration', type=float, default=5.0, help='모드별 측정 시간(초)')
+    parser.add_argument('--scrapers', type=int, default=4, help='동시 스크레이프 클라이언트 수')
+    parser.add_argument('--scrape-rate', type=float, default=100.0, help='초당 전체 스크레이프 수')
+    parser.add_argument('--rate', type=int, default=200, help='초당 가짜 명령어 수')
+    parser.add_argument('--json', action='store_true', help='결과를 JSON으로 출력')
+    args = parser.parse_args()
+
+    # werkzeug 요청 로그는 측정에 방해가 되므로 끔
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    metrics = DiscordBotMetrics()
+    _populate(metrics)
+
+    results = [
+        asyncio.run(_run_mode(mode, metrics, args.duration, args.scrapers, args.scrape_rate, args.rate))
+        for mode in ('flask', 'asyncio')
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'mode':<8} {'scrape/s':>9} {'scrape p50':>11} {'scrape p99':>11} {'cmd p50':>9} {'cmd p99':>9}")
+    for result in results:
+        print(
+            f"{result['mode']:<8} {result['scrapes_per_sec']:>9} "
+            f"{result['scrape']['p50_ms']:>9}ms {result['scrape']['p99_ms']:>9}ms "
+            f"{result['command']['p50_ms']:>7}ms {result['command']['p99_ms']:>7}ms"
+        )
+
+
+if __name__ == '__main__':
+    main()
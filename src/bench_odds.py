@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Dice Odds Benchmark
+===================
+?odds 질의의 분포 계산 지연시간을 측정하는 벤치마크
+
+- cold: 분포 캐시를 비운 뒤 처음 계산할 때
+- warm: 같은 질의를 다시 계산할 때 (캐시 재사용)
+
+사용법:
+    python bench_odds.py [--repeat 3]
+"""
+
+import argparse
+import time
+
+import dice
+
+QUERIES = (
+    '10d6 >= 40',
+    '4d6kh3 >= 15',
+    '100d6 >= 400',
+    '500d6 >= 1800',
+    '1000d6 >= 3550',
+    '100d100 >= 5000',
+    '1000d50 >= 25000',
+    '20d20kh5 >= 90',
+    '30d6kl10 <= 20',
+)
+
+
+def clear_caches():
+    dice.sum_distribution.cache_clear()
+    dice.keep_distribution.cache_clear()
+
+
+def measure(query: str, repeat: int):
+    """(cold 최솟값 ms, warm 최솟값 ms) 반환"""
+    cold, warm = [], []
+    for _ in range(repeat):
+        clear_caches()
+        started = time.perf_counter()
+        dice.odds(query)
+        cold.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        dice.odds(query)
+        warm.append(time.perf_counter() - started)
+    return min(cold) * 1000, min(warm) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='주사위 확률 계산 벤치마크')
+    parser.add_argument('--repeat', type=int, default=3, help='반복 측정 횟수 (최솟값 사용)')
+    args = parser.parse_args()
+
+    print(f"{'query':<20} {'cold ms':>10} {'warm ms':>10}")
+    for query in QUERIES:
+        cold, warm = measure(query, args.repeat)
+        print(f"{query:<20} {cold:>10.2f} {warm:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
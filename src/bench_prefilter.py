@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Prefix Pre-filter Benchmark
+===========================
+on_message 사전 필터(접두사 첫 글자 + 명령어 이름 표)와 discord.py 기본 경로(process_commands 가
+모든 메시지에 Context 를 만들고 명령어를 찾음)의 메시지당 비용을 대화:명령어 비율별로 비교하는 벤치마크
+
+- 메시지 객체는 미리 만들어 두고 on_message 핸들러만 호출합니다. (게이트웨이 파싱 비용 제외)
+- 명령어 메시지는 실제로 실행되므로 두 경로의 차이는 대부분 대화 메시지에서 나옵니다.
+  전송 큐, 명령어 속도 제한, 가짜 HTTP 의 제한은 모두 풀어서 대기 시간이 측정에 섞이지 않게 합니다.
+- 대화 메시지만 넣었을 때 메시지 하나를 처리하는 동안의 최대 할당량(tracemalloc peak)도 보고합니다.
+
+사용법:
+    python bench_prefilter.py [--messages 20000] [--ratios 0.9 0.98 0.995]
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+import tracemalloc
+
+import discord
+from discord.ext import commands
+
+from discord_bot import DiscordBot, DiscordBotMetrics
+from gateway_harness import FakeHTTP, GatewayHarness, make_message
+from rate_limiter import RateLimiter
+from send_queue import OutboundQueue
+
+CHATS = (
+    '오늘 저녁 뭐 먹을까?',
+    'ㅋㅋㅋㅋ 진짜요?',
+    '? 이게 무슨 말이야',
+    '?? 뭐지',
+    'https://example.com/some/article 이거 봐',
+    '<:pepe:123456789012345678> 굿',
+)
+COMMANDS = ('?ping', '?roll 2d6', '?add 2 3', '?choose 사과 바나나')
+
+
+def build_messages(harness: GatewayHarness, count: int, chat_ratio: float, seed: int = 0) -> list:
+    """미리 만든 discord.Message 목록 (같은 시드면 같은 순서)"""
+    rng = random.Random(seed)
+    state = harness.discord_bot.bot._connection
+    messages = []
+    for _ in range(count):
+        guild_id = rng.randint(1, harness.guilds)
+        content = rng.choice(CHATS) if rng.random() < chat_ratio else rng.choice(COMMANDS)
+        data = make_message(harness._next_id(), guild_id * 10, guild_id, rng.randint(1000, 10 ** 6), content)
+        channel = state.get_channel(guild_id * 10)
+        messages.append(discord.Message(state=state, channel=channel, data=data))
+    return messages
+
+
+async def make_bot(guilds: int):
+    discord_bot = DiscordBot('bench_token', DiscordBotMetrics())
+    discord_bot.outbound = OutboundQueue(discord_bot.metrics, global_rate=10 ** 12, channel_limit=10 ** 12, channel_per=1.0)
+    discord_bot.rate_limiter = RateLimiter({})
+    # 가짜 HTTP 의 Discord 제한 흉내(429 후 대기)도 끔
+    http = FakeHTTP(channel_limit=(10 ** 9, 1.0), global_limit=(10 ** 9, 1.0))
+    harness = GatewayHarness(discord_bot, guilds=guilds, http=http)
+    await harness.setup()
+    return discord_bot, harness
+
+
+async def run_path(handler, messages: list) -> float:
+    """메시지마다 핸들러를 호출하고 메시지당 ns 반환"""
+    started = time.perf_counter()
+    for message in messages:
+        await handler(message)
+    return (time.perf_counter() - started) / len(messages) * 1e9
+
+
+async def allocated_per_message(handler, messages: list, is_async: bool = True) -> float:
+    """메시지당 평균 최대 할당 바이트 (핸들러 안에서 만들었다가 바로 해제한 객체도 포함)"""
+    tracemalloc.start()
+    total = 0
+    for message in messages:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        if is_async:
+            await handler(message)
+        else:
+            handler(message)
+        _, peak = tracemalloc.get_traced_memory()
+        total += peak - before
+    tracemalloc.stop()
+    return total / len(messages)
+
+
+async def measure(messages_count: int, ratios: list, guilds: int):
+    discord_bot, harness = await make_bot(guilds)
+    bot = discord_bot.bot
+    filtered = bot.on_message
+
+    async def default(message):
+        # discord.py 기본 on_message
+        await commands.Bot.on_message(bot, message)
+
+    results = []
+    for ratio in ratios:
+        messages = build_messages(harness, messages_count, ratio)
+        # 캐시(설정, 전송 큐 채널 등)를 채우기 위해 한 번씩 먼저 실행
+        for handler in (default, filtered):
+            await run_path(handler, messages[:500])
+        row = {'ratio': ratio}
+        for name, handler in (('default', default), ('filtered', filtered)):
+            row[name] = min([await run_path(handler, messages) for _ in range(3)])
+            await harness.drain(timeout=10)
+        results.append(row)
+
+    chats = build_messages(harness, 2000, 1.0)
+    # get_traced_memory() 호출 자체의 할당을 빼기 위한 기준값
+    overhead = await allocated_per_message(lambda message: None, chats, is_async=False)
+    allocations = {
+        'default': await allocated_per_message(default, chats),
+        'filtered': await allocated_per_message(filtered, chats),
+        # 사전 필터 자체 (코루틴 객체를 만들지 않도록 동기로 호출)
+        'prefilter': await allocated_per_message(discord_bot._prefilter, chats, is_async=False),
+    }
+    discord_bot.cpu_pool.close()
+    return results, {name: max(value - overhead, 0.0) for name, value in allocations.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='on_message 사전 필터 벤치마크')
+    parser.add_argument('--messages', type=int, default=20000, help='비율마다 넣을 메시지 수')
+    parser.add_argument('--ratios', type=float, nargs='+', default=[0.9, 0.98, 0.995], help='대화 메시지 비율 목록')
+    parser.add_argument('--guilds', type=int, default=100, help='길드 수')
+    args = parser.parse_args()
+
+    # 기본 경로는 '??' 같은 대화에도 CommandNotFound 에러 로그를 남기므로 출력 비용이 섞이지 않게 끔
+    logging.disable(logging.CRITICAL)
+    results, allocations = asyncio.run(measure(args.messages, args.ratios, args.guilds))
+    print(f"{'chat ratio':>10} {'default ns/msg':>15} {'filtered ns/msg':>16} {'speedup':>8}")
+    for row in results:
+        print(f"{row['ratio']:>10.3f} {row['default']:>15,.0f} {row['filtered']:>16,.0f} "
+              f"{row['default'] / row['filtered']:>7.1f}x")
+    print("대화 메시지당 할당 바이트: " + ', '.join(f'{name} {value:,.0f}' for name, value in allocations.items()))
+
+
+if __name__ == '__main__':
+    main()
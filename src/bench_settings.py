@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Guild Settings Benchmark
+========================
+길드 수가 많을 때 설정 조회 비용을 비교하는 벤치마크
+
+- sqlite:   매 조회마다 SQLite 에서 읽는 방식
+- lru-all:  모든 길드가 캐시에 들어가는 경우 (capacity >= 길드 수)
+- lru-zipf: 캐시가 길드 수보다 작고, 일부 길드에 호출이 몰리는 경우 (Zipf 분포)
+- time:     ?time 응답 생성 (매번 pytz.timezone 호출 vs 캐시된 포맷터)
+
+사용법:
+    python bench_settings.py [--guilds 100000] [--lookups 200000]
+"""
+
+import argparse
+import asyncio
+import datetime
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import timeit
+
+import pytz
+
+from guild_settings import GUILD, GuildSettings, Settings, SQLiteSettingsStore, time_formatter
+
+TIMEZONES = ('Asia/Seoul', 'Asia/Tokyo', 'UTC', 'America/New_York', 'Europe/Berlin')
+
+
+def populate(store: SQLiteSettingsStore, guilds: int):
+    store.save_many([
+        (GUILD, guild_id, Settings(timezone=TIMEZONES[guild_id % len(TIMEZONES)], prefix='!'))
+        for guild_id in range(guilds)
+    ])
+
+
+def preload(settings: GuildSettings, store: SQLiteSettingsStore):
+    """모든 길드 설정을 한 번의 쿼리로 캐시에 채움 (cold fill 측정과 별개)"""
+    with sqlite3.connect(store.path) as conn:
+        rows = conn.execute('SELECT target_id, timezone, locale, prefix, disabled FROM settings').fetchall()
+    for guild_id, *row in rows:
+        settings._remember((GUILD, guild_id), Settings.from_row(row))
+
+
+class CountingStore:
+    """load 호출(캐시 미스) 수를 세는 래퍼"""
+
+    def __init__(self, store):
+        self.store = store
+        self.loads = 0
+
+    def load(self, scope, target_id):
+        self.loads += 1
+        return self.store.load(scope, target_id)
+
+
+def zipf_ids(guilds: int, count: int, rng: random.Random) -> list:
+    """순위 r 의 길드가 1/r 에 비례해 호출되는 길드 ID 목록"""
+    weights = [1 / rank for rank in range(1, guilds + 1)]
+    return rng.choices(range(guilds), weights=weights, k=count)
+
+
+async def measure_lookups(settings: GuildSettings, ids: list) -> float:
+    """조회 1회 평균 마이크로초 (캐시에 없으면 저장소에서 읽는 시간 포함)"""
+    started = time.perf_counter()
+    for guild_id in ids:
+        await settings.get(GUILD, guild_id)
+    return (time.perf_counter() - started) / len(ids) * 1e6
+
+
+async def run(args):
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as directory:
+        store = SQLiteSettingsStore(os.path.join(directory, 'settings.db'))
+        populate(store, args.guilds)
+        uniform = [rng.randrange(args.guilds) for _ in range(args.lookups)]
+
+        sample = uniform[:min(args.lookups, 20000)]
+        started = time.perf_counter()
+        for guild_id in sample:
+            store.load(GUILD, guild_id)
+        sqlite_us = (time.perf_counter() - started) / len(sample) * 1e6
+
+        cold_us = await measure_lookups(GuildSettings(store), sample[:2000])
+        full = GuildSettings(store, capacity=args.guilds)
+        preload(full, store)
+        full_us = await measure_lookups(full, uniform)
+
+        zipf = zipf_ids(args.guilds, args.lookups, rng)
+        counting = CountingStore(store)
+        small = GuildSettings(counting, capacity=args.cache)
+        zipf_us = await measure_lookups(small, zipf)
+        hit_ratio = 1 - counting.loads / len(zipf)
+
+    print(f"guilds={args.guilds:,} lookups={args.lookups:,}")
+    print(f"{'case':<28} {'us/lookup':>10}")
+    print(f"{'sqlite (every lookup)':<28} {sqlite_us:>10.2f}")
+    print(f"{'lru miss (executor load)':<28} {cold_us:>10.2f}")
+    print(f"{'lru-all warm':<28} {full_us:>10.2f}")
+    print(f"{f'lru-zipf (cache {args.cache:,})':<28} {zipf_us:>10.2f}  hit ratio {hit_ratio:.1%}")
+
+    def uncached():
+        datetime.datetime.now(pytz.timezone('Asia/Seoul')).strftime('%Y-%m-%d %H:%M:%S %Z')
+
+    def cached():
+        time_formatter('Asia/Seoul', 'ko').format()
+
+    for name, func in (('time/pytz.timezone', uncached), ('time/cached formatter', cached)):
+        best = min(timeit.repeat(func, number=20000, repeat=3))
+        print(f"{name:<28} {best / 20000 * 1e6:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='길드 설정 조회 벤치마크')
+    parser.add_argument('--guilds', type=int, default=100000, help='저장된 길드 수')
+    parser.add_argument('--lookups', type=int, default=200000, help='조회 횟수')
+    parser.add_argument('--cache', type=int, default=10000, help='lru-zipf 캐시 크기')
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite
+===============
+명령어 콜백, 명령어 훅, 메트릭 출력, 슬랙 로그 포맷팅의 1회 실행 비용을 측정하고
+기준값(bench_baseline.json)과 비교하는 마이크로 벤치마크 모음
+
+- 각 벤치마크는 약 --target 초가 걸리도록 반복 횟수를 정한 뒤 --repeat 번 측정해 최솟값을 씁니다.
+  측정은 벤치마크를 번갈아 가며 하고, timeit 처럼 GC 를 끕니다. (수거 시점에 따라 측정값이 크게 흔들림)
+- --save 는 결과를 기준값 파일에 기록합니다.
+- --compare 는 기준값보다 --threshold % 넘게, 그리고 --noise-floor ns 넘게 느려진 벤치마크가 있으면
+  종료 코드 1 로 실패합니다. 수 µs 짜리 벤치마크(훅, 짧은 로그 포맷팅)는 몇백 ns 의 잡음만으로도
+  비율이 크게 흔들리므로 절대 차이도 함께 봅니다.
+  같은 코드도 프로세스마다(메모리 배치, 해시 시드) 10~20% 씩 달라지므로, 느려진 것으로 보이는 벤치마크는
+  새 프로세스에서 --retries 번 다시 재서 가장 빠른 값으로 확인합니다. --save 도 같은 수의 프로세스에서
+  가장 빠른 값을 기준값으로 기록합니다.
+- 기준값은 측정한 기계에 따라 다르므로, 비교는 같은 기계(또는 같은 CI 러너)에서 저장한 값과 해야 합니다.
+
+사용법:
+    python bench_suite.py                     # 측정만
+    python bench_suite.py --save              # 기준값 갱신
+    python bench_suite.py --compare [--threshold 25]
+    python bench_suite.py --filter cmd.       # 이름에 cmd. 이 들어간 것만
+"""
+
+import argparse
+import asyncio
+import datetime
+import gc
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from unittest.mock import MagicMock
+
+from prometheus_client import generate_latest
+
+from discord_bot import DiscordBot, DiscordBotMetrics
+from send_queue import OutboundQueue
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+
+# 이보다 작은 절대 변화(ns/op)는 잡음으로 보고 느려짐으로 치지 않음
+NOISE_FLOOR_NS = 2000.0
+
+
+class NullChannel:
+    """전송 없이 바로 반환하는 채널"""
+
+    id = 1
+
+    async def send(self, *args, **kwargs):
+        return None
+
+
+def make_bot() -> DiscordBot:
+    metrics = DiscordBotMetrics()
+    bot = DiscordBot('bench_token', metrics)
+    # 속도 제한으로 기다리지 않도록 전송 큐 제한을 풂 (큐 자체의 비용은 측정에 포함)
+    bot.outbound = OutboundQueue(metrics, global_rate=10 ** 12, channel_limit=10 ** 12, channel_per=1.0)
+    for guild_id in range(1000):
+        metrics.guild_stats.add_guild(guild_id, 100, guild_id % 4)
+    return bot
+
+
+def make_ctx(bot: DiscordBot, command: str):
+    ctx = MagicMock()
+    ctx.channel = NullChannel()
+    ctx.command = bot.bot.get_command(command)
+    ctx.guild.id = 1
+    ctx.guild.shard_id = 0
+    ctx.author.id = 1000
+    ctx.message.created_at = datetime.datetime.now(datetime.timezone.utc)
+    return ctx
+
+
+def populate_registry(metrics: DiscordBotMetrics):
+    """운영 중인 봇과 비슷한 시계열 수를 채움"""
+    for shard in ('0', '1', '2', '3'):
+        for command in ('add', 'roll', 'choose', 'time', 'ping', 'info', 'odds'):
+            bound = metrics.bind_command(command, shard)
+            for value in (0.0007, 0.003, 0.02, 0.2):
+                bound.latency.observe(value)
+                bound.reply_latency.observe(value * 10)
+            bound.success.inc(100)
+        for error_type in ('command_error', 'metrics_update'):
+            metrics.bind_error(error_type, shard).inc()
+        metrics.heartbeat_timestamp.labels(shard=shard).set(time.time())
+        metrics.gateway_latency.labels(shard=shard).set(0.04)
+    for guild_id in range(1000):
+        metrics.guild_stats.add_guild(guild_id, 100, guild_id % 4)
+
+
+def build_benchmarks():
+    """(이름, 비동기 여부, 함수) 목록"""
+    bot = make_bot()
+    benchmarks = []
+
+    # 이름: (위치 인자, 키워드 인자)
+    commands = {
+        'add': ((2, 3), {}),
+        'roll': ((), {'dice': '4d6kh3+2'}),
+        'choose': ((), {'choices': '사과 바나나 오렌지'}),
+        'time': ((), {}),
+        'ping': ((), {}),
+        'info': ((), {}),
+    }
+    for name, (args, kwargs) in commands.items():
+        callback = bot.bot.get_command(name).callback
+        ctx = make_ctx(bot, name)
+        benchmarks.append((f'cmd.{name}', True, lambda cb=callback, c=ctx, a=args, k=kwargs: cb(c, *a, **k)))
+
+    ctx = make_ctx(bot, 'ping')
+    benchmarks.append(('hook.before_invoke', True, lambda: bot.bot._before_invoke(ctx)))
+
+    async def after_invoke():
+        ctx._start_time = time.perf_counter()
+        await bot.bot._after_invoke(ctx)
+    benchmarks.append(('hook.after_invoke', True, after_invoke))
+
+    metrics = DiscordBotMetrics()
+    populate_registry(metrics)
+    benchmarks.append(('metrics.generate_latest', False, lambda: generate_latest(metrics.registry)))
+
+    import slack_bot
+    short_logs = '\n'.join(f'2024-01-01 00:00:{i:02d} INFO command ok' for i in range(30))
+    long_logs = short_logs * 20
+    benchmarks.append(('slack.format_logs/short', False, lambda: slack_bot.format_logs_for_slack(short_logs)))
+    benchmarks.append(('slack.format_logs/long', False, lambda: slack_bot.format_logs_for_slack(long_logs)))
+    return benchmarks
+
+
+async def _time_async(func, number: int) -> float:
+    started = time.perf_counter()
+    for _ in range(number):
+        await func()
+    return time.perf_counter() - started
+
+
+def _time_sync(func, number: int) -> float:
+    started = time.perf_counter()
+    for _ in range(number):
+        func()
+    return time.perf_counter() - started
+
+
+async def _timed(func, is_async: bool, number: int) -> float:
+    return await _time_async(func, number) if is_async else _time_sync(func, number)
+
+
+async def calibrate(func, is_async: bool, target: float) -> int:
+    """한 번 실행해 캐시를 채우고, 측정 1회가 약 target 초가 되는 반복 횟수를 반환"""
+    number = 1
+    while True:
+        elapsed = await _timed(func, is_async, number)
+        if elapsed >= target / 10 or number >= 1 << 20:
+            break
+        number *= 2
+    return max(1, int(number * target / max(elapsed, 1e-9)))
+
+
+async def run(selected, target: float, repeat: int) -> dict:
+    """selected(이름 → 실행 여부) 를 통과한 벤치마크의 {이름: ns/op} (repeat 번 중 최솟값)
+
+    벤치마크마다 repeat 번을 몰아서 재지 않고 한 바퀴에 하나씩 돌아가며 잽니다.
+    몇 초 동안 기계 전체가 느려져도(다른 프로세스, CPU 스틸) 한 벤치마크의 측정이 모두 그 구간에
+    들어가지 않으므로 최솟값이 덜 흔들립니다.
+    """
+    benchmarks = []
+    for name, is_async, func in build_benchmarks():
+        if selected(name):
+            benchmarks.append((name, is_async, func, await calibrate(func, is_async, target)))
+    best = {}
+    gc.collect()
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            for name, is_async, func, number in benchmarks:
+                per_op = await _timed(func, is_async, number) / number
+                best[name] = min(best.get(name, per_op), per_op)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return {name: round(seconds * 1e9, 1) for name, seconds in best.items()}
+
+
+def run_worker(names, target: float, repeat: int) -> dict:
+    """새 파이썬 프로세스에서 names 벤치마크만 측정"""
+    output = subprocess.run(
+        [sys.executable, __file__, '--worker', ','.join(names), '--target', str(target), '--repeat', str(repeat)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def compare(results: dict, baseline: dict, threshold: float, noise_floor: float = NOISE_FLOOR_NS) -> list:
+    """기준값 대비 threshold % 와 noise_floor ns 를 모두 넘게 느려진 (이름, 기준 ns, 현재 ns, 변화 %) 목록"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        change = (current - previous) / previous * 100
+        if change > threshold and current - previous > noise_floor:
+            regressions.append((name, previous, current, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='마이크로 벤치마크 모음')
+    parser.add_argument('--save', action='store_true', help='결과를 기준값 파일에 기록')
+    parser.add_argument('--compare', action='store_true', help='기준값과 비교해 느려지면 실패')
+    parser.add_argument('--threshold', type=float, default=25.0, help='허용하는 최대 느려짐(%%)')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='기준값 JSON 경로')
+    parser.add_argument('--filter', default='', help='이름에 이 문자열이 들어간 벤치마크만 실행')
+    parser.add_argument('--noise-floor', type=float, default=NOISE_FLOOR_NS,
+                        help='느려짐으로 치는 최소 절대 변화(ns/op)')
+    parser.add_argument('--target', type=float, default=0.05, help='측정 1회당 목표 시간(초)')
+    parser.add_argument('--repeat', type=int, default=20, help='반복 측정 횟수 (최솟값 사용)')
+    parser.add_argument('--retries', type=int, default=3, help='--save 는 모든, --compare 는 느려진 벤치마크를 다시 잴 새 프로세스 수')
+    parser.add_argument('--worker', metavar='NAMES', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    if args.worker:
+        names = set(args.worker.split(','))
+        print(json.dumps(asyncio.run(run(lambda name: name in names, args.target, args.repeat))))
+        return
+
+    results = asyncio.run(run(lambda name: args.filter in name, args.target, args.repeat))
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('results', {})
+
+    if args.save:
+        # 비교할 때와 같은 조건이 되도록 기준값도 새 프로세스 --retries 개를 더 재서 가장 빠른 값을 씀
+        for _ in range(args.retries):
+            for name, value in run_worker(list(results), args.target, args.repeat).items():
+                results[name] = min(results[name], value)
+
+    if args.compare:
+        # 잡음으로 인한 오탐을 줄이기 위해 느려진 벤치마크만 새 프로세스에서 다시 재서 더 빠른 값을 씀
+        for _ in range(args.retries):
+            suspects = [name for name, *_ in compare(results, baseline, args.threshold, args.noise_floor)]
+            if not suspects:
+                break
+            for name, value in run_worker(suspects, args.target, args.repeat).items():
+                results[name] = min(results[name], value)
+
+    print(f"{'benchmark':<28} {'ns/op':>12} {'baseline':>12} {'change':>8}")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        change = f"{(current - previous) / previous * 100:+.1f}%" if previous else '-'
+        print(f"{name:<28} {current:>12,.0f} {previous or 0:>12,.0f} {change:>8}")
+
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'meta': {
+                    'python': platform.python_version(),
+                    'machine': platform.machine(),
+                    'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+                },
+                'results': {**baseline, **results},
+            }, f, indent=2, ensure_ascii=False, sort_keys=True)
+            f.write('\n')
+        print(f"기준값 저장: {args.baseline}")
+
+    if args.compare:
+        if not baseline:
+            print(f"기준값 파일이 없습니다: {args.baseline}")
+            sys.exit(1)
+        regressions = compare(results, baseline, args.threshold, args.noise_floor)
+        for name, previous, current, change in regressions:
+            print(f"REGRESSION {name}: {previous:,.0f} -> {current:,.0f} ns ({change:+.1f}% > {args.threshold}%)")
+        if regressions:
+            sys.exit(1)
+        print(f"느려진 벤치마크 없음 (허용 {args.threshold}%)")
+
+
+if __name__ == '__main__':
+    main()
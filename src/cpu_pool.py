@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+CPU Pool
+========
+CPU 를 오래 쓰는 명령어 작업을 별도 프로세스에서 실행하는 풀
+
+명령어 콜백은 게이트웨이 이벤트 루프에서 실행되므로, 계산이 길어지면 하트비트와 다른 길드의
+명령어가 모두 늦어집니다. 스레드는 GIL 때문에 순수 파이썬 계산에서는 도움이 되지 않으므로
+프로세스 풀을 씁니다.
+
+- 작업 함수와 인자, 반환값은 피클 가능해야 합니다. (모듈 최상위 함수)
+- 대기 + 실행 중인 작업이 max_pending 개면 새 작업은 바로 거절됩니다. (reason=full)
+- timeout 초 안에 끝나지 않으면 호출자에게 거절로 알립니다. (reason=timeout)
+  이미 실행 중인 작업은 중단할 수 없으므로 끝날 때까지 대기 개수에 포함되어, 느린 작업이 쌓이면
+  새 작업이 full 로 거절되고 이벤트 루프는 계속 응답합니다.
+- 워커는 fork 로 띄웁니다. spawn/forkserver 는 워커마다 __main__(discord_bot.py) 을 다시 임포트해
+  워커당 RSS 가 약 45MB 늘어나기 때문입니다. fork 는 다른 스레드가 잡고 있던 락까지 복사하므로
+  discord_bot.main() 은 로깅 리스너 스레드와 Flask 스레드를 띄우기 전에 prefork() 로 워커를 모두
+  만들어 둡니다. 이벤트 루프 안에서 처음 띄우는 start() 는 이미 스레드가 있는 상태에서 fork 하므로
+  테스트/하네스용입니다. (워커는 로깅 등 락을 쓰지 않는 순수 계산 함수만 실행)
+- 워커가 죽으면(예: 메모리 한도로 OOM kill) 풀 전체가 깨지므로, 깨진 풀을 버리고 새 풀을 만듭니다.
+  그 작업은 다시 보내도 또 워커를 죽일 수 있으므로 거절합니다. (reason=broken)
+"""
+
+import asyncio
+import concurrent.futures
+import multiprocessing
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+
+class CPUPoolRejected(Exception):
+    """풀이 가득 찼거나, 제한 시간 안에 끝나지 않았거나, 워커가 죽어 거절된 작업"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def _timed_call(func, args):
+    """워커 프로세스에서 실행: (결과, 실행 시간)"""
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def _noop():
+    return None
+
+
+class CPUPool:
+    """제한된 크기의 프로세스 풀 + 대기 개수 상한 + 제한 시간"""
+
+    def __init__(self, metrics=None, workers: int = 1, max_pending: int = 8, timeout: float = 5.0):
+        self.metrics = metrics
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0
+        self._executor = None
+
+    def _ensure_executor(self):
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('fork')
+            )
+        return self._executor
+
+    def _restart(self, broken):
+        """워커가 죽어 깨진 풀을 버림 (다음 작업에서 새 풀을 fork)
+
+        여러 작업이 같은 풀에서 함께 실패해도 한 번만 교체합니다.
+        새 워커는 로깅 리스너 등 다른 스레드가 이미 있는 상태에서 fork 되지만, 워커는 락을 쓰지 않는
+        순수 계산 함수만 실행하므로 물려받은 락을 건드리지 않습니다.
+        """
+        if self._executor is not broken:
+            return
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        if self.metrics is not None:
+            self.metrics.cpu_pool_restarts.inc()
+
+    def _warm_up(self) -> list:
+        # fork 컨텍스트의 ProcessPoolExecutor 는 첫 submit 에서 (관리 스레드를 띄우기 전에)
+        # 워커를 모두 fork 하고, 이후에는 새로 fork 하지 않음
+        executor = self._ensure_executor()
+        return [executor.submit(_noop) for _ in range(self.workers)]
+
+    def prefork(self):
+        """이벤트 루프 없이 워커 프로세스를 모두 띄움 (다른 스레드가 생기기 전에 호출)"""
+        concurrent.futures.wait(self._warm_up())
+
+    async def start(self):
+        """워커 프로세스가 모두 뜰 때까지 대기 (prefork() 를 하지 않았으면 여기서 fork)"""
+        await asyncio.gather(*(asyncio.wrap_future(future) for future in self._warm_up()))
+
+    def _set_pending(self, delta: int):
+        self.pending += delta
+        if self.metrics is not None:
+            self.metrics.cpu_pool_pending.set(self.pending)
+
+    def _reject(self, command: str, reason: str):
+        if self.metrics is not None:
+            self.metrics.cpu_pool_rejected.labels(command=command, reason=reason).inc()
+        raise CPUPoolRejected(reason)
+
+    async def run(self, command: str, func, *args):
+        """func(*args) 를 워커에서 실행하고 결과를 반환 (예외는 그대로 전달)"""
+        if self.pending >= self.max_pending:
+            self._reject(command, 'full')
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+        executor = self._ensure_executor()
+        try:
+            future = executor.submit(_timed_call, func, args)
+        except BrokenProcessPool:
+            # 앞선 작업 중에 워커가 죽어 이미 깨진 풀
+            self._restart(executor)
+            executor = self._ensure_executor()
+            future = executor.submit(_timed_call, func, args)
+        self._set_pending(1)
+
+        def finished(_):
+            # 제한 시간이 지나도 실제로 끝날 때까지는 대기 개수에 포함
+            try:
+                loop.call_soon_threadsafe(self._set_pending, -1)
+            except RuntimeError:
+                pass  # 루프가 이미 닫힘
+
+        future.add_done_callback(finished)
+        try:
+            result, elapsed = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            self._reject(command, 'timeout')
+        except BrokenProcessPool:
+            # 이 작업을 실행하던 (또는 같은 풀의) 워커가 죽음
+            self._restart(executor)
+            self._reject(command, 'broken')
+        if self.metrics is not None:
+            self.metrics.cpu_pool_exec.labels(command=command).observe(elapsed)
+            self.metrics.cpu_pool_wait.labels(command=command).observe(
+                max(time.perf_counter() - submitted - elapsed, 0.0)
+            )
+        return result
+
+    def close(self):
+        """대기 중인 작업은 취소하고 워커를 종료 (실행 중인 작업은 기다리지 않음)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
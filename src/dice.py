@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+"""
+Dice Expression Engine
+======================
+?roll 명령어용 주사위 식 파서/실행기
+
+지원 문법 (대소문자 무시, 공백 허용):
+- NdS        : S면체 주사위 N개 (N 생략 시 1개)        예) 2d6, d20
+- khK / klK  : 높은/낮은 K개만 유지 (k 는 kh 와 같음)   예) 4d6kh3
+- dhK / dlK  : 높은/낮은 K개 버림                       예) 4d6dl1
+- !          : 최댓값이 나오면 주사위를 하나 더 굴림     예) 10d10!
+- + / - 상수 : 여러 항과 상수를 더하고 뺌               예) 3d8+1d4-2
+
+식은 한 번 컴파일된 계획(plan)으로 바꿔 식 문자열 단위로 캐시합니다.
+주사위 수가 적으면 random.choices 로 한 번에 굴리고, 많으면 면별 개수를
+이항 분포로 뽑아 집계하므로 1000000d6 도 면 수에 비례하는 시간과 메모리로 끝납니다.
+
+?odds 용 확률 분포는 시뮬레이션 없이 경우의 수 배열을 컨볼루션해서 구합니다.
+경우의 수가 ODDS_PRECISION_BITS 를 넘으면 상위 비트만 남기는 고정소수점으로 바꿉니다.
+이때 잘린 비트로 생긴 오차의 상한을 함께 계산하므로, 평균 근처의 확률은 거의 정확하지만
+오차보다 작은 꼬리 확률은 "< x%" 나 범위로 표시합니다. (정확한 정수 계산은 1000d6 에 수 초가 걸림)
+(count, sides) 별 분포는 2의 거듭제곱 개수 단위로 쪼개 LRU 캐시에 저장하므로
+겹치는 질의는 이전 계산을 재사용합니다.
+"""
+
+import functools
+import math
+import random
+import re
+
+# 개별 주사위를 직접 굴리는 최대 개수 (넘으면 면별 개수로 집계)
+DIRECT_LIMIT = 1000
+# 결과에 개별 눈을 모두 보여주는 최대 개수
+DISPLAY_LIMIT = 50
+# 항 하나의 최대 주사위 수와 면 수
+MAX_DICE = 100_000_000
+MAX_SIDES = 1_000_000
+# 집계 방식에서 허용하는 최대 면 수 (면마다 이항 표본을 뽑으므로)
+AGGREGATE_MAX_SIDES = 1000
+# 식 하나의 최대 항 수
+MAX_TERMS = 20
+# 폭발 주사위 최대 반복 횟수
+MAX_EXPLODE_ROUNDS = 100
+# 확률 계산에서 허용하는 최대 주사위 수 / 결과 범위
+ODDS_MAX_DICE = 1000
+ODDS_MAX_SPAN = 50_000
+# 유지/버림 확률 계산의 최대 작업량 (면 수^2 x 주사위 수^2 x 유지 개수)
+ODDS_KEEP_MAX_WORK = 2_000_000
+# 분포 계수를 정확히 유지하는 최대 비트 수 (넘으면 상위 비트만 유지)
+ODDS_PRECISION_BITS = 64
+
+_TERM_PATTERN = re.compile(
+    r'([+-])(?:(\d*)d(\d+)(?:(k[hl]?|d[hl])(\d+))?(!?)|(\d+))'
+)
+
+
+class DiceError(ValueError):
+    """잘못된 주사위 식"""
+
+
+class DiceTerm:
+    """컴파일된 주사위 항 하나"""
+
+    __slots__ = ('sign', 'count', 'sides', 'keep', 'keep_high', 'explode', 'notation')
+
+    def __init__(self, sign, count, sides, keep, keep_high, explode, notation):
+        self.sign = sign
+        self.count = count
+        self.sides = sides
+        self.keep = keep  # 유지할 개수 (None 이면 전부)
+        self.keep_high = keep_high
+        self.explode = explode
+        self.notation = notation
+
+    def __repr__(self):
+        return f'DiceTerm({self.notation!r})'
+
+
+class DicePlan:
+    """컴파일된 주사위 식 (항 목록 + 상수)"""
+
+    __slots__ = ('expression', 'terms', 'constant')
+
+    def __init__(self, expression, terms, constant):
+        self.expression = expression
+        self.terms = terms
+        self.constant = constant
+
+    def roll(self, rng=random) -> 'RollResult':
+        return RollResult(self, [roll_term(term, rng) for term in self.terms])
+
+
+class TermResult:
+    """주사위 항 하나의 결과
+
+    rolls 는 개별 눈 목록 (집계 방식이면 None), counts 는 {눈: 개수} 입니다.
+    """
+
+    __slots__ = ('term', 'total', 'rolls', 'kept', 'counts', 'dice')
+
+    def __init__(self, term, total, dice, rolls=None, kept=None, counts=None):
+        self.term = term
+        self.total = total
+        self.dice = dice
+        self.rolls = rolls
+        self.kept = kept
+        self.counts = counts
+
+    def describe(self) -> str:
+        if self.rolls is not None and len(self.rolls) <= DISPLAY_LIMIT:
+            if self.kept is None:
+                return ', '.join(map(str, self.rolls))
+            kept = list(self.kept)
+            parts = []
+            for value in self.rolls:
+                if value in kept:
+                    kept.remove(value)
+                    parts.append(str(value))
+                else:
+                    parts.append(f'~~{value}~~')
+            return ', '.join(parts)
+        if self.counts is not None:
+            low, high = min(self.counts), max(self.counts)
+            mean = sum(face * n for face, n in self.counts.items()) / self.dice
+        else:
+            low, high = min(self.rolls), max(self.rolls)
+            mean = sum(self.rolls) / self.dice
+        return f'{self.dice:,}개, 평균 {mean:.2f}, 최소 {low}, 최대 {high}'
+
+
+class RollResult:
+    """주사위 식 전체의 결과"""
+
+    __slots__ = ('plan', 'terms', 'total')
+
+    def __init__(self, plan, terms):
+        self.plan = plan
+        self.terms = terms
+        self.total = sum(t.term.sign * t.total for t in terms) + plan.constant
+
+    def describe(self) -> str:
+        """결과 설명 (단일 항이면 눈 목록만, 여러 항이면 항별로 괄호)"""
+        if len(self.terms) == 1 and not self.plan.constant and self.terms[0].term.sign > 0:
+            return self.terms[0].describe()
+        parts = []
+        for index, result in enumerate(self.terms):
+            sign = '-' if result.term.sign < 0 else ('+' if index else '')
+            parts.append(f'{sign} [{result.describe()}]'.strip())
+        if self.plan.constant:
+            parts.append(f"{'-' if self.plan.constant < 0 else '+'} {abs(self.plan.constant)}")
+        return ' '.join(parts)
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_expression(expression: str) -> DicePlan:
+    """주사위 식을 실행 계획으로 컴파일 (식 문자열 단위로 캐시)"""
+    text = re.sub(r'\s+', '', expression.lower())
+    if not text:
+        raise DiceError('빈 주사위 식입니다.')
+    offset = 0
+    if text[0] not in '+-':
+        text, offset = '+' + text, 1
+
+    terms, constant, position = [], 0, 0
+    for match in _TERM_PATTERN.finditer(text):
+        if match.start() != position:
+            break
+        position = match.end()
+        sign = 1 if match.group(1) == '+' else -1
+        if match.group(7) is not None:
+            constant += sign * int(match.group(7))
+            continue
+        terms.append(_compile_term(sign, *match.group(2, 3, 4, 5, 6)))
+    if position != len(text):
+        raise DiceError(f'해석할 수 없는 부분: {text[max(position, offset):]}')
+    if not terms:
+        raise DiceError('주사위 항이 없습니다.')
+    if len(terms) > MAX_TERMS:
+        raise DiceError(f'항은 최대 {MAX_TERMS}개까지 가능합니다.')
+    return DicePlan(expression, tuple(terms), constant)
+
+
+def _compile_term(sign, count, sides, modifier, amount, explode):
+    count = int(count) if count else 1
+    sides = int(sides)
+    if count <= 0 or sides <= 0:
+        raise DiceError('주사위 수와 면 수는 1 이상이어야 합니다.')
+    if count > MAX_DICE:
+        raise DiceError(f'주사위는 최대 {MAX_DICE:,}개까지 굴릴 수 있습니다.')
+    if sides > MAX_SIDES:
+        raise DiceError(f'주사위 면은 최대 {MAX_SIDES:,}개까지 가능합니다.')
+    if count > DIRECT_LIMIT and sides > AGGREGATE_MAX_SIDES:
+        raise DiceError(
+            f'{AGGREGATE_MAX_SIDES}면을 넘는 주사위는 {DIRECT_LIMIT}개까지만 굴릴 수 있습니다.'
+        )
+    if explode and sides == 1:
+        raise DiceError('1면체 주사위는 폭발시킬 수 없습니다.')
+
+    keep, keep_high = None, True
+    if modifier:
+        amount = int(amount)
+        if amount > count:
+            raise DiceError('유지/버림 개수가 주사위 수보다 많습니다.')
+        if modifier in ('k', 'kh'):
+            keep, keep_high = amount, True
+        elif modifier == 'kl':
+            keep, keep_high = amount, False
+        elif modifier == 'dh':
+            keep, keep_high = count - amount, False
+        else:
+            keep, keep_high = count - amount, True
+
+    notation = f"{count}d{sides}{modifier or ''}{amount or ''}{'!' if explode else ''}"
+    return DiceTerm(sign, count, sides, keep, keep_high, bool(explode), notation)
+
+
+def roll_term(term: DiceTerm, rng=random) -> TermResult:
+    if term.count <= DIRECT_LIMIT:
+        return _roll_direct(term, rng)
+    return _roll_aggregate(term, rng)
+
+
+def _roll_direct(term, rng):
+    """주사위를 한 번에 굴려 개별 눈을 모두 기록"""
+    faces = range(1, term.sides + 1)
+    rolls = rng.choices(faces, k=term.count)
+    if term.explode:
+        extra = rolls.count(term.sides)
+        rounds = 0
+        while extra and rounds < MAX_EXPLODE_ROUNDS:
+            more = rng.choices(faces, k=extra)
+            rolls.extend(more)
+            extra = more.count(term.sides)
+            rounds += 1
+
+    kept = None
+    if term.keep is not None:
+        ordered = sorted(rolls, reverse=term.keep_high)
+        kept = ordered[:term.keep]
+        total = sum(kept)
+    else:
+        total = sum(rolls)
+    return TermResult(term, total, len(rolls), rolls=rolls, kept=kept)
+
+
+def _binomial(n, p, rng):
+    """이항 분포 표본 (분산이 크면 정규 근사)"""
+    if n <= 0 or p <= 0.0:
+        return 0
+    if p >= 1.0:
+        return n
+    if p > 0.5:
+        return n - _binomial(n, 1.0 - p, rng)
+    mean = n * p
+    variance = mean * (1.0 - p)
+    if variance >= 25.0:
+        value = int(round(rng.gauss(mean, math.sqrt(variance))))
+        return min(max(value, 0), n)
+    # 기하 분포 건너뛰기: 성공 사이 간격을 뽑아 O(np) 시간
+    log_q = math.log(1.0 - p)
+    successes, position = 0, 0
+    while True:
+        position += int(math.log(1.0 - rng.random()) / log_q) + 1
+        if position > n:
+            return successes
+        successes += 1
+
+
+def _face_counts(count, sides, rng):
+    """count 개 주사위의 면별 개수 {눈: 개수} (조건부 이항 분포로 다항 분포 표본 추출)"""
+    counts = {}
+    remaining = count
+    for face in range(1, sides + 1):
+        if remaining == 0:
+            break
+        n = remaining if face == sides else _binomial(remaining, 1.0 / (sides - face + 1), rng)
+        if n:
+            counts[face] = n
+            remaining -= n
+    return counts
+
+
+def _roll_aggregate(term, rng):
+    """면별 개수만 집계 (면 수에 비례하는 시간/메모리)"""
+    counts = _face_counts(term.count, term.sides, rng)
+    if term.explode:
+        extra = counts.get(term.sides, 0)
+        rounds = 0
+        while extra and rounds < MAX_EXPLODE_ROUNDS:
+            more = _face_counts(extra, term.sides, rng)
+            for face, n in more.items():
+                counts[face] = counts.get(face, 0) + n
+            extra = more.get(term.sides, 0)
+            rounds += 1
+    dice = sum(counts.values())
+
+    if term.keep is None:
+        total = sum(face * n for face, n in counts.items())
+        return TermResult(term, total, dice, counts=counts)
+
+    total, remaining = 0, term.keep
+    for face in sorted(counts, reverse=term.keep_high):
+        taken = min(remaining, counts[face])
+        total += face * taken
+        remaining -= taken
+        if not remaining:
+            break
+    return TermResult(term, total, dice, counts=counts)
+
+
+def roll(expression: str, rng=random) -> RollResult:
+    """주사위 식을 컴파일(캐시)하고 굴림"""
+    return compile_expression(expression).roll(rng)
+
+
+_ODDS_PATTERN = re.compile(r'^(.*?)(>=|<=|==|!=|=|>|<)\s*(-?\d+)\s*$')
+
+
+class Distribution:
+    """정수 결과의 경우의 수 분포 (offset 부터 시작하는 경우의 수 배열)
+
+    error 는 계수를 자르면서 생긴 오차의 상한입니다. (실제 경우의 수와 ways 의 차이의 절댓값 합, ways 단위)
+    """
+
+    __slots__ = ('offset', 'ways', 'error')
+
+    def __init__(self, offset: int, ways: tuple, error: int = 0):
+        self.offset = offset
+        self.ways = ways
+        self.error = error
+
+    @property
+    def total(self) -> int:
+        return sum(self.ways)
+
+    @classmethod
+    def normalized(cls, offset: int, ways: tuple, error: int = 0) -> 'Distribution':
+        """계수가 정밀도 한도를 넘으면 상위 비트만 남기고 양 끝의 0 을 잘라냄"""
+        excess = max(ways).bit_length() - ODDS_PRECISION_BITS
+        if excess > 0:
+            # 이전 오차를 새 단위로 올림하고, 계수마다 잘린 비트(1 미만)를 더함
+            error = ((error + (1 << excess) - 1) >> excess) + len(ways)
+            ways = tuple(w >> excess for w in ways)
+            start = next(i for i, w in enumerate(ways) if w)
+            end = len(ways) - next(i for i, w in enumerate(reversed(ways)) if w)
+            offset, ways = offset + start, ways[start:end]
+        return cls(offset, ways, error)
+
+    def convolve(self, other: 'Distribution') -> 'Distribution':
+        """두 독립 결과의 합의 분포"""
+        # (a + ea) * (b + eb) 의 오차 항 절댓값 합은 ea*Σb + eb*Σa + ea*eb 이하
+        error = self.error * other.total + other.error * self.total + self.error * other.error
+        return Distribution.normalized(self.offset + other.offset, _convolve(self.ways, other.ways), error)
+
+    def shifted(self, amount: int) -> 'Distribution':
+        return Distribution(self.offset + amount, self.ways, self.error)
+
+    def negated(self) -> 'Distribution':
+        return Distribution(-(self.offset + len(self.ways) - 1), self.ways[::-1], self.error)
+
+    def count_where(self, op: str, value: int) -> int:
+        """조건을 만족하는 경우의 수"""
+        checks = {
+            '>=': lambda v: v >= value, '<=': lambda v: v <= value,
+            '>': lambda v: v > value, '<': lambda v: v < value,
+            '==': lambda v: v == value, '=': lambda v: v == value,
+            '!=': lambda v: v != value,
+        }
+        check = checks[op]
+        return sum(w for i, w in enumerate(self.ways) if check(self.offset + i))
+
+
+def _convolve(a: tuple, b: tuple) -> tuple:
+    """두 경우의 수 배열의 컨볼루션
+
+    계수를 충분히 넓은 고정 폭 바이트로 이어 붙여 큰 정수 하나로 만든 뒤 곱하는
+    Kronecker 치환을 사용합니다. 곱셈은 CPython 의 큰 정수 곱셈(Karatsuba)이 처리하므로
+    파이썬 이중 루프보다 훨씬 빠르고 결과는 정확합니다.
+    """
+    bound = max(a) * max(b) * min(len(a), len(b))
+    width = (bound.bit_length() + 8) // 8
+    pack = lambda values: int.from_bytes(b''.join(v.to_bytes(width, 'little') for v in values), 'little')
+    length = len(a) + len(b) - 1
+    raw = (pack(a) * pack(b)).to_bytes(width * length, 'little')
+    return tuple(int.from_bytes(raw[i * width:(i + 1) * width], 'little') for i in range(length))
+
+
+@functools.lru_cache(maxsize=256)
+def sum_distribution(count: int, sides: int) -> Distribution:
+    """S면체 주사위 count 개 합의 분포 (2의 거듭제곱 단위로 캐시해 재사용)"""
+    if count == 1:
+        return Distribution(1, (1,) * sides)
+    high_bit = 1 << (count.bit_length() - 1)
+    if high_bit == count:
+        half = sum_distribution(count // 2, sides)
+        return half.convolve(half)
+    return sum_distribution(high_bit, sides).convolve(sum_distribution(count - high_bit, sides))
+
+
+@functools.lru_cache(maxsize=256)
+def keep_distribution(count: int, sides: int, keep: int, keep_high: bool) -> Distribution:
+    """높은/낮은 keep 개만 더한 합의 분포
+
+    유지되는 쪽 눈부터 차례로, 그 눈이 나온 주사위 개수를 정하며 (배치한 주사위 수, 유지 합) 의
+    경우의 수를 누적하는 동적 계획법입니다.
+    """
+    faces = range(sides, 0, -1) if keep_high else range(1, sides + 1)
+    states = {(0, 0): 1}
+    for face in faces:
+        next_states = {}
+        for (placed, kept_sum), ways in states.items():
+            for n in range(count - placed + 1):
+                kept_now = min(n, max(keep - placed, 0))
+                key = (placed + n, kept_sum + kept_now * face)
+                next_states[key] = next_states.get(key, 0) + ways * math.comb(count - placed, n)
+        states = next_states
+    sums = {}
+    for (placed, kept_sum), ways in states.items():
+        if placed == count:
+            sums[kept_sum] = sums.get(kept_sum, 0) + ways
+    low, high = min(sums), max(sums)
+    return Distribution.normalized(low, tuple(sums.get(v, 0) for v in range(low, high + 1)))
+
+
+def term_distribution(term: DiceTerm) -> Distribution:
+    if term.explode:
+        raise DiceError('폭발 주사위는 확률 계산을 지원하지 않습니다.')
+    if term.keep is None or term.keep == term.count:
+        if term.count > ODDS_MAX_DICE:
+            raise DiceError(f'확률 계산은 항당 주사위 {ODDS_MAX_DICE}개까지 가능합니다.')
+        dist = sum_distribution(term.count, term.sides)
+    else:
+        if term.sides ** 2 * term.count ** 2 * term.keep > ODDS_KEEP_MAX_WORK:
+            raise DiceError('유지/버림 확률 계산을 하기에는 주사위가 너무 많습니다.')
+        dist = keep_distribution(term.count, term.sides, term.keep, term.keep_high)
+    return dist if term.sign > 0 else dist.negated()
+
+
+def plan_distribution(plan: DicePlan) -> Distribution:
+    """주사위 식 전체 결과의 정확한 분포"""
+    span = sum(term.count * (term.sides - 1) for term in plan.terms)
+    if span > ODDS_MAX_SPAN:
+        raise DiceError(f'결과 범위가 너무 넓습니다. (최대 {ODDS_MAX_SPAN:,})')
+    result = None
+    for term in plan.terms:
+        dist = term_distribution(term)
+        result = dist if result is None else result.convolve(dist)
+    return result.shifted(plan.constant)
+
+
+class OddsResult:
+    """?odds 질의 결과"""
+
+    __slots__ = ('expression', 'op', 'value', 'favorable', 'total', 'error', 'mean', 'stdev', 'low', 'high')
+
+    def __init__(self, expression, op, value, dist: Distribution, low: int, high: int):
+        self.expression = expression
+        self.op = op
+        self.value = value
+        self.total = dist.total
+        self.error = dist.error
+        self.favorable = dist.count_where(op, value) if op else None
+        # 정밀도 한도로 잘린 꼬리가 있을 수 있으므로 범위는 식에서 직접 계산
+        self.low = low
+        self.high = high
+        weighted = sum(w * (dist.offset + i) for i, w in enumerate(dist.ways))
+        self.mean = weighted / self.total
+        square = sum(w * (dist.offset + i) ** 2 for i, w in enumerate(dist.ways))
+        self.stdev = math.sqrt(max(square / self.total - self.mean ** 2, 0.0))
+
+    @property
+    def probability(self) -> float:
+        return self.favorable / self.total
+
+    @property
+    def bounds(self) -> tuple:
+        """잘린 계수의 오차를 반영한 (최소, 최대) 확률"""
+        satisfied = _count_satisfied(self.op, self.value, self.low, self.high)
+        # 범위 안의 어떤 결과도 (또는 모든 결과가) 조건을 만족하면 오차와 관계없이 정확함
+        if satisfied == 0:
+            return 0.0, 0.0
+        if satisfied == self.high - self.low + 1:
+            return 1.0, 1.0
+        low = max(self.favorable - self.error, 0) / (self.total + self.error)
+        high = min((self.favorable + self.error) / max(self.total - self.error, 1), 1.0)
+        return low, high
+
+    def describe(self) -> str:
+        summary = f'평균 {self.mean:.2f}, 표준편차 {self.stdev:.2f}, 범위 {self.low}~{self.high}'
+        if self.op is None:
+            return f'📊 {self.expression}: {summary}'
+        low, high = self.bounds
+        if high - low <= self.probability * 1e-4:
+            # 표시하는 유효 숫자 안에서 정확함
+            text = _format_percent(self.probability)
+        elif low == 0:
+            text = f'< {_format_percent(high)}'
+        else:
+            text = f'{_format_percent(low)} ~ {_format_percent(high)}'
+        return f'📊 P({self.expression} {self.op} {self.value}) = **{text}** ({summary})'
+
+
+def _format_percent(probability: float) -> str:
+    percent = probability * 100
+    return f'{percent:.4f}%' if percent == 0 or percent >= 0.0001 else f'{percent:.3e}%'
+
+
+def _count_satisfied(op: str, value: int, low: int, high: int) -> int:
+    """low~high 의 정수 중 조건을 만족하는 개수"""
+    inside = 1 if low <= value <= high else 0
+    counts = {
+        '>=': high - max(value, low) + 1, '>': high - max(value + 1, low) + 1,
+        '<=': min(value, high) - low + 1, '<': min(value - 1, high) - low + 1,
+        '==': inside, '=': inside, '!=': high - low + 1 - inside,
+    }
+    return max(counts[op], 0)
+
+
+def odds(query: str) -> OddsResult:
+    """'10d6 >= 40' 또는 '4d6kh3' 형태의 질의에 대한 정확한 확률 계산"""
+    match = _ODDS_PATTERN.match(query)
+    if match:
+        expression, op, value = match.group(1).strip(), match.group(2), int(match.group(3))
+    else:
+        expression, op, value = query.strip(), None, None
+    plan = compile_expression(expression)
+    low = plan.constant + sum(_term_bounds(term)[0 if term.sign > 0 else 1] * term.sign for term in plan.terms)
+    high = plan.constant + sum(_term_bounds(term)[1 if term.sign > 0 else 0] * term.sign for term in plan.terms)
+    return OddsResult(expression, op, value, plan_distribution(plan), low, high)
+
+
+def _term_bounds(term: DiceTerm):
+    kept = term.count if term.keep is None else term.keep
+    return kept, kept * term.sides
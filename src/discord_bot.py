@@ -9,291 +9,1642 @@ Features:
 - Prometheus metrics collection
 - Health check endpoints
 - Error tracking and logging
+
+메트릭 서버 모드 (METRICS_SERVER 환경변수):
+- asyncio (기본값): 봇과 같은 이벤트 루프에서 도는 aiohttp 서버
+- flask: 별도 스레드에서 도는 Flask 개발 서버
 """
 
+import time as time_module
+
+# 아래 import(discord, prometheus_client, aiohttp 등)에 걸리는 시간 (시작 단계 메트릭의 import 단계)
+# Flask, pytz 처럼 시작할 때 필요 없는 모듈은 처음 쓸 때 불러옴 (startup_report.py 로 모듈별 시간 확인)
+_IMPORT_STARTED = time_module.monotonic()
+
 import os
+import asyncio
 import discord
+from discord import app_commands
 from discord.ext import commands, tasks
 import random
 import datetime
-import pytz
-from prometheus_client import Counter, Gauge, Histogram, generate_latest, Info
-from flask import Flask, Response
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, Info, CollectorRegistry
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from aiohttp import web
 import threading
-import time as time_module
 import logging
+import math
+import shlex
+import signal
+import socket
+
+from shard_coordinator import ShardCoordinator, SQLiteLeaseStore
+from send_queue import OutboundQueue
+from rate_limiter import RateLimiter, parse_limits, DEFAULT_LIMITS
+from loop_monitor import LoopMonitor
+from log_pipeline import setup_logging
+from cpu_pool import CPUPool, CPUPoolRejected
+import profiler
+from profiler import DebugGate
+import memory_debug
+from memory_debug import MemoryTracer
+from gateway_session import ResumableBot, SessionStore, RESUME_RESULTS, token_fingerprint
+from guild_settings import GuildSettings, SQLiteSettingsStore, GUILD, USER, DEFAULT_PREFIX, LOCALES, resolve_timezone
+import dice as dice_engine
+
+_IMPORT_FINISHED = time_module.monotonic()
+IMPORT_SECONDS = _IMPORT_FINISHED - _IMPORT_STARTED
+
+# 명령어 지연시간 히스토그램 버킷 (0.5ms ~ 10s)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 샤드와 무관한 에러 (메트릭 서버, 시작 실패 등) 에 붙는 shard 레이블 값
+NO_SHARD = 'none'
+
+# full: discord.py 기본 캐시 (시작 시 모든 멤버 청킹), lean: 멤버/메시지 캐시 없음
+MEMBER_CACHE_MODES = ('full', 'lean')
+
+# 프로세스 풀이 가득 찼거나 계산이 제한 시간을 넘었을 때의 응답
+CPU_BUSY_MESSAGE = '⏳ 지금은 계산 요청이 많거나 너무 오래 걸립니다. 잠시 후 다시 시도해주세요.'
+
+# 메시지 사전 필터 결과 (bot: 봇이 보낸 메시지, no_prefix: 접두사 첫 글자 불일치,
+# unknown_command: 접두사 뒤가 등록된 명령어/별칭이 아님, dispatched: 명령어 처리로 넘김)
+MESSAGE_FILTER_RESULTS = ('bot', 'no_prefix', 'unknown_command', 'draining', 'dispatched')
+
+# 메시지 내용 인텐트가 없을 때 유일한 접두사인 봇 멘션(<@id>)의 첫 글자
+MENTION_INITIALS = ('<',)
+
+# 종료 시 끝날 때까지 기다리는 명령어 핸들러 태스크 (discord.py 가 붙이는 태스크 이름)
+COMMAND_TASK_PREFIXES = ('discord.py: on_message', 'CommandTree-invoker')
+
+# 시작 단계 (import: 모듈 로드, init: 메트릭/봇 객체/메트릭 서버/설정 로드, login: 토큰 로그인 + setup_hook, connect: 게이트웨이 연결부터 READY/RESUMED 까지,
+# hydrate: READY 후 GUILD_CREATE 와 멤버 청킹으로 캐시를 채워 on_ready 까지, RESUME 이면 hydrate 없음)
+STARTUP_PHASES = ('import', 'init', 'login', 'connect', 'hydrate')
+
+# 인터랙션에 첫 응답을 보내야 하는 시간 (이보다 오래된 인터랙션은 응답할 수 없음)
+INTERACTION_RESPONSE_WINDOW = 3.0
+
+
+class GuildStats:
+    """이벤트 기반 길드/멤버 누적 카운터 (샤드별)
+
+    길드 가입/탈퇴, 멤버 가입/탈퇴, 길드 available/unavailable 이벤트로
+    합계를 바로 갱신하므로 전체 길드를 순회할 필요가 없습니다.
+    """
+
+    def __init__(self):
+        self._members = {}  # guild_id -> member_count
+        self._shards = {}  # guild_id -> shard_id
+        self.guilds_by_shard = {}
+        self.members_by_shard = {}
+        self.guild_count = 0
+        self.member_total = 0
+
+    def _adjust(self, shard_id: int, guilds: int, members: int):
+        self.guilds_by_shard[shard_id] = self.guilds_by_shard.get(shard_id, 0) + guilds
+        self.members_by_shard[shard_id] = self.members_by_shard.get(shard_id, 0) + members
+        self.guild_count += guilds
+        self.member_total += members
+
+    def add_guild(self, guild_id: int, member_count: int, shard_id: int = 0):
+        """길드 추가 (이미 있으면 멤버 수만 갱신)"""
+        if guild_id in self._members:
+            self.remove_guild(guild_id)
+        member_count = member_count or 0
+        self._members[guild_id] = member_count
+        self._shards[guild_id] = shard_id
+        self._adjust(shard_id, 1, member_count)
+
+    def remove_guild(self, guild_id: int):
+        """길드 제거 (탈퇴 또는 unavailable)"""
+        previous = self._members.pop(guild_id, None)
+        if previous is not None:
+            self._adjust(self._shards.pop(guild_id), -1, -previous)
+
+    def member_joined(self, guild_id: int):
+        if guild_id in self._members:
+            self._members[guild_id] += 1
+            self._adjust(self._shards[guild_id], 0, 1)
+
+    def member_left(self, guild_id: int):
+        if self._members.get(guild_id):
+            self._members[guild_id] -= 1
+            self._adjust(self._shards[guild_id], 0, -1)
+
+    def reconcile(self, guilds):
+        """실제 길드 목록과 비교해 누적값을 보정하고 (길드 드리프트, 멤버 드리프트)를 반환"""
+        previous = (self.guild_count, self.member_total)
+        self.__init__()
+        for guild in guilds:
+            if not guild.unavailable:
+                self.add_guild(guild.id, guild.member_count, guild.shard_id or 0)
+        return (self.guild_count - previous[0], self.member_total - previous[1])
+
+
+class GuildStatsCollector:
+    """스크레이프 시점에 GuildStats 값을 읽어오는 커스텀 컬렉터"""
+
+    def __init__(self, stats: GuildStats):
+        self.stats = stats
+
+    def collect(self):
+        guilds = GaugeMetricFamily(
+            'discord_bot_active_guilds',
+            'Number of active guilds',
+            labels=['shard']
+        )
+        users = GaugeMetricFamily(
+            'discord_bot_active_users',
+            'Number of active users',
+            labels=['shard']
+        )
+        for shard_id, count in sorted(self.stats.guilds_by_shard.items()):
+            guilds.add_metric([str(shard_id)], count)
+            users.add_metric([str(shard_id)], self.stats.members_by_shard.get(shard_id, 0))
+        yield guilds
+        yield users
+
+
+class DiscordCacheCollector:
+    """discord.py 내부 캐시 크기의 마지막 스냅샷을 노출하는 커스텀 컬렉터
+
+    캐시 사전은 이벤트 루프에서만 바뀌므로 크기도 루프에서 refresh() 로 재고(DiscordBot.update_metrics),
+    스크레이프(Flask 모드에서는 다른 스레드)는 스냅샷만 읽습니다. 길드 수에 비례하는 순회 비용은
+    스크레이프마다가 아니라 갱신 주기마다 한 번 듭니다.
+    클라이언트는 DiscordBot 이 봇을 만들 때마다 attach 로 교체합니다.
+    """
+
+    def __init__(self):
+        self.client = None
+        self.snapshot = {}
+
+    def attach(self, client):
+        self.client = client
+        self.snapshot = {}
+
+    def sizes(self) -> dict:
+        """현재 캐시 크기 (이벤트 루프에서 호출)"""
+        client = self.client
+        if client is None:
+            return {}
+        state = client._connection
+        guilds = list(state._guilds.values())
+        return {
+            'guilds': len(guilds),
+            'members': sum(len(guild._members) for guild in guilds),
+            'channels': sum(len(guild._channels) for guild in guilds),
+            'threads': sum(len(guild._threads) for guild in guilds),
+            'users': len(state._users),
+            'messages': len(state._messages) if state._messages is not None else 0,
+            'emojis': len(state._emojis),
+            'stickers': len(state._stickers),
+            'private_channels': len(state._private_channels),
+        }
+
+    def refresh(self):
+        """캐시 크기를 다시 재서 스냅샷을 통째로 교체 (읽는 쪽은 바뀌지 않는 사전만 봄)"""
+        self.snapshot = self.sizes()
+
+    def collect(self):
+        entries = GaugeMetricFamily(
+            'discord_bot_cache_entries',
+            'Number of entries in discord.py internal caches',
+            labels=['cache']
+        )
+        for cache, size in self.snapshot.items():
+            entries.add_metric([cache], size)
+        yield entries
+
+
+class LogSuppressionCollector:
+    """스크레이프 시점에 로그 샘플링으로 버린 레코드 수를 읽어오는 커스텀 컬렉터"""
+
+    def __init__(self, sampling):
+        self.sampling = sampling
+
+    def collect(self):
+        suppressed = CounterMetricFamily(
+            'discord_bot_log_suppressed',
+            'Number of repeated log records dropped by sampling',
+            labels=['level']
+        )
+        for level, count in sorted(self.sampling.suppressed.items()):
+            suppressed.add_metric([level], count)
+        yield suppressed
+
+
+class MessageFilterCollector:
+    """on_message 사전 필터 결과별 메시지 수를 스크레이프 시점에 읽어오는 커스텀 컬렉터
+
+    모든 메시지가 지나가는 경로라 Counter.inc() 의 락과 객체 생성을 피하려고 정수 사전으로 셉니다.
+    """
+
+    def __init__(self):
+        self.counts = dict.fromkeys(MESSAGE_FILTER_RESULTS, 0)
+
+    def collect(self):
+        messages = CounterMetricFamily(
+            'discord_bot_message_filter',
+            'Incoming messages by prefix pre-filter result',
+            labels=['result']
+        )
+        for result, count in self.counts.items():
+            messages.add_metric([result], count)
+        yield messages
+
+
+class InfoSnapshot:
+    """?info 임베드 스냅샷
+
+    임베드는 한 번만 만들고, 서버 수/사용자 수/지연시간(ms) 중 바뀐 필드만 고쳐 씁니다.
+    입력이 그대로면 TTL 이 지나기 전까지 만들어 둔 임베드를 그대로 돌려줍니다.
+    """
+
+    FIELDS = ("서버 수", "사용자 수", "지연시간")
+
+    def __init__(self, ttl: float = 30.0, metrics=None):
+        self.ttl = ttl
+        self.metrics = metrics
+        self._values = None
+        self._embed = None
+        self._built_at = 0.0
+        if metrics is not None:
+            self._hits = metrics.info_cache.labels(result='hit')
+            self._refreshes = metrics.info_cache.labels(result='refresh')
+
+    def _build(self, values) -> discord.Embed:
+        embed = discord.Embed(title="🤖 봇 정보", color=0x00ff00)
+        for name, value in zip(self.FIELDS, values):
+            embed.add_field(name=name, value=value, inline=True)
+        embed.set_footer(text="Discord Bot v1.0.0")
+        return embed
+
+    def get(self, guild_count: int, user_count: int, latency: float) -> discord.Embed:
+        latency_text = f"{round(latency * 1000)}ms" if math.isfinite(latency) else "연결 중"
+        values = (str(guild_count), str(user_count), latency_text)
+        now = time_module.monotonic()
+        if values == self._values and now - self._built_at < self.ttl:
+            if self.metrics is not None:
+                self._hits.inc()
+            return self._embed
+
+        if self._embed is None:
+            self._embed = self._build(values)
+        else:
+            for index, (name, old, new) in enumerate(zip(self.FIELDS, self._values, values)):
+                if old != new:
+                    self._embed.set_field_at(index, name=name, value=new, inline=True)
+        self._embed.timestamp = datetime.datetime.now(datetime.timezone.utc)
+        self._values, self._built_at = values, now
+        if self.metrics is not None:
+            self._refreshes.inc()
+        return self._embed
+
+
+class BoundCommandMetrics:
+    """명령어 하나에 대해 미리 바인딩된 메트릭 자식"""
+
+    __slots__ = ('success', 'error', 'latency', 'reply_latency')
+
+    def __init__(self, success, error, latency, reply_latency):
+        self.success = success
+        self.error = error
+        self.latency = latency
+        self.reply_latency = reply_latency
 
 
 class DiscordBotMetrics:
-    """Discord 봇 메트릭 관리 클래스"""
+    """Discord 봇 메트릭 관리 클래스
+
+    메트릭은 인스턴스마다 별도 레지스트리에 등록되므로 한 프로세스에 여러 개를 만들어도 충돌하지 않습니다.
+    명령어/에러 타입별 레이블 자식은 bind_command/bind_error 로 한 번만 만들어 재사용합니다.
+    """
     
-    def __init__(self):
+    def __init__(self, registry: CollectorRegistry = None):
+        self.registry = registry if registry is not None else CollectorRegistry()
+        self._command_children = {}
+        self._error_children = {}
+        
         # 프로메테우스 메트릭 정의
         self.command_counter = Counter(
             'discord_bot_commands_total', 
             'Total number of commands executed', 
-            ['command', 'status']
+            ['command', 'status', 'shard'],
+            registry=self.registry
         )
         self.message_latency = Histogram(
             'discord_bot_message_latency_seconds', 
-            'Message processing latency'
+            'Command callback latency (monotonic clock)',
+            ['command', 'shard'],
+            buckets=LATENCY_BUCKETS,
+            registry=self.registry
+        )
+        self.reply_latency = Histogram(
+            'discord_bot_reply_latency_seconds',
+            'End-to-end latency from message creation to acknowledged reply',
+            ['command', 'shard'],
+            buckets=LATENCY_BUCKETS,
+            registry=self.registry
         )
         self.messages_sent = Counter(
             'discord_bot_messages_sent_total', 
-            'Number of messages sent'
+            'Number of message API calls made',
+            registry=self.registry
+        )
+        self.send_queue_depth = Gauge(
+            'discord_bot_send_queue_depth',
+            'Number of replies waiting in the outbound send queue',
+            registry=self.registry
+        )
+        self.send_wait = Histogram(
+            'discord_bot_send_wait_seconds',
+            'Time a reply waited in the outbound send queue',
+            buckets=LATENCY_BUCKETS,
+            registry=self.registry
+        )
+        self.send_coalesced = Counter(
+            'discord_bot_send_coalesced_total',
+            'Number of replies merged into another message',
+            registry=self.registry
+        )
+        self.rate_limited = Counter(
+            'discord_bot_rate_limited_total',
+            'Number of command invocations rejected by the rate limiter',
+            ['command', 'scope'],
+            registry=self.registry
+        )
+        self.rate_limit_keys = Gauge(
+            'discord_bot_rate_limit_keys',
+            'Number of keys tracked by the command rate limiter',
+            registry=self.registry
+        )
+        self.info_cache = Counter(
+            'discord_bot_info_cache_total',
+            '?info snapshot lookups by result (hit or refresh)',
+            ['result'],
+            registry=self.registry
+        )
+        self.settings_lookups = Counter(
+            'discord_bot_settings_lookups_total',
+            'Guild/user settings lookups by cache result',
+            ['result'],
+            registry=self.registry
+        )
+        self.settings_writes = Counter(
+            'discord_bot_settings_writes_total',
+            'Number of settings rows written to the settings store',
+            registry=self.registry
+        )
+        self.cpu_pool_pending = Gauge(
+            'discord_bot_cpu_pool_pending',
+            'Number of CPU-bound jobs queued or running in the process pool',
+            registry=self.registry
+        )
+        self.cpu_pool_wait = Histogram(
+            'discord_bot_cpu_pool_wait_seconds',
+            'Time a CPU-bound job waited for a pool worker (including IPC)',
+            ['command'],
+            buckets=LATENCY_BUCKETS,
+            registry=self.registry
+        )
+        self.cpu_pool_exec = Histogram(
+            'discord_bot_cpu_pool_exec_seconds',
+            'Execution time of a CPU-bound job inside a pool worker',
+            ['command'],
+            buckets=LATENCY_BUCKETS,
+            registry=self.registry
+        )
+        self.cpu_pool_rejected = Counter(
+            'discord_bot_cpu_pool_rejected_total',
+            'Number of CPU-bound jobs rejected (pool full, timed out or worker died)',
+            ['command', 'reason'],
+            registry=self.registry
+        )
+        self.cpu_pool_restarts = Counter(
+            'discord_bot_cpu_pool_restarts_total',
+            'Number of times the process pool was rebuilt after a worker died',
+            registry=self.registry
         )
         self.error_count = Counter(
             'discord_bot_errors_total', 
             'Number of errors', 
-            ['error_type']
+            ['error_type', 'shard'],
+            registry=self.registry
         )
         self.heartbeat_timestamp = Gauge(
             'discord_bot_heartbeat_timestamp_seconds', 
-            'Timestamp of last heartbeat'
+            'Timestamp of last heartbeat',
+            ['shard'],
+            registry=self.registry
+        )
+        self.loop_lag = Histogram(
+            'discord_bot_event_loop_lag_seconds',
+            'Scheduling delay of the bot event loop',
+            buckets=LATENCY_BUCKETS,
+            registry=self.registry
+        )
+        self.loop_tasks = Gauge(
+            'discord_bot_event_loop_tasks',
+            'Number of tasks running on the bot event loop',
+            registry=self.registry
+        )
+        self.loop_stalls = Counter(
+            'discord_bot_event_loop_stalls_total',
+            'Number of times the watchdog found the event loop stalled',
+            registry=self.registry
+        )
+        self.gateway_latency = Gauge(
+            'discord_bot_gateway_latency_seconds',
+            'Gateway heartbeat latency per shard',
+            ['shard'],
+            registry=self.registry
+        )
+        self.shard_events = Counter(
+            'discord_bot_shard_events_total',
+            'Shard connection events',
+            ['shard', 'event'],
+            registry=self.registry
+        )
+        self.shard_owned = Gauge(
+            'discord_bot_shard_owned',
+            'Whether this pod holds the lease for a shard (1) or not (0)',
+            ['shard'],
+            registry=self.registry
+        )
+        self.shard_rebalances = Counter(
+            'discord_bot_shard_rebalances_total',
+            'Number of shard assignment changes on this pod',
+            registry=self.registry
         )
-        self.active_guilds = Gauge(
-            'discord_bot_active_guilds', 
-            'Number of active guilds'
+        self.shard_lease_lost = Counter(
+            'discord_bot_shard_lease_lost_total',
+            'Number of shard leases lost to another pod',
+            registry=self.registry
         )
-        self.active_users = Gauge(
-            'discord_bot_active_users', 
-            'Number of active users'
+        self.coordinator_members = Gauge(
+            'discord_bot_coordinator_members',
+            'Number of live pods in shard coordination',
+            registry=self.registry
         )
-        self.bot_info = Info('discord_bot_info', 'Bot information')
+        self.guild_stats_drift = Counter(
+            'discord_bot_guild_stats_drift_total',
+            'Absolute drift corrected by guild stats reconciliation',
+            ['kind'],
+            registry=self.registry
+        )
+        self.time_to_ready = Gauge(
+            'discord_bot_time_to_ready_seconds',
+            'Seconds from process start until the gateway session was ready',
+            ['mode'],
+            registry=self.registry
+        )
+        self.startup_phase = Gauge(
+            'discord_bot_startup_phase_seconds',
+            'Duration of each startup phase',
+            ['phase'],
+            registry=self.registry
+        )
+        self.startup_phase.labels(phase='import').set(IMPORT_SECONDS)
+        self.session_resumes = Counter(
+            'discord_bot_session_resumes_total',
+            'Gateway session resume attempts after restart',
+            ['result'],
+            registry=self.registry
+        )
+        for result in RESUME_RESULTS:
+            self.session_resumes.labels(result=result)
+        self.shutdown_drain = Gauge(
+            'discord_bot_shutdown_drain_seconds',
+            'Time spent waiting for in-flight commands on shutdown',
+            registry=self.registry
+        )
+        # 길드/사용자 수는 이벤트로 갱신되고 스크레이프 시점에 읽힘
+        self.guild_stats = GuildStats()
+        self.registry.register(GuildStatsCollector(self.guild_stats))
+        # discord.py 캐시 크기 (어느 캐시가 메모리를 키우는지 확인용, update_metrics 주기로 갱신)
+        self.discord_caches = DiscordCacheCollector()
+        self.registry.register(self.discord_caches)
+        # on_message 사전 필터 결과별 메시지 수
+        self.message_filter = MessageFilterCollector()
+        self.registry.register(self.message_filter)
+        self.bot_info = Info('discord_bot_info', 'Bot information', registry=self.registry)
+        # 이 프로세스가 담당하는 샤드 목록 (DiscordBot 이 설정)
+        self.shard_ids = [0]
+
+    def bind_command(self, command: str, shard: str) -> 'BoundCommandMetrics':
+        """(명령어, 샤드) 의 레이블 자식을 한 번만 만들고 이후에는 캐시에서 반환"""
+        bound = self._command_children.get((command, shard))
+        if bound is None:
+            bound = BoundCommandMetrics(
+                success=self.command_counter.labels(command=command, status='success', shard=shard),
+                error=self.command_counter.labels(command=command, status='error', shard=shard),
+                latency=self.message_latency.labels(command=command, shard=shard),
+                reply_latency=self.reply_latency.labels(command=command, shard=shard)
+            )
+            self._command_children[(command, shard)] = bound
+        return bound
+
+    def bind_error(self, error_type: str, shard: str):
+        """(에러 타입, 샤드) 의 에러 카운터 자식을 캐시에서 반환"""
+        child = self._error_children.get((error_type, shard))
+        if child is None:
+            child = self.error_count.labels(error_type=error_type, shard=shard)
+            self._error_children[(error_type, shard)] = child
+        return child
+
+
+def build_health_payload(discord_bot=None):
+    """헬스 체크 응답 생성 (/health, /livez — 봇이 주어지면 샤드별 게이트웨이 상태와 샤드 할당 포함)
+
+    이벤트 루프가 멈춰 있으면 status 가 unhealthy 가 됩니다.
+    """
+    payload = {"status": "healthy", "timestamp": time_module.time()}
+    if discord_bot is not None:
+        payload["loop"] = discord_bot.loop_monitor.status()
+        if discord_bot.loop_monitor.stalled:
+            payload["status"] = "unhealthy"
+        payload["shards"] = discord_bot.shard_status()
+        if discord_bot.coordinator is not None:
+            payload["assignment"] = discord_bot.coordinator.status()
+    return payload
+
+
+def build_readiness_payload(discord_bot=None):
+    """준비 상태 응답 생성 (/readyz, 검사 하나라도 실패하면 status 가 not_ready)"""
+    if discord_bot is None:
+        return {"status": "ready"}
+    checks = discord_bot.readiness()
+    ready = all(check["ok"] for check in checks.values())
+    return {"status": "ready" if ready else "not_ready", "checks": checks}
 
 
 class MetricsServer:
-    """Flask 기반 메트릭 서버"""
+    """Flask 기반 메트릭 서버
+
+    debug_gate 가 있으면(기본값: DEBUG_ENDPOINT_TOKEN 환경 변수) /debug/profile, /debug/memory 를 함께 엽니다.
+    Flask 는 METRICS_SERVER=flask 일 때만 필요하므로 이 서버를 만들 때 불러옵니다.
+    """
     
-    def __init__(self, metrics: DiscordBotMetrics):
+    def __init__(self, metrics: DiscordBotMetrics, discord_bot=None, debug_gate: DebugGate = None):
+        from flask import Flask
         self.app = Flask(__name__)
         self.metrics = metrics
+        self.discord_bot = discord_bot
+        self.debug_gate = debug_gate if debug_gate is not None else DebugGate.from_env()
+        self.memory_tracer = MemoryTracer()
         self._setup_routes()
     
     def _setup_routes(self):
+        from flask import Response, request
+
         @self.app.route('/metrics')
         def metrics():
             """프로메테우스 메트릭 엔드포인트"""
-            self.metrics.heartbeat_timestamp.set(time_module.time())
-            return Response(generate_latest(), mimetype='text/plain')
+            return Response(generate_latest(self.metrics.registry), mimetype='text/plain')
 
         @self.app.route('/health')
+        @self.app.route('/livez')
         def health():
-            """헬스 체크 엔드포인트"""
-            return {"status": "healthy", "timestamp": time_module.time()}
+            """헬스 체크 엔드포인트 (루프가 멈추면 503)"""
+            payload = build_health_payload(self.discord_bot)
+            return payload, 200 if payload["status"] == "healthy" else 503
+
+        @self.app.route('/readyz')
+        def readyz():
+            """준비 상태 엔드포인트 (게이트웨이 연결과 캐시가 준비되기 전에는 503)"""
+            payload = build_readiness_payload(self.discord_bot)
+            return payload, 200 if payload["status"] == "ready" else 503
 
         @self.app.route('/test-error')
         def test_error():
             """테스트용 에러 발생 엔드포인트"""
-            self.metrics.error_count.labels(error_type='test_error').inc()
+            self.metrics.bind_error('test_error', NO_SHARD).inc()
             logging.error("Test error triggered via /test-error endpoint")
             return {"status": "error", "message": "Test error generated"}, 500
 
         @self.app.route('/test-crash')
         def test_crash():
             """테스트용 크래시 시뮬레이션"""
-            self.metrics.error_count.labels(error_type='crash_simulation').inc()
+            self.metrics.bind_error('crash_simulation', NO_SHARD).inc()
             logging.critical("Crash simulation triggered")
             raise Exception("Simulated crash for testing alerts")
+
+        if self.debug_gate is None:
+            return
+
+        @self.app.route('/debug/profile')
+        def debug_profile():
+            """샘플링 CPU 프로파일 (?seconds=N&hz=N&format=collapsed|text|pstats)"""
+            if not self.debug_gate.authorized(request.headers.get('Authorization')):
+                return {"error": "unauthorized"}, 401
+            try:
+                seconds, hz, output = profiler.parse_profile_params(request.args)
+            except ValueError as e:
+                return {"error": str(e)}, 400
+            if not self.debug_gate.try_acquire():
+                return {"error": "too many concurrent debug requests"}, 429
+            try:
+                body = profiler.run_profile(seconds, hz, output)
+            finally:
+                self.debug_gate.release()
+            return Response(body, mimetype=profiler.content_type(output))
+
+        @self.app.route('/debug/memory')
+        def debug_memory():
+            """tracemalloc 할당 위치 (?action=start|top|diff|stop&limit=N&group=lineno|filename|traceback)"""
+            if not self.debug_gate.authorized(request.headers.get('Authorization')):
+                return {"error": "unauthorized"}, 401
+            try:
+                params = memory_debug.parse_memory_params(request.args)
+            except ValueError as e:
+                return {"error": str(e)}, 400
+            if not self.debug_gate.try_acquire():
+                return {"error": "too many concurrent debug requests"}, 429
+            try:
+                return self.memory_tracer.run(*params)
+            except RuntimeError as e:
+                return {"error": str(e)}, 409
+            finally:
+                self.debug_gate.release()
     
     def run(self, host='0.0.0.0', port=8000):
         """Flask 서버 실행"""
         self.app.run(host=host, port=port, debug=False)
 
 
+class AsyncMetricsServer:
+    """aiohttp 기반 메트릭 서버
+
+    봇과 같은 asyncio 이벤트 루프에서 실행되므로 별도 스레드가 필요 없습니다.
+    동시 스크레이프, keep-alive, gzip 압축(Accept-Encoding 협상)을 지원합니다.
+    debug_gate 가 있으면(기본값: DEBUG_ENDPOINT_TOKEN 환경 변수) /debug/profile, /debug/memory 를 함께 엽니다.
+    """
+
+    def __init__(self, metrics: DiscordBotMetrics, host='0.0.0.0', port=8000, discord_bot=None,
+                 debug_gate: DebugGate = None):
+        self.app = web.Application()
+        self.metrics = metrics
+        self.discord_bot = discord_bot
+        self.debug_gate = debug_gate if debug_gate is not None else DebugGate.from_env()
+        self.memory_tracer = MemoryTracer()
+        self.host = host
+        self.port = port
+        self._runner = None
+        self._setup_routes()
+
+    def _setup_routes(self):
+        self.app.router.add_get('/metrics', self.handle_metrics)
+        self.app.router.add_get('/health', self.handle_health)
+        self.app.router.add_get('/livez', self.handle_health)
+        self.app.router.add_get('/readyz', self.handle_readyz)
+        self.app.router.add_get('/test-error', self.handle_test_error)
+        self.app.router.add_get('/test-crash', self.handle_test_crash)
+        if self.debug_gate is not None:
+            self.app.router.add_get('/debug/profile', self.handle_debug_profile)
+            self.app.router.add_get('/debug/memory', self.handle_debug_memory)
+
+    async def handle_metrics(self, request):
+        """프로메테우스 메트릭 엔드포인트"""
+        response = web.Response(body=generate_latest(self.metrics.registry), content_type='text/plain')
+        response.enable_compression()
+        return response
+
+    async def handle_health(self, request):
+        """헬스 체크 엔드포인트 (루프가 멈추면 503)"""
+        payload = build_health_payload(self.discord_bot)
+        return web.json_response(payload, status=200 if payload["status"] == "healthy" else 503)
+
+    async def handle_readyz(self, request):
+        """준비 상태 엔드포인트 (게이트웨이 연결과 캐시가 준비되기 전에는 503)"""
+        payload = build_readiness_payload(self.discord_bot)
+        return web.json_response(payload, status=200 if payload["status"] == "ready" else 503)
+
+    async def handle_test_error(self, request):
+        """테스트용 에러 발생 엔드포인트"""
+        self.metrics.bind_error('test_error', NO_SHARD).inc()
+        logging.error("Test error triggered via /test-error endpoint")
+        return web.json_response({"status": "error", "message": "Test error generated"}, status=500)
+
+    async def handle_test_crash(self, request):
+        """테스트용 크래시 시뮬레이션"""
+        self.metrics.bind_error('crash_simulation', NO_SHARD).inc()
+        logging.critical("Crash simulation triggered")
+        raise Exception("Simulated crash for testing alerts")
+
+    async def handle_debug_profile(self, request):
+        """샘플링 CPU 프로파일 (?seconds=N&hz=N&format=collapsed|text|pstats)
+
+        샘플링은 별도 스레드에서 하므로 그동안 이벤트 루프는 평소처럼 봇을 처리하고, 그 스택도 샘플에 잡힙니다.
+        """
+        if not self.debug_gate.authorized(request.headers.get('Authorization')):
+            return web.json_response({"error": "unauthorized"}, status=401)
+        try:
+            seconds, hz, output = profiler.parse_profile_params(request.query)
+        except ValueError as e:
+            return web.json_response({"error": str(e)}, status=400)
+        if not self.debug_gate.try_acquire():
+            return web.json_response({"error": "too many concurrent debug requests"}, status=429)
+        try:
+            body = await asyncio.to_thread(profiler.run_profile, seconds, hz, output)
+        finally:
+            self.debug_gate.release()
+        return web.Response(body=body, content_type=profiler.content_type(output))
+
+    async def handle_debug_memory(self, request):
+        """tracemalloc 할당 위치 (?action=start|top|diff|stop&limit=N&group=lineno|filename|traceback)
+
+        스냅샷은 추적 중인 할당 수에 비례해 오래 걸리므로 별도 스레드에서 만듭니다.
+        """
+        if not self.debug_gate.authorized(request.headers.get('Authorization')):
+            return web.json_response({"error": "unauthorized"}, status=401)
+        try:
+            params = memory_debug.parse_memory_params(request.query)
+        except ValueError as e:
+            return web.json_response({"error": str(e)}, status=400)
+        if not self.debug_gate.try_acquire():
+            return web.json_response({"error": "too many concurrent debug requests"}, status=429)
+        try:
+            return web.json_response(await asyncio.to_thread(self.memory_tracer.run, *params))
+        except RuntimeError as e:
+            return web.json_response({"error": str(e)}, status=409)
+        finally:
+            self.debug_gate.release()
+
+    async def start(self):
+        """현재 이벤트 루프에서 서버 시작"""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+
+    async def stop(self):
+        """서버 종료"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+class RateLimited(commands.CheckFailure):
+    """명령어 호출이 속도 제한에 걸림 (명령어 에러로 세지 않음)"""
+
+    def __init__(self, scope: str, retry_after: float):
+        super().__init__(f"Rate limited by {scope} ({retry_after:.1f}s)")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+class CommandDisabled(commands.CheckFailure):
+    """길드 설정에서 비활성화된 명령어"""
+
+
 class DiscordBot:
-    """Discord 봇 메인 클래스"""
+    """Discord 봇 메인 클래스
+
+    shard_count 가 주어지면 AutoShardedBot 으로 한 프로세스 안에서 여러 샤드를 실행합니다.
+    ('auto' 이면 Discord 가 권장하는 샤드 수 사용)
+    coordinator 가 주어지면 리스로 획득한 샤드만 실행하고, 할당이 바뀌면 클라이언트를 다시 만듭니다.
+    member_cache 가 'lean' 이면(기본값: MEMBER_CACHE 환경 변수, 없으면 'full') 멤버 청킹과
+    멤버/메시지 캐시를 끕니다.
+    message_content 가 False 이면(기본값: MESSAGE_CONTENT_INTENT 환경 변수, 없으면 켬) 메시지 내용
+    인텐트를 요청하지 않습니다. 이때 명령어는 슬래시 명령어나 봇 멘션 접두사(@봇 odds ...)로만 호출됩니다.
+    SESSION_FILE 환경 변수가 있으면(샤딩하지 않을 때만) SIGTERM 으로 종료할 때 게이트웨이 세션을 파일에 남기고,
+    다음 프로세스는 IDENTIFY 대신 그 세션을 RESUME 합니다. (gateway_session 모듈 참고)
+    """
     
-    def __init__(self, token: str, metrics: DiscordBotMetrics):
+    def __init__(self, token: str, metrics: DiscordBotMetrics, shard_count=None, shard_ids=None,
+                 coordinator=None, member_cache: str = None, message_content: bool = None,
+                 cpu_pool: CPUPool = None):
         self.token = token
         self.metrics = metrics
         self.logger = logging.getLogger(__name__)
+        self.sharded = shard_count is not None or coordinator is not None
+        self.shard_count = coordinator.shard_count if coordinator is not None else shard_count
+        self.coordinator = coordinator
+        self.member_cache = member_cache or os.environ.get('MEMBER_CACHE', 'full')
+        if self.member_cache not in MEMBER_CACHE_MODES:
+            raise ValueError(f"member_cache must be one of {', '.join(MEMBER_CACHE_MODES)}: {self.member_cache}")
+        if message_content is None:
+            message_content = os.environ.get('MESSAGE_CONTENT_INTENT', '1') != '0'
+        self.message_content = message_content
+        self._bot_task = None
+        self._run_task = None
+        self._shutdown_task = None
+        self._started_at = None
+        self._phase_mark = None
+        self._recorded_phases = set()
+        # 이 비율 이상의 길드가 사용 가능(GUILD_CREATE 수신)해야 /readyz 가 준비 상태
+        self.ready_guild_ratio = float(os.environ.get('READY_GUILD_RATIO', '0.9'))
+        # SIGTERM 을 받은 뒤에는 새 메시지 명령어를 받지 않음
+        self.draining = False
+        self.drain_timeout = float(os.environ.get('SHUTDOWN_DRAIN_TIMEOUT', '20'))
+        session_file = os.environ.get('SESSION_FILE')
+        self.session_store = None
+        if session_file and not self.sharded:
+            self.session_store = SessionStore(session_file, max_age=float(os.environ.get('SESSION_MAX_AGE', '120')))
+        self._filter_counts = metrics.message_filter.counts
+        # 모든 명령어 응답은 속도 제한이 걸린 전송 큐를 거침 (클라이언트를 다시 만들어도 유지)
+        self.outbound = OutboundQueue(
+            metrics,
+            global_rate=int(os.environ.get('SEND_GLOBAL_RATE', '50')),
+            # 채널마다 SEND_CHANNEL_PER 초 동안 SEND_CHANNEL_LIMIT 번까지 (Discord: 5초에 5번)
+            channel_limit=int(os.environ.get('SEND_CHANNEL_LIMIT', '5')),
+            channel_per=float(os.environ.get('SEND_CHANNEL_PER', '5')),
+            coalesce=os.environ.get('SEND_COALESCE', '1') != '0'
+        )
+        # 명령어 디스패치 앞단의 사용자/채널/길드 속도 제한 (예: "default:user=5/10;roll:user=3/5")
+        self.rate_limiter = RateLimiter(
+            parse_limits(os.environ.get('COMMAND_RATE_LIMITS', DEFAULT_LIMITS)),
+            max_keys=int(os.environ.get('RATE_LIMIT_MAX_KEYS', '10000'))
+        )
+        # 이벤트 루프 지연 측정과 멈춤 감지 (멈추면 /health 가 503)
+        self.loop_monitor = LoopMonitor(
+            metrics,
+            interval=float(os.environ.get('LOOP_LAG_INTERVAL', '0.5')),
+            stall_timeout=float(os.environ.get('LOOP_STALL_TIMEOUT', '10'))
+        )
+        # 큰 주사위/확률 계산은 이벤트 루프를 막지 않도록 프로세스 풀에서 실행
+        self.cpu_pool = cpu_pool if cpu_pool is not None else create_cpu_pool(metrics)
+        # ?info 임베드는 입력이 바뀌거나 TTL 이 지났을 때만 다시 만듦
+        self.info_snapshot = InfoSnapshot(float(os.environ.get('INFO_CACHE_TTL', '30')), metrics)
+        # 길드/사용자 설정 (SETTINGS_DB 가 없으면 메모리에만 보관)
+        settings_db = os.environ.get('SETTINGS_DB')
+        self.settings = GuildSettings(
+            SQLiteSettingsStore(settings_db) if settings_db else None,
+            capacity=int(os.environ.get('SETTINGS_CACHE_SIZE', '10000')),
+            metrics=metrics
+        )
         
+        # 코디네이터를 쓰면 리스를 획득하기 전까지는 샤드를 실행하지 않음
+        self._build_bot([] if coordinator is not None else shard_ids)
+    
+    def _build_bot(self, shard_ids):
+        """봇 객체 생성 및 이벤트/명령어 등록"""
         # 봇 권한 설정
         intents = discord.Intents.default()
         intents.members = True
-        intents.message_content = True
+        intents.message_content = self.message_content
         
         # 봇 객체 생성
-        self.bot = commands.Bot(
-            command_prefix='?', 
+        bot_options = dict(
+            command_prefix=self._get_prefix, 
             description='Discord 유틸리티 봇', 
             intents=intents
         )
+        if self.member_cache == 'lean':
+            # 명령어는 메시지에 실려 오는 작성자 멤버와 길드의 member_count 만 쓰므로
+            # 시작 시 전체 멤버 청킹과 멤버/메시지 캐시가 필요 없음
+            # (members 인텐트는 길드 통계용 입장/퇴장 이벤트를 받기 위해 유지)
+            bot_options.update(
+                chunk_guilds_at_startup=False,
+                member_cache_flags=discord.MemberCacheFlags.none(),
+                max_messages=None
+            )
+        if self.sharded:
+            self.bot = commands.AutoShardedBot(
+                shard_count=None if self.shard_count == 'auto' else int(self.shard_count),
+                shard_ids=shard_ids,
+                **bot_options
+            )
+        else:
+            self.bot = ResumableBot(**bot_options)
+            self.bot.on_resume_result = self._record_resume
+        self.bot.setup_hook = self._setup_hook
+        self.bot.tree.interaction_check = self._interaction_check
+        self.metrics.discord_caches.attach(self.bot)
+        self.metrics.shard_ids = list(shard_ids) if shard_ids else [0]
         
         self._setup_events()
         self._setup_commands()
+        # 사전 필터가 Context 를 만들기 전에 확인하는 명령어 이름 (별칭 포함)
+        self._command_names = frozenset(self.bot.all_commands)
+        self._bind_command_metrics()
+        # check_once 는 호출당 한 번만 실행되고 help 의 명령어 필터링에는 쓰이지 않음
+        self.bot.check_once(self._check_enabled)
+        self.bot.check_once(self._check_rate_limit)
+    
+    async def _setup_hook(self):
+        """로그인 직후 한 번 실행 (SYNC_APP_COMMANDS=1 이면 슬래시 명령어 목록을 Discord 에 등록)
+
+        동기화는 하루 호출 수 제한이 있으므로 명령어 구성이 바뀐 배포에서만 켭니다.
+        """
+        if os.environ.get('SYNC_APP_COMMANDS') == '1':
+            synced = await self.bot.tree.sync()
+            self.logger.info("Synced %s application commands", len(synced))
+        self._mark_phase('login')
+
+    def _mark_phase(self, phase: str):
+        """시작 단계가 끝났을 때 직전 단계 끝부터 걸린 시간을 기록 (프로세스에서 단계마다 한 번)"""
+        if self._phase_mark is None or phase in self._recorded_phases:
+            return
+        now = time_module.monotonic()
+        self.metrics.startup_phase.labels(phase=phase).set(now - self._phase_mark)
+        self._recorded_phases.add(phase)
+        self._phase_mark = now
+
+    def _session_ready(self, mode: str):
+        """게이트웨이 세션이 준비됐을 때 (IDENTIFY 후 READY, 또는 RESUME 후 놓친 이벤트를 다 받았을 때)"""
+        self._mark_phase('hydrate' if mode == 'identify' else 'connect')
+        # 봇 정보 메트릭 설정
+        self.metrics.bot_info.info({
+            'name': str(self.bot.user),
+            'id': str(self.bot.user.id),
+            'version': '1.0.0'
+        })
+        if self._started_at is not None:
+            # 재연결 때마다 다시 재지 않도록 프로세스 시작 후 처음 한 번만 기록
+            self.metrics.time_to_ready.labels(mode=mode).set(time_module.monotonic() - self._started_at)
+            self.logger.info("Gateway session ready via %s in %.1fs", mode, time_module.monotonic() - self._started_at)
+            self._started_at = None
+        
+        # 자동 샤딩이면 Discord 가 정한 샤드 수가 이제 확정됨
+        if self.sharded:
+            self.metrics.shard_ids = sorted(self.bot.shards)
+            self._bind_command_metrics()
+        
+        # 길드 캐시가 모두 채워졌으므로 누적값을 한 번 맞춰줌
+        self.metrics.guild_stats.reconcile(self.bot.guilds)
+        
+        # 주기적 메트릭 업데이트 시작
+        if not self.update_metrics.is_running():
+            self.update_metrics.start()
+        if not self.reconcile_guild_stats.is_running():
+            self.reconcile_guild_stats.start()
+
+    def _record_resume(self, result: str):
+        """ResumableBot 이 알려 주는 RESUME 결과"""
+        self.metrics.session_resumes.labels(result=result).inc()
+        if result == 'success':
+            # RESUME 은 READY 를 보내지 않으므로 여기서 준비 작업을 함
+            self.logger.info('Resumed previous gateway session as %s', self.bot.user)
+            self._session_ready('resume')
+        else:
+            self.logger.warning("Could not resume previous gateway session (%s), identifying", result)
+
+    async def _interaction_check(self, interaction) -> bool:
+        """RESUME 으로 다시 받은 인터랙션 중 응답 시간이 지난 것은 실행하지 않음"""
+        if getattr(self.bot, 'replaying', False):
+            age = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+            if age > INTERACTION_RESPONSE_WINDOW:
+                return False
+        return True
+
+    def _bind_command_metrics(self):
+        """등록된 명령어별 메트릭 자식을 미리 만들어 호출마다 labels() 를 하지 않도록 함"""
+        for shard_id in self.metrics.shard_ids:
+            shard = str(shard_id)
+            for command in self.bot.commands:
+                self.metrics.bind_command(command.name, shard)
+            self.metrics.bind_error('command_error', shard)
+    
+    async def _run_client(self):
+        if self._phase_mark is None:
+            # import 가 끝난 뒤부터 클라이언트를 시작하기 전까지가 init
+            self._phase_mark = _IMPORT_FINISHED
+            self._mark_phase('init')
+        async with self.bot:
+            await self.bot.start(self.token)
+    
+    async def apply_shard_assignment(self, shard_ids):
+        """코디네이터가 정한 샤드 목록으로 클라이언트 교체 (빠진 샤드는 반환 전에 연결 종료)
+
+        AutoShardedBot 은 실행 중에 샤드를 추가/제거하는 공개 API 가 없어 클라이언트 전체를 다시 만듭니다.
+        따라서 계속 맡는 샤드도 재배치 때마다 다시 연결(IDENTIFY)하고 그동안 응답하지 못합니다.
+        롤링 업데이트의 넘겨주기는 나가는 Pod 가 리스를 즉시 반납해 TTL 만료를 기다리지 않는 것까지이고,
+        끊김 없는 이전은 아닙니다.
+        """
+        if self._bot_task is not None:
+            await self.bot.close()
+            try:
+                await self._bot_task
+            except Exception as e:
+                self.logger.error("Client stopped with error during rebalance: %s", e)
+            self._bot_task = None
+        if shard_ids:
+            self._build_bot(shard_ids)
+            self._bot_task = asyncio.create_task(self._run_client())
+    
+    @staticmethod
+    def _shard_label(ctx) -> str:
+        """명령어 컨텍스트의 샤드 레이블 (DM 은 샤드 0)"""
+        return str(ctx.guild.shard_id) if ctx.guild is not None else '0'
+    
+    def _record_error(self, error_type: str, ctx=None):
+        shard = self._shard_label(ctx) if ctx is not None else NO_SHARD
+        self.metrics.bind_error(error_type, shard).inc()
     
+    async def _send(self, ctx, *args, **kwargs):
+        """전송 큐로 명령어 응답을 보내고 메시지 생성 시각부터 응답 확인까지의 지연시간 기록
+
+        슬래시 명령어는 채널 메시지가 아닌 인터랙션 응답이므로 전송 큐를 거치지 않습니다.
+        """
+        if isinstance(ctx.interaction, discord.Interaction):
+            message = await ctx.send(*args, **kwargs)
+            # 채널 메시지는 전송 큐가 세므로 인터랙션 응답만 여기서 셈
+            self.metrics.messages_sent.inc()
+        else:
+            message = await self.outbound.send(ctx.channel, *args, **kwargs)
+        if ctx.command is not None:
+            # created_at 은 Discord 서버 시각이므로 시계 오차로 음수가 되지 않게 보정
+            elapsed = time_module.time() - ctx.message.created_at.timestamp()
+            bound = self.metrics.bind_command(ctx.command.name, self._shard_label(ctx))
+            bound.reply_latency.observe(max(elapsed, 0.0))
+        return message
+    
+    async def _get_prefix(self, bot, message):
+        """길드 설정의 접두사 (DM 이나 설정이 없으면 기본값)
+
+        메시지 내용 인텐트가 없으면 봇을 멘션한 메시지에만 내용이 오므로 봇 멘션을 접두사로 씁니다.
+        """
+        if not self.message_content:
+            return commands.when_mentioned(bot, message)
+        if message.guild is None:
+            return DEFAULT_PREFIX
+        settings = await self.settings.get(GUILD, message.guild.id)
+        return settings.prefix or DEFAULT_PREFIX
+    
+    def _prefilter(self, message) -> bool:
+        """접두사 첫 글자만 보고 명령어일 수 없는 메시지를 거름 (대부분의 대화 메시지가 여기서 끝남)
+
+        봇 작성자 확인, str.startswith, 정수 카운터 증가만 하므로 Context/문자열 조각을 만들지 않습니다.
+        """
+        if message.author.bot:
+            self._filter_counts['bot'] += 1
+            return False
+        initials = self.settings.prefix_initials if self.message_content else MENTION_INITIALS
+        if not message.content.startswith(initials):
+            self._filter_counts['no_prefix'] += 1
+            return False
+        return True
+
+    async def _resolve_command(self, message) -> bool:
+        """길드 접두사를 떼어낸 첫 단어가 등록된 명령어/별칭인지 확인 (discord.py 의 Context 파싱과 같은 규칙)"""
+        prefixes = await self._get_prefix(self.bot, message)
+        if isinstance(prefixes, str):
+            prefixes = (prefixes,)
+        content = message.content
+        for prefix in prefixes:
+            if content.startswith(prefix):
+                rest = content[len(prefix):]
+                # 접두사 바로 뒤가 공백이면 discord.py 도 명령어 이름을 빈 문자열로 읽음
+                if rest[:1].isspace():
+                    return False
+                words = rest.split(None, 1)
+                return bool(words) and words[0] in self._command_names
+        return False
+
+    async def _check_enabled(self, ctx) -> bool:
+        """길드에서 비활성화한 명령어면 CommandDisabled 발생"""
+        if ctx.guild is None:
+            return True
+        settings = await self.settings.get(GUILD, ctx.guild.id)
+        if ctx.command.root_parent is None and ctx.command.name in settings.disabled:
+            raise CommandDisabled(f"{ctx.command.name} is disabled in this guild")
+        return True
+    
+    def _check_rate_limit(self, ctx) -> bool:
+        """명령어 호출을 속도 제한에 기록하고, 넘으면 RateLimited 발생"""
+        author_id = ctx.author.id
+        keys = {
+            'user': author_id,
+            'channel': ctx.channel.id,
+            # DM 은 길드가 없으므로 사용자별로 따로 셈
+            'guild': ctx.guild.id if ctx.guild is not None else f'dm:{author_id}',
+        }
+        blocked = self.rate_limiter.acquire(ctx.command.name, keys)
+        if blocked is not None:
+            raise RateLimited(*blocked)
+        return True
+    
+    def _shard_latencies(self):
+        """(샤드 ID, 게이트웨이 지연시간) 목록"""
+        if self.sharded:
+            return list(self.bot.latencies)
+        return [(0, self.bot.latency)]
+    
+    def shard_status(self) -> dict:
+        """샤드별 게이트웨이 상태"""
+        if self.sharded:
+            shards = {
+                shard_id: (shard.is_closed(), shard.latency, shard.is_ws_ratelimited())
+                for shard_id, shard in self.bot.shards.items()
+            }
+        else:
+            ws = self.bot.ws
+            shards = {0: (ws is None or self.bot.is_closed(), self.bot.latency, False)}
+        
+        status = {}
+        for shard_id, (closed, latency, ratelimited) in shards.items():
+            status[str(shard_id)] = {
+                "connected": not closed,
+                "latency_ms": round(latency * 1000, 1) if math.isfinite(latency) else None,
+                "ratelimited": ratelimited,
+            }
+        return status
+    
+    def readiness(self) -> dict:
+        """/readyz 검사 항목별 결과
+
+        코디네이터가 아직 샤드를 주지 않은 Pod 는 대기 상태이므로 게이트웨이/캐시 검사를 통과한 것으로 봅니다.
+        """
+        standby = self.coordinator is not None and self._bot_task is None
+        shards = self.shard_status()
+        connected = sum(1 for shard in shards.values() if shard["connected"])
+        guilds = self.bot.guilds
+        available = sum(1 for guild in guilds if not guild.unavailable)
+        ratio = available / len(guilds) if guilds else 1.0
+        return {
+            "loop": {"ok": not self.loop_monitor.stalled},
+            "draining": {"ok": not self.draining},
+            "gateway": {"ok": standby or (bool(shards) and connected == len(shards)),
+                        "connected": connected, "shards": len(shards)},
+            "guilds": {"ok": ratio >= self.ready_guild_ratio, "available": available, "total": len(guilds)},
+            # on_ready(GUILD_CREATE/멤버 청킹 완료) 또는 RESUMED 를 받으면 캐시가 채워진 상태
+            "caches": {"ok": standby or self.bot.is_ready()},
+        }
+
     def _setup_events(self):
         """봇 이벤트 설정"""
         
         @self.bot.event
         async def on_ready():
-            self.logger.info(f'Logged in as {self.bot.user} (ID: {self.bot.user.id})')
-            
-            # 봇 정보 메트릭 설정
-            self.metrics.bot_info.info({
-                'name': str(self.bot.user),
-                'id': str(self.bot.user.id),
-                'version': '1.0.0'
-            })
-            
-            # 주기적 메트릭 업데이트 시작
-            self.update_metrics.start()
+            self.logger.info('Logged in as %s (ID: %s)', self.bot.user, self.bot.user.id)
+            self._session_ready('identify')
+        
+        @self.bot.event
+        async def on_connect():
+            # READY 수신 (이후 GUILD_CREATE 로 캐시를 채움)
+            self._mark_phase('connect')
+        
+        @self.bot.event
+        async def on_shard_ready(shard_id):
+            self.metrics.shard_events.labels(shard=str(shard_id), event='ready').inc()
+            self.logger.info("Shard %s ready", shard_id)
+        
+        @self.bot.event
+        async def on_shard_disconnect(shard_id):
+            self.metrics.shard_events.labels(shard=str(shard_id), event='disconnect').inc()
+            self.logger.warning("Shard %s disconnected", shard_id)
+        
+        @self.bot.event
+        async def on_shard_resumed(shard_id):
+            self.metrics.shard_events.labels(shard=str(shard_id), event='resumed').inc()
+            self.logger.info("Shard %s resumed", shard_id)
+        
+        @self.bot.event
+        async def on_message(message):
+            # 기본 on_message(process_commands) 는 모든 메시지에 Context 를 만들고 명령어를 찾으므로
+            # 명령어일 수 있는 메시지만 넘김
+            if not self._prefilter(message):
+                return
+            if self.draining:
+                # 저장한 세션의 시퀀스 이후 메시지이므로 다음 프로세스가 RESUME 으로 다시 받아 처리함
+                self._filter_counts['draining'] += 1
+                return
+            if not await self._resolve_command(message):
+                self._filter_counts['unknown_command'] += 1
+                return
+            self._filter_counts['dispatched'] += 1
+            await self.bot.process_commands(message)
+        
+        @self.bot.event
+        async def on_guild_join(guild):
+            self.metrics.guild_stats.add_guild(guild.id, guild.member_count, guild.shard_id)
+        
+        @self.bot.event
+        async def on_guild_remove(guild):
+            self.metrics.guild_stats.remove_guild(guild.id)
+        
+        @self.bot.event
+        async def on_guild_available(guild):
+            self.metrics.guild_stats.add_guild(guild.id, guild.member_count, guild.shard_id)
+        
+        @self.bot.event
+        async def on_guild_unavailable(guild):
+            self.metrics.guild_stats.remove_guild(guild.id)
+        
+        @self.bot.event
+        async def on_member_join(member):
+            self.metrics.guild_stats.member_joined(member.guild.id)
+        
+        @self.bot.event
+        async def on_raw_member_remove(payload):
+            # on_member_remove 는 캐시에 없는 멤버에 대해 발생하지 않으므로 raw 이벤트 사용
+            self.metrics.guild_stats.member_left(payload.guild_id)
         
         @self.bot.before_invoke
         async def before_invoke(ctx):
-            setattr(ctx, '_start_time', time_module.time())
+            setattr(ctx, '_start_time', time_module.perf_counter())
         
         @self.bot.after_invoke
         async def after_invoke(ctx):
             if hasattr(ctx, '_start_time'):
-                latency = time_module.time() - getattr(ctx, '_start_time')
-                self.metrics.message_latency.observe(latency)
-                self.metrics.command_counter.labels(
-                    command=ctx.command.name, 
-                    status='success'
-                ).inc()
+                latency = time_module.perf_counter() - getattr(ctx, '_start_time')
+                bound = self.metrics.bind_command(ctx.command.name, self._shard_label(ctx))
+                bound.latency.observe(latency)
+                bound.success.inc()
         
         @self.bot.event
         async def on_command_error(ctx, error):
             """명령어 에러 처리"""
-            self.metrics.error_count.labels(error_type='command_error').inc()
-            self.metrics.command_counter.labels(
-                command=ctx.command.name if ctx.command else 'unknown', 
-                status='error'
-            ).inc()
-            self.logger.error(f"Command error in {ctx.command}: {error}")
+            if isinstance(error, RateLimited):
+                # 스팸에 응답하면 전송 한도만 더 쓰므로 조용히 거절하고 별도로 셈
+                self.metrics.rate_limited.labels(command=ctx.command.name, scope=error.scope).inc()
+                self.logger.debug("%s for %s by %s", error, ctx.command, ctx.author.id)
+                if isinstance(ctx.interaction, discord.Interaction):
+                    # 슬래시 명령어는 응답하지 않으면 클라이언트에 실패로 표시되므로 본인에게만 알림
+                    await ctx.send(f'⏳ {error.retry_after:.1f}초 후에 다시 시도해주세요.', ephemeral=True)
+                return
+            if isinstance(error, CommandDisabled):
+                await self._send(ctx, f'이 서버에서는 `{ctx.command.name}` 명령어가 비활성화되어 있습니다.')
+                return
+            if isinstance(error, (commands.MissingPermissions, commands.BadArgument)):
+                await self._send(ctx, f'⚠️ {error}')
+            self._record_error('command_error', ctx)
+            command = ctx.command.name if ctx.command else 'unknown'
+            self.metrics.bind_command(command, self._shard_label(ctx)).error.inc()
+            # 한 명령어의 에러 폭주가 다른 명령어의 에러 로그까지 샘플링하지 않도록 명령어별로 셈
+            self.logger.error("Command error in %s: %s", command, error, extra={'sample_key': command})
     
     @tasks.loop(seconds=30)
     async def update_metrics(self):
         """주기적으로 메트릭 업데이트"""
         try:
-            self.metrics.active_guilds.set(len(self.bot.guilds))
-            total_users = sum(guild.member_count for guild in self.bot.guilds if guild.member_count)
-            self.metrics.active_users.set(total_users)
-            self.metrics.heartbeat_timestamp.set(time_module.time())
-            self.logger.info(f"Metrics updated: {len(self.bot.guilds)} guilds, {total_users} users")
+            stats = self.metrics.guild_stats
+            now = time_module.time()
+            for shard_id, latency in self._shard_latencies():
+                if not math.isfinite(latency):
+                    continue
+                shard = str(shard_id)
+                self.metrics.gateway_latency.labels(shard=shard).set(latency)
+                self.metrics.heartbeat_timestamp.labels(shard=shard).set(now)
+            self.metrics.rate_limit_keys.set(self.rate_limiter.tracked_keys())
+            self.metrics.discord_caches.refresh()
+            self.logger.info("Metrics updated: %s guilds, %s users", stats.guild_count, stats.member_total)
         except Exception as e:
-            self.metrics.error_count.labels(error_type='metrics_update').inc()
-            self.logger.error(f"Error updating metrics: {e}")
+            self._record_error('metrics_update')
+            self.logger.error("Error updating metrics: %s", e)
+    
+    @tasks.loop(minutes=10)
+    async def reconcile_guild_stats(self):
+        """이벤트 누락으로 생긴 길드/멤버 누적값 드리프트를 주기적으로 보정"""
+        try:
+            guild_drift, member_drift = self.metrics.guild_stats.reconcile(self.bot.guilds)
+            if guild_drift or member_drift:
+                self.metrics.guild_stats_drift.labels(kind='guilds').inc(abs(guild_drift))
+                self.metrics.guild_stats_drift.labels(kind='members').inc(abs(member_drift))
+                self.logger.warning("Guild stats drift corrected: guilds %+d, users %+d", guild_drift, member_drift)
+        except Exception as e:
+            self._record_error('metrics_update')
+            self.logger.error("Error reconciling guild stats: %s", e)
     
     def _setup_commands(self):
         """봇 명령어 설정"""
         
-        @self.bot.command()
+        # add/roll/choose/time/ping/info 는 접두사 명령어와 슬래시 명령어를 같은 구현으로 제공
+        @self.bot.hybrid_command()
+        @app_commands.describe(left='첫 번째 숫자', right='두 번째 숫자')
         async def add(ctx, left: int, right: int):
             """두 숫자를 더합니다."""
             try:
                 result = left + right
-                await ctx.send(f"{left} + {right} = {result}")
-                self.metrics.messages_sent.inc()
+                await self._send(ctx, f"{left} + {right} = {result}")
             except Exception as e:
-                self.metrics.error_count.labels(error_type='command_error').inc()
-                self.logger.error(f"Error in add command: {e}")
+                self._record_error('command_error', ctx)
+                self.logger.error("Error in add command: %s", e)
         
-        @self.bot.command()
-        async def roll(ctx, dice: str):
-            """주사위를 굴립니다. 형식: NdN (예: 2d6)"""
+        @self.bot.hybrid_command()
+        @app_commands.describe(dice='주사위 식 (예: 2d6, 4d6kh3+2)')
+        async def roll(ctx, *, dice: str):
+            """주사위를 굴립니다. 예: 2d6, 4d6kh3+2, 10d10!, 3d8+1d4-2"""
             try:
-                rolls, limit = map(int, dice.split('d'))
-                if rolls <= 0 or limit <= 0 or rolls > 100:
-                    await ctx.send('올바른 형식이 아닙니다! (예: 2d6)')
-                    return
-                
-                results = [random.randint(1, limit) for _ in range(rolls)]
-                result_text = ', '.join(str(r) for r in results)
-                total = sum(results)
-                
-                await ctx.send(f"🎲 {dice}: {result_text} (총합: {total})")
-                self.metrics.messages_sent.inc()
-            except ValueError:
-                await ctx.send('올바른 형식이 아닙니다! (예: 2d6)')
-                self.metrics.error_count.labels(error_type='command_error').inc()
+                plan = dice_engine.compile_expression(dice)
+                if sum(term.count for term in plan.terms) > dice_engine.DIRECT_LIMIT:
+                    # 집계 방식(면 수에 비례)이나 많은 주사위는 워커 프로세스에서 굴림
+                    # (슬래시 명령어는 3초 안에 응답해야 하므로 먼저 응답을 미룸, 접두사 명령어는 무시됨)
+                    await ctx.defer()
+                    result = await self.cpu_pool.run('roll', dice_engine.roll, dice)
+                else:
+                    result = plan.roll()
+                detail = result.describe()
+                if len(detail) > 1500:
+                    # 메시지 길이 제한 (2000자) 안에 들어가도록 자름
+                    detail = detail[:1500] + '…'
+                await self._send(ctx, f"🎲 {dice}: {detail} (총합: {result.total})")
+            except dice_engine.DiceError as e:
+                await self._send(ctx, f'올바른 형식이 아닙니다! (예: 2d6, 4d6kh3+2) - {e}')
+                self._record_error('command_error', ctx)
+            except CPUPoolRejected:
+                await self._send(ctx, CPU_BUSY_MESSAGE)
             except Exception as e:
-                self.metrics.error_count.labels(error_type='command_error').inc()
-                self.logger.error(f"Error in roll command: {e}")
-        
+                self._record_error('command_error', ctx)
+                self.logger.error("Error in roll command: %s", e)
+
         @self.bot.command()
-        async def choose(ctx, *choices: str):
+        async def odds(ctx, *, query: str):
+            """주사위 결과의 정확한 확률을 계산합니다. 예: 10d6 >= 40, 4d6kh3"""
+            try:
+                # 큰 분포의 컨볼루션은 수백 ms 걸릴 수 있으므로 항상 워커 프로세스에서 계산
+                result = await self.cpu_pool.run('odds', dice_engine.odds, query)
+                await self._send(ctx, result.describe())
+            except dice_engine.DiceError as e:
+                await self._send(ctx, f'올바른 형식이 아닙니다! (예: 10d6 >= 40, 4d6kh3) - {e}')
+                self._record_error('command_error', ctx)
+            except CPUPoolRejected:
+                await self._send(ctx, CPU_BUSY_MESSAGE)
+            except Exception as e:
+                self._record_error('command_error', ctx)
+                self.logger.error("Error in odds command: %s", e)
+
+        @self.bot.hybrid_command()
+        @app_commands.describe(choices='공백으로 구분한 선택지 (띄어쓰기가 있으면 따옴표로 묶기)')
+        async def choose(ctx, *, choices: str = ''):
             """여러 선택지 중 하나를 무작위로 선택합니다."""
             try:
+                # 슬래시 명령어는 가변 인자를 받을 수 없으므로 한 문자열로 받아 나눔 (따옴표가 있을 때만 shlex 사용)
+                try:
+                    choices = shlex.split(choices) if '"' in choices or "'" in choices else choices.split()
+                except ValueError:
+                    # 따옴표 짝이 맞지 않으면 공백으로만 나눔
+                    choices = choices.split()
                 if not choices:
-                    await ctx.send('선택지를 입력해주세요! 예: `?choose 사과 바나나 오렌지`')
+                    await self._send(ctx, '선택지를 입력해주세요! 예: `?choose 사과 바나나 오렌지`')
                     return
                 
                 choice = random.choice(choices)
-                await ctx.send(f"🎯 선택된 것: **{choice}**")
-                self.metrics.messages_sent.inc()
+                await self._send(ctx, f"🎯 선택된 것: **{choice}**")
             except Exception as e:
-                self.metrics.error_count.labels(error_type='command_error').inc()
-                self.logger.error(f"Error in choose command: {e}")
+                self._record_error('command_error', ctx)
+                self.logger.error("Error in choose command: %s", e)
         
-        @self.bot.command()
+        @self.bot.hybrid_command()
         async def time(ctx):
-            """현재 한국 시간을 보여줍니다."""
+            """현재 시간을 보여줍니다. (사용자 > 서버 시간대 설정, 기본값 한국 시간)"""
             try:
-                korea_tz = pytz.timezone('Asia/Seoul')
-                current_time = datetime.datetime.now(korea_tz)
-                formatted_time = current_time.strftime("%Y-%m-%d %H:%M:%S %Z")
-                
-                await ctx.send(f"🕐 현재 한국 시간: **{formatted_time}**")
-                self.metrics.messages_sent.inc()
+                guild_id = ctx.guild.id if ctx.guild is not None else None
+                guild, user = await self.settings.effective(guild_id, ctx.author.id)
+                await self._send(ctx, self.settings.formatter_for(guild, user).format())
             except Exception as e:
-                self.metrics.error_count.labels(error_type='command_error').inc()
-                self.logger.error(f"Error in time command: {e}")
+                self._record_error('command_error', ctx)
+                self.logger.error("Error in time command: %s", e)
         
-        @self.bot.command()
+        @self.bot.hybrid_command()
         async def ping(ctx):
             """봇의 응답 시간을 확인합니다."""
             try:
-                latency = round(self.bot.latency * 1000)
-                await ctx.send(f"🏓 Pong! 지연시간: {latency}ms")
-                self.metrics.messages_sent.inc()
+                latency = self.bot.latency
+                if not math.isfinite(latency):
+                    # 첫 하트비트 전에는 지연시간이 NaN
+                    await self._send(ctx, "🏓 Pong! 지연시간: 측정 중")
+                    return
+                await self._send(ctx, f"🏓 Pong! 지연시간: {round(latency * 1000)}ms")
             except Exception as e:
-                self.metrics.error_count.labels(error_type='command_error').inc()
-                self.logger.error(f"Error in ping command: {e}")
+                self._record_error('command_error', ctx)
+                self.logger.error("Error in ping command: %s", e)
         
-        @self.bot.command()
+        @self.bot.hybrid_command()
         async def info(ctx):
             """봇 정보를 표시합니다."""
             try:
-                guild_count = len(self.bot.guilds)
-                user_count = sum(guild.member_count for guild in self.bot.guilds if guild.member_count)
-                
-                embed = discord.Embed(
-                    title="🤖 봇 정보",
-                    color=0x00ff00,
-                    timestamp=datetime.datetime.now()
-                )
-                embed.add_field(name="서버 수", value=guild_count, inline=True)
-                embed.add_field(name="사용자 수", value=user_count, inline=True)
-                embed.add_field(name="지연시간", value=f"{round(self.bot.latency * 1000)}ms", inline=True)
-                embed.set_footer(text="Discord Bot v1.0.0")
-                
-                await ctx.send(embed=embed)
-                self.metrics.messages_sent.inc()
+                stats = self.metrics.guild_stats
+                embed = self.info_snapshot.get(stats.guild_count, stats.member_total, self.bot.latency)
+                await self._send(ctx, embed=embed)
             except Exception as e:
-                self.metrics.error_count.labels(error_type='command_error').inc()
-                self.logger.error(f"Error in info command: {e}")
+                self._record_error('command_error', ctx)
+                self.logger.error("Error in info command: %s", e)
+    
+        @self.bot.group(invoke_without_command=True)
+        async def settings(ctx):
+            """서버/내 설정을 보여줍니다. 하위 명령어로 변경합니다."""
+            guild_id = ctx.guild.id if ctx.guild is not None else None
+            guild, user = await self.settings.effective(guild_id, ctx.author.id)
+            disabled = ', '.join(sorted(guild.disabled)) or '없음'
+            await self._send(ctx, (
+                f"⚙️ 서버 설정 - 시간대: {guild.timezone or '기본값'}, 언어: {guild.locale or '기본값'}, "
+                f"접두사: `{guild.prefix or DEFAULT_PREFIX}`, 비활성화: {disabled}\n"
+                f"👤 내 설정 - 시간대: {user.timezone or '서버 설정'}, 언어: {user.locale or '서버 설정'}"
+            ))
+        
+        def parse_timezone(name: str):
+            try:
+                resolve_timezone(name)
+            except ValueError:
+                raise commands.BadArgument(f'알 수 없는 시간대입니다: {name} (예: Asia/Seoul, UTC)')
+            return name
+        
+        def parse_locale(name: str):
+            if name not in LOCALES:
+                raise commands.BadArgument(f"지원하는 언어: {', '.join(LOCALES)}")
+            return name
+        
+        def parse_prefix(prefix: str):
+            if len(prefix) > 5:
+                raise commands.BadArgument('접두사는 5자 이하여야 합니다.')
+            return prefix
+        
+        def parse_command(name: str):
+            if self.bot.get_command(name) is None or name in ('settings', 'help'):
+                raise commands.BadArgument(f'비활성화할 수 없는 명령어입니다: {name}')
+            return name
+        
+        def or_reset(parse):
+            # 'reset' 은 사용자 설정을 지우고 서버 설정을 따름
+            return lambda value: None if value == 'reset' else parse(value)
+        
+        @settings.command(name='timezone')
+        @commands.guild_only()
+        @commands.has_guild_permissions(manage_guild=True)
+        async def settings_timezone(ctx, name: parse_timezone):
+            """서버 기본 시간대를 설정합니다. 예: ?settings timezone Asia/Tokyo"""
+            await self.settings.update(GUILD, ctx.guild.id, timezone=name)
+            await self._send(ctx, f'✅ 서버 시간대: {name}')
+        
+        @settings.command(name='locale')
+        @commands.guild_only()
+        @commands.has_guild_permissions(manage_guild=True)
+        async def settings_locale(ctx, name: parse_locale):
+            """서버 기본 언어를 설정합니다. 예: ?settings locale en"""
+            await self.settings.update(GUILD, ctx.guild.id, locale=name)
+            await self._send(ctx, f'✅ 서버 언어: {name}')
+        
+        @settings.command(name='prefix')
+        @commands.guild_only()
+        @commands.has_guild_permissions(manage_guild=True)
+        async def settings_prefix(ctx, prefix: parse_prefix):
+            """명령어 접두사를 설정합니다. 예: ?settings prefix !"""
+            await self.settings.update(GUILD, ctx.guild.id, prefix=prefix)
+            await self._send(ctx, f'✅ 접두사: `{prefix}`')
+        
+        @settings.command(name='disable')
+        @commands.guild_only()
+        @commands.has_guild_permissions(manage_guild=True)
+        async def settings_disable(ctx, command: parse_command):
+            """이 서버에서 명령어를 비활성화합니다."""
+            current = await self.settings.get(GUILD, ctx.guild.id)
+            await self.settings.update(GUILD, ctx.guild.id, disabled=current.disabled | {command})
+            await self._send(ctx, f'✅ `{command}` 비활성화')
+        
+        @settings.command(name='enable')
+        @commands.guild_only()
+        @commands.has_guild_permissions(manage_guild=True)
+        async def settings_enable(ctx, command: str):
+            """비활성화한 명령어를 다시 사용합니다."""
+            current = await self.settings.get(GUILD, ctx.guild.id)
+            await self.settings.update(GUILD, ctx.guild.id, disabled=current.disabled - {command})
+            await self._send(ctx, f'✅ `{command}` 활성화')
+        
+        @settings.command(name='mytimezone')
+        async def settings_mytimezone(ctx, name: or_reset(parse_timezone)):
+            """내 시간대를 설정합니다. (reset 이면 서버 설정을 따름)"""
+            await self.settings.update(USER, ctx.author.id, timezone=name)
+            await self._send(ctx, f"✅ 내 시간대: {name or '서버 설정'}")
+        
+        @settings.command(name='mylocale')
+        async def settings_mylocale(ctx, name: or_reset(parse_locale)):
+            """내 언어를 설정합니다. (reset 이면 서버 설정을 따름)"""
+            await self.settings.update(USER, ctx.author.id, locale=name)
+            await self._send(ctx, f"✅ 내 언어: {name or '서버 설정'}")
     
-    def run(self):
+    def _load_session(self):
+        """이전 프로세스가 남긴 게이트웨이 세션이 있으면 첫 연결을 RESUME 으로 하도록 설정"""
+        if self.session_store is None:
+            return
+        session, reason = self.session_store.load(token_fingerprint(self.token))
+        if reason is not None:
+            self.logger.info("Ignoring saved gateway session: %s", reason)
+            self.metrics.session_resumes.labels(result='stale').inc()
+        self.bot.resume_session = session
+
+    def _pending_handlers(self) -> int:
+        """실행 중인 메시지/슬래시 명령어 핸들러 수"""
+        current = asyncio.current_task()
+        return sum(
+            1 for task in asyncio.all_tasks()
+            if task is not current and not task.done() and task.get_name().startswith(COMMAND_TASK_PREFIXES)
+        )
+
+    def request_shutdown(self):
+        """SIGTERM 핸들러 (종료 작업은 태스크로 실행)"""
+        if self._shutdown_task is None:
+            self._shutdown_task = asyncio.create_task(self.shutdown())
+
+    async def shutdown(self):
+        """새 메시지 명령어를 받지 않고, 처리 중인 명령어와 전송 큐가 비기를 drain_timeout 초까지 기다린 뒤 종료
+
+        인터랙션은 3초 안에 응답해야 하고 다음 프로세스에서는 응답할 수 없으므로 종료 중에도 계속 처리합니다.
+        세션 파일을 쓸 수 있으면 세션을 끝내지 않고 연결을 닫아 다음 프로세스가 RESUME 하게 합니다.
+        설정 저장과 메트릭 서버 종료는 start() 의 finally 에서 합니다.
+        """
+        self.draining = True
+        started = time_module.monotonic()
+        # 이 시퀀스 이후의 이벤트는 다음 프로세스가 다시 받음
+        ws = self.bot.ws
+        sequence = ws.sequence if ws is not None else None
+        self.logger.info("Shutting down, waiting up to %.0fs for in-flight commands", self.drain_timeout)
+        deadline = started + self.drain_timeout
+        while (self._pending_handlers() or self.outbound.depth) and time_module.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        abandoned = self._pending_handlers()
+        if abandoned or self.outbound.depth:
+            self.logger.warning("Drain timed out: abandoning %s commands and %s queued messages",
+                                abandoned, self.outbound.depth)
+        self.metrics.shutdown_drain.set(time_module.monotonic() - started)
+
+        session = None
+        if self.session_store is not None and isinstance(self.bot, ResumableBot):
+            session = self.bot.session_state(sequence)
+        if session is not None:
+            try:
+                self.session_store.save({**session, 'token': token_fingerprint(self.token)})
+                self.logger.info("Saved gateway session at sequence %s for the next process", session['sequence'])
+                await self.bot.close_for_handoff()
+            except OSError as e:
+                self.logger.error("Could not save gateway session: %s", e)
+                session = None
+        if session is None:
+            await self.bot.close()
+        if self.coordinator is not None and self._run_task is not None:
+            # 코디네이터 루프를 멈추면 리스를 반납함
+            self._run_task.cancel()
+
+    async def start(self, metrics_server=None):
+        """봇과 (선택적으로) 비동기 메트릭 서버를 같은 이벤트 루프에서 실행"""
+        self._started_at = time_module.monotonic()
+        # main() 에서 prefork() 한 워커가 준비됐는지 확인 (테스트 등에서는 여기서 처음 fork)
+        await self.cpu_pool.start()
+        if metrics_server is not None:
+            await metrics_server.start()
+        self.settings.start()
+        await self.settings.load_prefixes()
+        self._load_session()
+        self.loop_monitor.start()
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signal.SIGTERM, self.request_shutdown)
+            handles_sigterm = True
+        except (NotImplementedError, RuntimeError):
+            # 메인 스레드가 아니거나 지원하지 않는 플랫폼
+            handles_sigterm = False
+        try:
+            self._run_task = asyncio.create_task(
+                self._run_client() if self.coordinator is None else self._run_coordinated()
+            )
+            try:
+                await self._run_task
+            except asyncio.CancelledError:
+                if not self.draining:
+                    raise
+            if self._shutdown_task is not None:
+                await self._shutdown_task
+        finally:
+            if handles_sigterm:
+                loop.remove_signal_handler(signal.SIGTERM)
+            await self.loop_monitor.stop()
+            self.cpu_pool.close()
+            # 아직 저장되지 않은 설정 변경을 기록
+            await self.settings.close()
+            if metrics_server is not None:
+                await metrics_server.stop()
+    
+    async def _run_coordinated(self):
+        """샤드 코디네이터를 돌리며 할당된 샤드만 실행"""
+        self.coordinator.on_change = self.apply_shard_assignment
+        try:
+            await self.coordinator.run()
+        finally:
+            # 종료 시 리스를 바로 반납해 다른 Pod 가 샤드를 넘겨받도록 함
+            await self.coordinator.shutdown()
+
+    def run(self, metrics_server=None):
         """봇 실행"""
         try:
-            self.bot.run(self.token)
+            asyncio.run(self.start(metrics_server))
+        except KeyboardInterrupt:
+            self.logger.info("Bot stopped by KeyboardInterrupt")
         except Exception as e:
-            self.metrics.error_count.labels(error_type='startup').inc()
-            self.logger.error(f"Bot startup error: {e}")
+            self._record_error('startup')
+            self.logger.error("Bot startup error: %s", e)
             raise
 
 
+def create_cpu_pool(metrics: DiscordBotMetrics) -> CPUPool:
+    """환경 변수 설정으로 CPU 작업용 프로세스 풀 생성"""
+    return CPUPool(
+        metrics,
+        workers=int(os.environ.get('CPU_POOL_WORKERS', '1')),
+        max_pending=int(os.environ.get('CPU_POOL_MAX_PENDING', '8')),
+        timeout=float(os.environ.get('CPU_POOL_TIMEOUT', '5'))
+    )
+
+
 def main():
     """메인 함수"""
-    # 로깅 설정
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    # 프로세스 풀 워커는 fork 로 띄우므로 어떤 스레드(로깅 리스너, Flask)보다도 먼저 만듦
+    metrics = DiscordBotMetrics()
+    cpu_pool = create_cpu_pool(metrics)
+    cpu_pool.prefork()
+
+    # 로깅 설정 (포맷팅과 출력은 백그라운드 스레드에서, 반복되는 경고/에러는 샘플링)
+    log_sampling = setup_logging(logging.INFO)
     logger = logging.getLogger(__name__)
     
     # 환경 변수에서 토큰 가져오기
@@ -303,24 +1654,55 @@ def main():
         exit(1)
     
     # 메트릭 및 서버 초기화
-    metrics = DiscordBotMetrics()
-    metrics_server = MetricsServer(metrics)
-    discord_bot = DiscordBot(token, metrics)
+    metrics.registry.register(LogSuppressionCollector(log_sampling))
+    # SHARD_COUNT 가 설정되면 샤딩 모드 ('auto' 또는 숫자, SHARD_IDS 로 일부만 실행 가능)
+    shard_count = os.environ.get('SHARD_COUNT') or None
+    shard_ids = os.environ.get('SHARD_IDS')
+    if shard_ids:
+        shard_ids = [int(shard_id) for shard_id in shard_ids.split(',')]
     
-    # Flask 서버를 별도 스레드에서 시작
-    flask_thread = threading.Thread(
-        target=metrics_server.run, 
-        kwargs={'host': '0.0.0.0', 'port': 8000},
-        daemon=True
-    )
-    flask_thread.start()
+    # SHARD_LEASE_DB 가 설정되면 여러 Pod 가 리스로 샤드를 나눠 가짐
+    coordinator = None
+    lease_db = os.environ.get('SHARD_LEASE_DB')
+    if lease_db:
+        if not shard_count or not shard_count.isdigit():
+            logger.error("샤드 조정에는 숫자로 된 SHARD_COUNT 가 필요합니다.")
+            exit(1)
+        coordinator = ShardCoordinator(
+            SQLiteLeaseStore(lease_db),
+            member_id=os.environ.get('POD_NAME') or socket.gethostname(),
+            shard_count=int(shard_count),
+            lease_ttl=float(os.environ.get('SHARD_LEASE_TTL', '15')),
+            renew_interval=float(os.environ.get('SHARD_LEASE_RENEW', '5')),
+            metrics=metrics
+        )
+    discord_bot = DiscordBot(token, metrics, shard_count=shard_count, shard_ids=shard_ids or None,
+                             coordinator=coordinator, cpu_pool=cpu_pool)
+    server_mode = os.environ.get('METRICS_SERVER', 'asyncio').lower()
+    
+    if server_mode == 'flask':
+        # Flask 서버를 별도 스레드에서 시작
+        metrics_server = MetricsServer(metrics, discord_bot=discord_bot)
+        flask_thread = threading.Thread(
+            target=metrics_server.run, 
+            kwargs={'host': '0.0.0.0', 'port': 8000},
+            daemon=True
+        )
+        flask_thread.start()
+        async_server = None
+    elif server_mode == 'asyncio':
+        # 봇 이벤트 루프 위에서 aiohttp 서버 실행
+        async_server = AsyncMetricsServer(metrics, host='0.0.0.0', port=8000, discord_bot=discord_bot)
+    else:
+        logger.error("알 수 없는 METRICS_SERVER 값: %s (asyncio 또는 flask)", server_mode)
+        exit(1)
     
-    logger.info("Discord 봇과 메트릭 서버가 시작되었습니다.")
+    logger.info("Discord 봇과 메트릭 서버(%s)가 시작되었습니다.", server_mode)
     logger.info("메트릭: http://localhost:8000/metrics")
-    logger.info("헬스체크: http://localhost:8000/health")
+    logger.info("헬스체크: http://localhost:8000/livez, 준비 상태: http://localhost:8000/readyz")
     
     # Discord 봇 실행
-    discord_bot.run()
+    discord_bot.run(async_server)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Gateway Replay Harness
+======================
+Discord 에 접속하지 않고 DiscordBot 의 명령어 처리 전체를 부하 테스트하는 하네스
+
+- 가짜 길드/채널을 discord.py 의 ConnectionState 캐시에 올리고, 합성한 MESSAGE_CREATE 페이로드를
+  실제 게이트웨이 파서(parse_message_create)에 넣어 on_message → 명령어 디스패치 경로를 그대로 탑니다.
+- 슬래시 명령어는 합성한 INTERACTION_CREATE 를 parse_interaction_create 에 넣고, 인터랙션 응답/후속 메시지는
+  FakeHTTP 가 같은 목록에 기록합니다.
+- HTTP 계층은 FakeHTTP 로 바꿉니다. 보낸 메시지를 기록하고, Discord 의 채널별(5회/5초)·
+  전역(초당 50회) 제한을 넘으면 429 를 기록한 뒤 discord.py 처럼 retry_after 만큼 기다렸다 재시도합니다.
+- 명령어 처리량, 입력부터 응답 확인까지의 지연시간(p50/p99), 이벤트 루프 지연, 메모리(RSS)를 보고합니다.
+
+사용법:
+    python gateway_harness.py [--guilds 1000] [--rate 200] [--duration 10]
+"""
+
+import argparse
+import asyncio
+import datetime
+import gc
+import itertools
+import logging
+import random
+import time
+
+import discord
+from discord.webhook.async_ import async_context
+
+from discord_bot import DiscordBot, DiscordBotMetrics
+from memory_debug import rss_mb
+
+# 명령어 비율 (메시지 내용, 가중치)
+DEFAULT_MIX = (
+    ('?ping', 3),
+    ('?roll 2d6', 3),
+    ('?roll 4d6kh3+2', 1),
+    ('?choose 사과 바나나 오렌지', 2),
+    ('?add 2 3', 1),
+    ('?time', 1),
+    ('?info', 1),
+    ('그냥 대화 메시지', 8),
+)
+
+BOT_USER_ID = 1
+EVENT_TASK_PREFIXES = ('discord.py: ', 'CommandTree-invoker')
+
+
+def percentile(values: list, fraction: float) -> float:
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class _Bucket:
+    """Discord 의 고정 윈도우 제한 흉내 (limit 회 / per 초)"""
+
+    __slots__ = ('limit', 'per', 'remaining', 'reset_at')
+
+    def __init__(self, limit: int, per: float):
+        self.limit = limit
+        self.per = per
+        self.remaining = limit
+        self.reset_at = 0.0
+
+    def take(self, now: float) -> float:
+        """통과하면 0, 제한에 걸리면 retry_after(초)"""
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = now + self.per
+        if self.remaining <= 0:
+            return self.reset_at - now
+        self.remaining -= 1
+        return 0.0
+
+
+class FakeHTTP:
+    """discord.py HTTPClient 의 send_message 대역 (보낸 메시지 기록 + 429 흉내)
+
+    인터랙션 응답은 웹훅 어댑터(create_interaction_response/execute_webhook) 대역으로도 쓰입니다.
+    인터랙션 응답은 채널 제한을 받지 않으므로 채널 id 대신 인터랙션 id 를 기록합니다.
+    """
+
+    # discord.Interaction/후속 메시지 웹훅이 읽는 HTTPClient 속성
+    token = None
+    proxy = None
+    proxy_auth = None
+    _HTTPClient__session = None
+
+    def __init__(self, channel_limit=(5, 5.0), global_limit=(50, 1.0), latency: float = 0.0):
+        self.channel_limit = channel_limit
+        self.global_bucket = _Bucket(*global_limit)
+        self.latency = latency
+        self.sent = []
+        self.api_calls = 0
+        self.rate_limited = 0
+        self._channels = {}
+        self._ids = itertools.count(1)
+
+    async def send_message(self, channel_id, *, params):
+        while True:
+            now = time.monotonic()
+            bucket = self._channels.get(channel_id)
+            if bucket is None:
+                bucket = self._channels[channel_id] = _Bucket(*self.channel_limit)
+            retry_after = max(bucket.take(now), self.global_bucket.take(now))
+            self.api_calls += 1
+            if retry_after <= 0:
+                break
+            # 429 응답: discord.py 는 retry_after 만큼 기다렸다가 같은 요청을 다시 보냄
+            self.rate_limited += 1
+            await asyncio.sleep(retry_after)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        payload = params.payload or {}
+        self.sent.append((channel_id, payload.get('content'), bool(payload.get('embeds'))))
+        return make_message(next(self._ids), channel_id, None, BOT_USER_ID, payload.get('content') or '', bot=True)
+
+    async def create_interaction_response(self, interaction_id, token, *, params, **kwargs):
+        self.api_calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        payload = params.payload or {}
+        data = payload.get('data') or {}
+        self.sent.append((interaction_id, data.get('content'), bool(data.get('embeds'))))
+        response = {'interaction': {'id': str(interaction_id), 'type': 2}}
+        if payload.get('type') == discord.InteractionResponseType.channel_message.value:
+            response['resource'] = {'type': payload['type'], 'message': make_message(
+                next(self._ids), 0, None, BOT_USER_ID, data.get('content') or '', bot=True)}
+        return response
+
+    async def execute_webhook(self, webhook_id, token, *, payload=None, **kwargs):
+        # 응답을 미룬(defer) 인터랙션의 후속 메시지
+        self.api_calls += 1
+        payload = payload or {}
+        self.sent.append((webhook_id, payload.get('content'), bool(payload.get('embeds'))))
+        return make_message(next(self._ids), 0, None, BOT_USER_ID, payload.get('content') or '', bot=True)
+
+    def __getattr__(self, name):
+        raise AttributeError(f"FakeHTTP does not implement {name}")
+
+
+def make_user(user_id: int, bot: bool = False) -> dict:
+    return {'id': str(user_id), 'username': f'user{user_id}', 'discriminator': '0', 'global_name': None,
+            'avatar': None, 'bot': bot}
+
+
+def make_message(message_id: int, channel_id: int, guild_id, author_id: int, content: str, bot: bool = False) -> dict:
+    data = {
+        'id': str(message_id), 'channel_id': str(channel_id), 'author': make_user(author_id, bot),
+        'content': content, 'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'edited_timestamp': None, 'tts': False, 'mention_everyone': False, 'mentions': [],
+        'mention_roles': [], 'attachments': [], 'embeds': [], 'pinned': False, 'type': 0,
+    }
+    if guild_id is not None:
+        data['guild_id'] = str(guild_id)
+    return data
+
+
+def make_interaction(interaction_id: int, guild_id: int, user_id: int, name: str, options: dict) -> dict:
+    """슬래시 명령어 INTERACTION_CREATE 페이로드 (옵션은 모두 문자열/정수 값)"""
+    return {
+        'id': str(interaction_id), 'application_id': str(BOT_USER_ID), 'type': 2, 'token': f'token{interaction_id}',
+        'version': 1, 'guild_id': str(guild_id), 'channel': {'id': str(guild_id * 10), 'type': 0},
+        'attachment_size_limit': 10 * 1024 * 1024, 'entitlements': [], 'authorizing_integration_owners': {},
+        'member': {'user': make_user(user_id), 'roles': [], 'joined_at': None, 'deaf': False, 'mute': False,
+                   'flags': 0, 'permissions': '0'},
+        'data': {'id': str(BOT_USER_ID), 'name': name, 'type': 1, 'options': [
+            {'name': key, 'type': 4 if isinstance(value, int) else 3, 'value': value} for key, value in options.items()
+        ]},
+    }
+
+
+def make_guild(guild_id: int, member_count: int) -> dict:
+    return {
+        'id': str(guild_id), 'name': f'guild{guild_id}', 'owner_id': str(BOT_USER_ID),
+        'member_count': member_count, 'features': [], 'emojis': [], 'stickers': [],
+        'roles': [{'id': str(guild_id), 'name': '@everyone', 'permissions': '0', 'position': 0,
+                   'color': 0, 'hoist': False, 'managed': False, 'mentionable': False}],
+        'channels': [{'id': str(guild_id * 10), 'type': 0, 'name': 'general', 'position': 0,
+                      'permission_overwrites': []}],
+    }
+
+
+class GatewayHarness:
+    """DiscordBot 에 합성 게이트웨이 이벤트를 넣고 결과를 측정하는 하네스"""
+
+    def __init__(self, discord_bot: DiscordBot, guilds: int = 100, users: int = 10000,
+                 members_per_guild: int = 50, http: FakeHTTP = None, mix=DEFAULT_MIX, seed: int = 0):
+        self.discord_bot = discord_bot
+        self.guilds = guilds
+        self.users = users
+        self.members_per_guild = members_per_guild
+        self.http = http if http is not None else FakeHTTP()
+        self.contents = [content for content, _ in mix]
+        self.weights = [weight for _, weight in mix]
+        self.rng = random.Random(seed)
+        self.injected = 0
+        self.latencies = []
+        self.loop_lags = []
+        self._started = {}
+        self._snowflakes = itertools.count()
+
+    async def setup(self):
+        """가짜 봇 사용자/HTTP/길드를 ConnectionState 에 올림 (on_guild_join 으로 통계도 반영)"""
+        client = self.discord_bot.bot
+        # login() 이 하는 이벤트 루프 초기화만 수행 (실제 HTTP 클라이언트는 쓰지 않음)
+        await client._async_setup_hook()
+        state = client._connection
+        state.http = self.http
+        # 인터랙션 응답은 ContextVar 의 웹훅 어댑터로 보내므로 FakeHTTP 로 바꿈
+        async_context.set(self.http)
+        state.user = discord.ClientUser(state=state, data=make_user(BOT_USER_ID, bot=True))
+        for guild_id in range(1, self.guilds + 1):
+            guild = state._add_guild_from_data(make_guild(guild_id, self.members_per_guild))
+            client.dispatch('guild_join', guild)
+
+        # 응답 전송이 끝난 시점을 기록하기 위해 봇의 전송 경로를 감쌈
+        send = self.discord_bot._send
+
+        async def traced_send(ctx, *args, **kwargs):
+            message = await send(ctx, *args, **kwargs)
+            started = self._started.pop(ctx.message.id, None)
+            if started is not None:
+                self.latencies.append(time.perf_counter() - started)
+            return message
+
+        self.discord_bot._send = traced_send
+
+    def _next_id(self) -> int:
+        # created_at 이 현재 시각이 되도록 시각 기반 스노플레이크 사용
+        return discord.utils.time_snowflake(datetime.datetime.now(datetime.timezone.utc)) + next(self._snowflakes) % 4096
+
+    def inject(self, content: str = None, guild_id: int = None, user_id: int = None):
+        """MESSAGE_CREATE 하나를 게이트웨이 파서에 넣음"""
+        guild_id = guild_id or self.rng.randint(1, self.guilds)
+        user_id = user_id or self.rng.randint(1000, 1000 + self.users)
+        content = content or self.rng.choices(self.contents, self.weights)[0]
+        message_id = self._next_id()
+        if content.startswith('?'):
+            self._started[message_id] = time.perf_counter()
+        self.injected += 1
+        self.discord_bot.bot._connection.parse_message_create(
+            make_message(message_id, guild_id * 10, guild_id, user_id, content)
+        )
+
+    def inject_interaction(self, name: str, options: dict = None, guild_id: int = None, user_id: int = None):
+        """슬래시 명령어 INTERACTION_CREATE 하나를 게이트웨이 파서에 넣음"""
+        guild_id = guild_id or self.rng.randint(1, self.guilds)
+        user_id = user_id or self.rng.randint(1000, 1000 + self.users)
+        interaction_id = self._next_id()
+        self._started[interaction_id] = time.perf_counter()
+        self.injected += 1
+        self.discord_bot.bot._connection.parse_interaction_create(
+            make_interaction(interaction_id, guild_id, user_id, name, options or {})
+        )
+
+    async def drain(self, timeout: float = 10.0, tick: float = 0.01):
+        """처리 중인 이벤트 핸들러와 전송 큐가 빌 때까지 대기"""
+        deadline = time.perf_counter() + timeout
+        await asyncio.sleep(0)
+        while (self.discord_bot.outbound.depth or self.pending_events()) and time.perf_counter() < deadline:
+            await asyncio.sleep(tick)
+
+    async def _sample_loop_lag(self, interval: float, stop: asyncio.Event):
+        while not stop.is_set():
+            expected = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            self.loop_lags.append(max(time.perf_counter() - expected, 0.0))
+
+    async def run(self, rate: float, duration: float, tick: float = 0.01, drain_timeout: float = 10.0) -> dict:
+        """rate(메시지/초) 로 duration 초 동안 주입한 뒤 남은 응답을 기다리고 결과 반환"""
+        gc.collect()
+        rss_before = rss_mb()
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(self._sample_loop_lag(tick, stop))
+
+        started = time.perf_counter()
+        carry = 0.0
+        next_tick = started
+        while time.perf_counter() - started < duration:
+            # 틱마다 그동안 보냈어야 할 개수만큼 주입 (개방형 부하: 응답을 기다리지 않음)
+            carry += rate * tick
+            for _ in range(int(carry)):
+                self.inject()
+            carry -= int(carry)
+            next_tick += tick
+            await asyncio.sleep(max(next_tick - time.perf_counter(), 0))
+        injected_for = time.perf_counter() - started
+
+        await self.drain(drain_timeout, tick)
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await sampler
+
+        registry = self.discord_bot.metrics.registry
+        commands_total = sum(
+            sample.value for metric in registry.collect() if metric.name == 'discord_bot_commands'
+            for sample in metric.samples if sample.name == 'discord_bot_commands_total'
+        )
+        rejected = sum(
+            sample.value for metric in registry.collect() if metric.name == 'discord_bot_rate_limited'
+            for sample in metric.samples if sample.name == 'discord_bot_rate_limited_total'
+        )
+        return {
+            'guilds': self.guilds,
+            'injected': self.injected,
+            'inject_rate': self.injected / injected_for,
+            'commands': int(commands_total),
+            'commands_per_sec': commands_total / elapsed,
+            'replies': len(self.latencies),
+            'rate_limited_commands': int(rejected),
+            'api_calls': self.http.api_calls,
+            'messages_sent': len(self.http.sent),
+            'http_429': self.http.rate_limited,
+            'latency_p50_ms': percentile(self.latencies, 0.5) * 1000,
+            'latency_p99_ms': percentile(self.latencies, 0.99) * 1000,
+            'loop_lag_p50_ms': percentile(self.loop_lags, 0.5) * 1000,
+            'loop_lag_p99_ms': percentile(self.loop_lags, 0.99) * 1000,
+            'loop_lag_max_ms': max(self.loop_lags, default=0.0) * 1000,
+            'rss_mb': rss_mb(),
+            'rss_growth_mb': rss_mb() - rss_before,
+        }
+
+    @staticmethod
+    def pending_events() -> int:
+        """아직 끝나지 않은 이벤트 핸들러 수 (discord.py 는 이벤트/슬래시 명령어 태스크에 이름을 붙임)"""
+        return sum(1 for task in asyncio.all_tasks() if task.get_name().startswith(EVENT_TASK_PREFIXES) and not task.done())
+
+
+async def run_harness(guilds: int, rate: float, duration: float, users: int) -> dict:
+    metrics = DiscordBotMetrics()
+    discord_bot = DiscordBot('harness_token', metrics)
+    harness = GatewayHarness(discord_bot, guilds=guilds, users=users)
+    await harness.setup()
+    # 하네스에서 만든 루프에 settings flush 태스크를 붙였다가 정리
+    discord_bot.settings.start()
+    try:
+        return await harness.run(rate, duration)
+    finally:
+        await discord_bot.settings.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='가짜 게이트웨이로 DiscordBot 부하 테스트')
+    parser.add_argument('--guilds', type=int, nargs='+', default=[100, 1000], help='길드 수 (여러 개 가능)')
+    parser.add_argument('--rate', type=float, default=200, help='초당 주입 메시지 수')
+    parser.add_argument('--duration', type=float, default=5, help='주입 시간(초)')
+    parser.add_argument('--users', type=int, default=10000, help='메시지를 보내는 사용자 수')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    columns = ('guilds', 'injected', 'commands_per_sec', 'replies', 'rate_limited_commands', 'http_429',
+               'latency_p50_ms', 'latency_p99_ms', 'loop_lag_p99_ms', 'loop_lag_max_ms', 'rss_mb')
+    print(' '.join(f'{column:>14}' for column in columns))
+    for guilds in args.guilds:
+        result = asyncio.run(run_harness(guilds, args.rate, args.duration, args.users))
+        print(' '.join(
+            f'{result[column]:>14.1f}' if isinstance(result[column], float) else f'{result[column]:>14}'
+            for column in columns
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Gateway Session Handoff
+=======================
+재시작한 프로세스가 새로 IDENTIFY(모든 길드의 GUILD_CREATE 수신)하는 대신 이전 프로세스의
+게이트웨이 세션을 RESUME 하기 위한 모듈
+
+- 종료할 때 세션 ID, 마지막으로 처리한 시퀀스 번호, resume_gateway_url, 길드 스냅샷을 JSON 파일에 씁니다.
+  임시 파일에 쓴 뒤 os.replace 로 바꾸므로 쓰는 도중에 죽어도 반쯤 쓴 파일이 남지 않습니다.
+- 다음 프로세스는 파일이 max_age 초 이내이고 같은 토큰으로 저장된 것이면 RESUME 을 시도합니다.
+  같은 세션을 두 번 쓰지 않도록 파일은 읽자마자 지웁니다.
+- Discord 는 저장된 시퀀스 이후의 이벤트를 다시 보내 주므로, 종료 중에 처리하지 않은 메시지는
+  다음 프로세스가 처리합니다.
+- RESUME 은 READY/GUILD_CREATE 를 보내지 않으므로 길드 캐시(역할, 텍스트 채널)는 스냅샷으로 복원합니다.
+  멤버 캐시는 복원하지 않습니다.
+- Discord 가 세션을 거절하면(INVALID_SESSION) 평소처럼 IDENTIFY 하고, READY 가 스냅샷으로 만든 캐시를 비웁니다.
+- 웹소켓을 1000 으로 닫으면 Discord 가 세션을 끝내므로 넘겨줄 때는 4000 으로 닫습니다.
+
+샤딩(AutoShardedBot)은 샤드마다 연결을 따로 관리하므로 지원하지 않습니다.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+
+import aiohttp
+import yarl
+from discord.errors import ConnectionClosed, GatewayNotFound, HTTPException
+from discord.ext import commands
+from discord.gateway import DiscordWebSocket, ReconnectWebSocket
+
+# RESUME 시도 결과 (stale: 파일이 오래됐거나 다른 토큰/형식이라 시도하지 않음)
+RESUME_RESULTS = ('success', 'invalid', 'error', 'stale')
+
+# 세션 파일 형식 버전 (바뀌면 이전 파일은 stale)
+SESSION_VERSION = 1
+
+# 넘겨줄 때 쓰는 웹소켓 종료 코드 (1000/1001 이 아니면 Discord 가 세션을 유지)
+HANDOFF_CLOSE_CODE = 4000
+
+
+def token_fingerprint(token: str) -> str:
+    """세션 파일에 토큰 대신 남기는 식별값"""
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+
+def guild_payload(guild) -> dict:
+    """Guild 객체를 GUILD_CREATE 와 같은 모양의 최소 페이로드로 (명령어 처리에 필요한 역할/텍스트 채널만)"""
+    return {
+        'id': str(guild.id), 'name': guild.name, 'owner_id': str(guild.owner_id),
+        'member_count': guild.member_count, 'features': list(guild.features), 'emojis': [], 'stickers': [],
+        'roles': [
+            {'id': str(role.id), 'name': role.name, 'permissions': str(role.permissions.value),
+             'position': role.position, 'hoist': role.hoist, 'managed': role.managed, 'mentionable': role.mentionable}
+            for role in guild.roles
+        ],
+        'channels': [
+            {'id': str(channel.id), 'type': channel.type.value, 'name': channel.name, 'position': channel.position,
+             'parent_id': str(channel.category_id) if channel.category_id else None,
+             'permission_overwrites': [overwrite._asdict() for overwrite in channel._overwrites]}
+            for channel in (*guild.categories, *guild.text_channels)
+        ],
+    }
+
+
+class SessionStore:
+    """게이트웨이 세션 파일"""
+
+    def __init__(self, path: str, max_age: float = 120.0):
+        self.path = path
+        self.max_age = max_age
+        self.logger = logging.getLogger(__name__)
+
+    def save(self, session: dict):
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w') as f:
+            json.dump({**session, 'version': SESSION_VERSION, 'saved_at': time.time()}, f)
+        os.replace(temporary, self.path)
+
+    def load(self, fingerprint: str) -> tuple:
+        """(세션, None) 또는 (None, 버린 이유) — 파일이 없으면 (None, None)"""
+        try:
+            with open(self.path) as f:
+                session = json.load(f)
+        except FileNotFoundError:
+            return None, None
+        except (OSError, ValueError) as e:
+            self.logger.warning("Unreadable session file %s: %s", self.path, e)
+            session = {}
+        finally:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+        age = time.time() - session.get('saved_at', 0)
+        if session.get('version') != SESSION_VERSION or session.get('token') != fingerprint:
+            return None, 'mismatch'
+        if age > self.max_age:
+            return None, f'expired ({age:.0f}s old)'
+        return session, None
+
+
+class ResumableBot(commands.Bot):
+    """저장된 세션이 있으면 첫 연결을 RESUME 으로 하는 Bot
+
+    RESUME 으로 붙은 세션이 끊기면 세션이 유지되는 동안 계속 RESUME 하고, 무효화되거나 연결에 실패하면
+    discord.py 의 기본 연결(IDENTIFY)로 넘어갑니다. 결과는 on_resume_result(result) 로 알립니다.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.resume_session = None
+        self.on_resume_result = None
+        # RESUME 후 RESUMED 를 받기 전까지는 놓친 이벤트를 다시 받는 중
+        self.replaying = False
+        self._handoff = False
+        self.add_listener(self._resumed, 'on_resumed')
+
+    def is_closed(self) -> bool:
+        # 넘겨주려고 웹소켓을 닫을 때 연결 루프가 다시 연결하지 않게 함
+        return self._handoff or super().is_closed()
+
+    def _report(self, result: str):
+        if self.on_resume_result is not None:
+            self.on_resume_result(result)
+
+    async def _resumed(self):
+        if self.replaying:
+            self.replaying = False
+            # READY 를 받지 않았으므로 wait_until_ready() 대기자를 직접 깨움
+            self._ready.set()
+            self._report('success')
+
+    async def connect(self, *, reconnect: bool = True):
+        session, self.resume_session = self.resume_session, None
+        if session is not None:
+            state = self._connection
+            for payload in session['guilds']:
+                state._add_guild_from_data(payload)
+            await self._connect_resumed({
+                'gateway': yarl.URL(session['gateway']),
+                'session': session['session_id'],
+                'sequence': session['sequence'],
+                'resume': True,
+            })
+        if not self.is_closed():
+            await super().connect(reconnect=reconnect)
+
+    async def _connect_resumed(self, params: dict):
+        """RESUME 으로 연결해 세션이 살아 있는 동안 유지 (세션이 무효화되거나 연결에 실패하면 반환)"""
+        self.replaying = True
+        while not self.is_closed():
+            try:
+                self.ws = await asyncio.wait_for(DiscordWebSocket.from_client(self, **params), timeout=60.0)
+                while True:
+                    await self.ws.poll_event()
+            except ReconnectWebSocket as e:
+                self.dispatch('disconnect')
+                if not e.resume:
+                    if self.replaying:
+                        self.replaying = False
+                        self._report('invalid')
+                    return
+                params.update(sequence=self.ws.sequence, session=self.ws.session_id, gateway=self.ws.gateway)
+            except (OSError, HTTPException, GatewayNotFound, ConnectionClosed,
+                    aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.dispatch('disconnect')
+                logging.getLogger(__name__).warning("Resumed gateway connection failed, identifying: %r", e)
+                if self.replaying:
+                    self.replaying = False
+                    self._report('error')
+                return
+
+    def session_state(self, sequence: int = None):
+        """RESUME 에 필요한 현재 세션 정보 (연결된 세션이 없으면 None)"""
+        ws = self.ws
+        if ws is None or ws.session_id is None:
+            return None
+        return {
+            'session_id': ws.session_id,
+            'sequence': ws.sequence if sequence is None else sequence,
+            'gateway': str(ws.gateway),
+            'guilds': [guild_payload(guild) for guild in self.guilds if not guild.unavailable],
+        }
+
+    async def close_for_handoff(self):
+        """세션을 끝내지 않고 연결을 닫음 (다음 프로세스가 RESUME)"""
+        self._handoff = True
+        if self.ws is not None and self.ws.open:
+            await self.ws.close(code=HANDOFF_CLOSE_CODE)
+        await self.close()
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Guild Settings
+==============
+길드/사용자별 설정 (시간대, 언어, 명령어 접두사, 비활성화된 명령어)
+
+- 자주 쓰이는 설정은 LRU 캐시에 보관하고, 명령어 처리 중에는 디스크에 접근하지 않습니다.
+  캐시에 없는 설정만 스레드에서 한 번 읽어오고, 같은 키를 동시에 찾으면 한 번만 읽습니다.
+- 변경 사항은 캐시에 바로 반영하고 저장소에는 주기적으로 모아서 씁니다.
+  아직 저장되지 않은 설정은 캐시에서 밀려나도 버려지지 않습니다.
+- 시간대 객체와 시간 포맷터는 이름별로 캐시합니다.
+- 어느 길드에서든 쓰이는 접두사의 첫 글자 목록(prefix_initials)을 유지해, 설정을 찾기 전에
+  명령어가 아닌 메시지를 걸러낼 수 있게 합니다.
+
+저장소는 SettingsStore 인터페이스를 구현하면 교체할 수 있습니다.
+"""
+
+import asyncio
+import collections
+import datetime
+import functools
+import logging
+import sqlite3
+import time
+
+GUILD = 'guild'
+USER = 'user'
+
+DEFAULT_TIMEZONE = 'Asia/Seoul'
+DEFAULT_LOCALE = 'ko'
+DEFAULT_PREFIX = '?'
+
+# 언어별 ?time 응답 형식
+TIME_TEMPLATES = {
+    'ko': '🕐 현재 시간 ({zone}): **{time}**',
+    'en': '🕐 Current time ({zone}): **{time}**',
+}
+LOCALES = tuple(TIME_TEMPLATES)
+
+
+class Settings:
+    """한 길드 또는 사용자의 설정 (None 이면 상위 설정/기본값을 따름)"""
+
+    __slots__ = ('timezone', 'locale', 'prefix', 'disabled')
+
+    def __init__(self, timezone=None, locale=None, prefix=None, disabled=frozenset()):
+        self.timezone = timezone
+        self.locale = locale
+        self.prefix = prefix
+        self.disabled = frozenset(disabled)
+
+    def replace(self, **changes) -> 'Settings':
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return Settings(**values)
+
+    def as_row(self) -> tuple:
+        return (self.timezone, self.locale, self.prefix, ','.join(sorted(self.disabled)))
+
+    @classmethod
+    def from_row(cls, row) -> 'Settings':
+        timezone, locale, prefix, disabled = row
+        return cls(timezone, locale, prefix, filter(None, (disabled or '').split(',')))
+
+    def __eq__(self, other):
+        return isinstance(other, Settings) and self.as_row() == other.as_row()
+
+    def __repr__(self):
+        return f"Settings{self.as_row()}"
+
+
+# 설정이 없는 길드/사용자가 공유하는 빈 설정
+EMPTY = Settings()
+
+
+class SettingsStore:
+    """설정 저장소 인터페이스 (동기 API, 스레드에서 호출)"""
+
+    def load(self, scope: str, target_id: int):
+        """저장된 Settings, 없으면 None"""
+        raise NotImplementedError
+
+    def save_many(self, items: list):
+        """[(scope, target_id, Settings)] 를 한 트랜잭션으로 저장"""
+        raise NotImplementedError
+
+    def prefixes(self) -> set:
+        """길드 설정에 저장된 접두사 집합"""
+        raise NotImplementedError
+
+
+class MemorySettingsStore(SettingsStore):
+    """프로세스 메모리 저장소 (SETTINGS_DB 가 없을 때, 테스트용)"""
+
+    def __init__(self):
+        self._rows = {}
+
+    def load(self, scope, target_id):
+        row = self._rows.get((scope, target_id))
+        return Settings.from_row(row) if row is not None else None
+
+    def save_many(self, items):
+        for scope, target_id, settings in items:
+            self._rows[(scope, target_id)] = settings.as_row()
+
+    def prefixes(self):
+        return {row[2] for (scope, _), row in self._rows.items() if scope == GUILD and row[2]}
+
+
+class SQLiteSettingsStore(SettingsStore):
+    """SQLite 기반 설정 저장소"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS settings ('
+                'scope TEXT NOT NULL, target_id INTEGER NOT NULL, '
+                'timezone TEXT, locale TEXT, prefix TEXT, disabled TEXT NOT NULL DEFAULT \'\', '
+                'PRIMARY KEY (scope, target_id))'
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def load(self, scope, target_id):
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT timezone, locale, prefix, disabled FROM settings WHERE scope = ? AND target_id = ?',
+                (scope, target_id)
+            ).fetchone()
+        return Settings.from_row(row) if row is not None else None
+
+    def save_many(self, items):
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT INTO settings (scope, target_id, timezone, locale, prefix, disabled) '
+                'VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(scope, target_id) DO UPDATE SET timezone = excluded.timezone, '
+                'locale = excluded.locale, prefix = excluded.prefix, disabled = excluded.disabled',
+                [(scope, target_id, *settings.as_row()) for scope, target_id, settings in items]
+            )
+
+    def prefixes(self):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT prefix FROM settings WHERE scope = ? AND prefix IS NOT NULL AND prefix != ''",
+                (GUILD,)
+            ).fetchall()
+        return {prefix for prefix, in rows}
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_timezone(name: str):
+    """시간대 이름 → tzinfo (pytz.timezone 은 호출마다 비용이 있으므로 캐시)
+
+    pytz 는 첫 ?time 이나 시간대 설정 때 불러옵니다. (봇 시작 시간에 포함하지 않음)
+    """
+    import pytz
+    try:
+        return pytz.timezone(name)
+    except pytz.UnknownTimeZoneError:
+        raise ValueError(f"Unknown timezone: {name}") from None
+
+
+class TimeFormatter:
+    """시간대와 언어가 정해진 ?time 응답 포맷터"""
+
+    __slots__ = ('tz', 'zone', 'template', '_second', '_text')
+
+    def __init__(self, timezone: str, locale: str):
+        self.tz = resolve_timezone(timezone)
+        self.zone = timezone
+        self.template = TIME_TEMPLATES.get(locale, TIME_TEMPLATES[DEFAULT_LOCALE])
+        self._second = None
+        self._text = None
+
+    def _render(self, now: datetime.datetime) -> str:
+        current = now.astimezone(self.tz)
+        return self.template.format(zone=self.zone, time=current.strftime('%Y-%m-%d %H:%M:%S %Z'))
+
+    def format(self, now: datetime.datetime = None) -> str:
+        if now is not None:
+            return self._render(now)
+        # 출력 단위가 초이므로 같은 초 안의 호출은 이전 결과를 재사용
+        timestamp = time.time()
+        second = int(timestamp)
+        if second != self._second:
+            self._text = self._render(datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc))
+            self._second = second
+        return self._text
+
+
+@functools.lru_cache(maxsize=1024)
+def time_formatter(timezone: str, locale: str) -> TimeFormatter:
+    return TimeFormatter(timezone, locale)
+
+
+class GuildSettings:
+    """LRU 캐시 + 모아쓰기 저장을 하는 설정 관리자"""
+
+    def __init__(self, store: SettingsStore = None, capacity: int = 10000, flush_interval: float = 2.0,
+                 metrics=None):
+        self.store = store if store is not None else MemorySettingsStore()
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.metrics = metrics
+        self.logger = logging.getLogger(__name__)
+        self._cache = collections.OrderedDict()
+        self._dirty = {}
+        self._loading = {}
+        self._flush_task = None
+        # 쓰이고 있는 접두사의 첫 글자 (str.startswith 에 그대로 넘길 수 있도록 tuple, 추가만 하므로 상위 집합)
+        self.prefix_initials = (DEFAULT_PREFIX[0],)
+        if metrics is not None:
+            self._hits = metrics.settings_lookups.labels(result='hit')
+            self._misses = metrics.settings_lookups.labels(result='miss')
+
+    async def _call(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def _remember(self, key, settings: Settings):
+        self._cache[key] = settings
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.capacity:
+            self._cache.popitem(last=False)
+
+    def cached(self, scope: str, target_id: int):
+        """캐시에 있으면 Settings, 없으면 None (디스크 접근 없음)"""
+        key = (scope, target_id)
+        settings = self._cache.get(key)
+        if settings is not None:
+            self._cache.move_to_end(key)
+            return settings
+        return self._dirty.get(key)
+
+    async def get(self, scope: str, target_id: int) -> Settings:
+        """설정 조회 (캐시 적중 시 대기 없이 반환, 설정이 없으면 EMPTY)"""
+        settings = self.cached(scope, target_id)
+        if settings is not None:
+            if self.metrics is not None:
+                self._hits.inc()
+            return settings
+
+        key = (scope, target_id)
+        loading = self._loading.get(key)
+        if loading is None:
+            # 같은 키를 동시에 찾는 호출은 한 번의 읽기를 공유
+            loading = asyncio.ensure_future(self._call(self.store.load, scope, target_id))
+            self._loading[key] = loading
+            if self.metrics is not None:
+                self._misses.inc()
+            try:
+                settings = await loading
+            finally:
+                del self._loading[key]
+            # 읽는 동안 변경된 값이 있으면 그것이 우선
+            settings = self.cached(scope, target_id) or settings or EMPTY
+            self._remember(key, settings)
+            return settings
+        settings = await asyncio.shield(loading)
+        return self.cached(scope, target_id) or settings or EMPTY
+
+    def _note_prefix(self, prefix: str):
+        if prefix and prefix[0] not in self.prefix_initials:
+            self.prefix_initials += (prefix[0],)
+
+    async def load_prefixes(self):
+        """저장소에 있는 길드 접두사를 prefix_initials 에 반영 (시작 시 한 번)"""
+        for prefix in await self._call(self.store.prefixes):
+            self._note_prefix(prefix)
+
+    async def update(self, scope: str, target_id: int, **changes) -> Settings:
+        """설정 변경 (캐시에 바로 반영, 저장은 다음 flush 때)"""
+        if scope == GUILD:
+            self._note_prefix(changes.get('prefix'))
+        settings = (await self.get(scope, target_id)).replace(**changes)
+        key = (scope, target_id)
+        self._remember(key, settings)
+        self._dirty[key] = settings
+        return settings
+
+    async def effective(self, guild_id, user_id):
+        """(길드 설정, 사용자 설정) 을 함께 조회 (DM 이면 길드 설정은 EMPTY)"""
+        guild = await self.get(GUILD, guild_id) if guild_id is not None else EMPTY
+        user = await self.get(USER, user_id)
+        return guild, user
+
+    @staticmethod
+    def formatter_for(guild: Settings, user: Settings) -> TimeFormatter:
+        """사용자 설정 > 길드 설정 > 기본값 순으로 고른 ?time 포맷터"""
+        return time_formatter(
+            user.timezone or guild.timezone or DEFAULT_TIMEZONE,
+            user.locale or guild.locale or DEFAULT_LOCALE
+        )
+
+    async def flush(self):
+        """변경된 설정을 한 번에 저장소에 기록"""
+        if not self._dirty:
+            return
+        batch, self._dirty = self._dirty, {}
+        try:
+            await self._call(self.store.save_many, [(scope, target_id, s) for (scope, target_id), s in batch.items()])
+        except Exception:
+            # 실패한 변경은 다음 flush 때 다시 시도 (그 사이 더 새로운 값이 있으면 그것을 유지)
+            self._dirty = {**batch, **self._dirty}
+            raise
+        if self.metrics is not None:
+            self.metrics.settings_writes.inc(len(batch))
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                self.logger.error("Settings flush failed: %s", e)
+
+    def start(self):
+        """주기적 flush 시작 (실행 중인 이벤트 루프 필요)"""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        """flush 중지 후 남은 변경 사항 저장"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Log Pipeline
+============
+이벤트 루프를 막지 않는 로깅 설정
+
+- 로그를 남기는 스레드(봇 이벤트 루프 등)는 레코드를 큐에 넣기만 하고, 메시지 포맷팅과
+  JSON 직렬화, stderr 쓰기는 백그라운드 스레드(QueueListener)에서 합니다.
+  그래서 호출부는 f-string 대신 logger.error("... %s", value) 처럼 인자를 넘겨야 합니다.
+  (인자는 나중에 다른 스레드에서 포맷팅되므로 바뀌지 않는 값만 넘김)
+- 같은 로거/레벨/메시지 템플릿의 WARNING 이상 레코드는 window 초마다 burst 개까지만 남기고
+  나머지는 버립니다. 버린 개수는 다음에 통과하는 같은 레코드의 suppressed 필드와
+  SamplingFilter.suppressed(레벨별 누적) 에 남습니다.
+  템플릿이 같아도 인자로 넘긴 예외의 타입이나 extra={'sample_key': ...}(예: 명령어 이름)가 다르면
+  다른 레코드로 셉니다. 메시지를 포맷팅하지 않고 구분하기 위해서입니다.
+
+환경 변수:
+    LOG_FORMAT=json|text (기본 json), LOG_SAMPLE_BURST (기본 10), LOG_SAMPLE_WINDOW (기본 60초)
+"""
+
+import atexit
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class JSONFormatter(logging.Formatter):
+    """한 줄에 JSON 객체 하나"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'ts': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        suppressed = getattr(record, 'suppressed', None)
+        if suppressed:
+            payload['suppressed'] = suppressed
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """반복되는 같은 경고/에러를 고정 윈도우마다 burst 개로 제한"""
+
+    def __init__(self, burst: int = 10, window: float = 60.0, min_level: int = logging.WARNING,
+                 max_keys: int = 1000):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.min_level = min_level
+        self.max_keys = max_keys
+        # 레벨 이름 -> 버린 레코드 누적 수
+        self.suppressed = {}
+        # (로거, 레벨, 템플릿, sample_key, 예외 타입) -> [이번 윈도우 통과 수, 아직 보고하지 않은 버린 수]
+        self._keys = {}
+        self._window_start = time.monotonic()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(record: logging.LogRecord) -> tuple:
+        # 인자를 문자열로 만들지 않고 예외 타입(감싼 원인 포함)만 봄
+        args = record.args if isinstance(record.args, tuple) else ()
+        errors = tuple((type(arg), type(arg.__cause__)) for arg in args if isinstance(arg, BaseException))
+        return record.name, record.levelno, record.msg, getattr(record, 'sample_key', None), errors
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.min_level:
+            return True
+        key = self._key(record)
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.window:
+                self._window_start = now
+                # 보고하지 않은 버린 수만 다음 윈도우로 넘김
+                self._keys = {k: [0, state[1]] for k, state in self._keys.items() if state[1]}
+            state = self._keys.get(key)
+            if state is None:
+                if len(self._keys) >= self.max_keys:
+                    # 템플릿 종류가 너무 많으면 추적하지 않고 통과
+                    return True
+                state = self._keys[key] = [0, 0]
+            state[0] += 1
+            if state[0] > self.burst:
+                state[1] += 1
+                self.suppressed[record.levelname] = self.suppressed.get(record.levelname, 0) + 1
+                return False
+            if state[1]:
+                record.suppressed = state[1]
+                state[1] = 0
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """포맷팅 없이 레코드를 그대로 큐에 넣는 QueueHandler
+
+    기본 QueueHandler.prepare() 는 호출한 스레드에서 메시지와 예외 traceback 을 포맷팅하므로
+    그 작업을 리스너 스레드로 미룹니다.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(level: int = logging.INFO, fmt: str = None, burst: int = None,
+                  window: float = None, stream=None) -> SamplingFilter:
+    """루트 로거를 큐 + 백그라운드 스레드 구성으로 바꾸고 샘플링 필터를 반환 (프로세스 종료 시 남은 로그를 비움)"""
+    fmt = fmt or os.environ.get('LOG_FORMAT', 'json')
+    sampling = SamplingFilter(
+        burst=burst if burst is not None else int(os.environ.get('LOG_SAMPLE_BURST', '10')),
+        window=window if window is not None else float(os.environ.get('LOG_SAMPLE_WINDOW', '60'))
+    )
+    output = logging.StreamHandler(stream)
+    output.setFormatter(JSONFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    records = queue.SimpleQueue()
+    handler = DeferredQueueHandler(records)
+    handler.addFilter(sampling)
+    listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+    listener.start()
+    atexit.register(listener.stop)
+    return sampling
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Event Loop Monitor
+==================
+봇 이벤트 루프의 스케줄링 지연(lag)을 재고, 루프가 멈추면 감지하는 모듈
+
+- 샘플러 코루틴이 interval 마다 깨어나 예정 시각보다 얼마나 늦었는지 히스토그램에 기록하고
+  실행 중인 태스크 수를 게이지에 기록합니다.
+- 별도 워치독 스레드가 샘플러의 마지막 진행 시각을 보고, stall_timeout 초 넘게 진행이 없으면
+  루프 스레드의 현재 스택을 로그로 남기고 stalled 상태가 됩니다. (/health 가 503 을 반환)
+- 루프가 다시 진행하면 stalled 상태가 풀립니다.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+
+class LoopMonitor:
+    """이벤트 루프 지연 샘플러 + 멈춤 감지 워치독"""
+
+    def __init__(self, metrics=None, interval: float = 0.5, stall_timeout: float = 10.0):
+        self.metrics = metrics
+        self.interval = interval
+        self.stall_timeout = stall_timeout
+        self.logger = logging.getLogger(__name__)
+        self.last_progress = time.monotonic()
+        self.last_lag = 0.0
+        self.stalled = False
+        self.stall_stack = None
+        self._loop_thread_id = None
+        self._task = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    async def _sample(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.last_lag = max(now - expected, 0.0)
+            self.last_progress = now
+            if self.metrics is not None:
+                self.metrics.loop_lag.observe(self.last_lag)
+                self.metrics.loop_tasks.set(len(asyncio.all_tasks()))
+
+    def _loop_stack(self) -> str:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return '(loop thread not found)'
+        return ''.join(traceback.format_stack(frame))
+
+    def check(self, now: float = None) -> bool:
+        """멈춤 여부를 갱신하고 반환 (워치독 스레드가 주기적으로 호출)"""
+        now = time.monotonic() if now is None else now
+        silent_for = now - self.last_progress
+        if silent_for > self.stall_timeout:
+            if not self.stalled:
+                self.stalled = True
+                self.stall_stack = self._loop_stack()
+                if self.metrics is not None:
+                    self.metrics.loop_stalls.inc()
+                self.logger.error(
+                    "Event loop has not progressed for %.1fs, blocking stack:\n%s", silent_for, self.stall_stack
+                )
+        elif self.stalled:
+            self.stalled = False
+            self.logger.warning("Event loop recovered from stall")
+        return self.stalled
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        """현재 이벤트 루프에서 샘플러를, 별도 스레드에서 워치독을 시작"""
+        self._loop_thread_id = threading.get_ident()
+        self.last_progress = time.monotonic()
+        self._task = asyncio.create_task(self._sample())
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> dict:
+        """헬스 체크용 상태"""
+        return {
+            "stalled": self.stalled,
+            "lag_ms": round(self.last_lag * 1000, 1),
+            "since_progress_s": round(time.monotonic() - self.last_progress, 1),
+        }
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Memory Debug
+============
+운영 중인 봇의 메모리 사용처를 확인하기 위한 tracemalloc 래퍼
+
+- tracemalloc 은 켜 두면 할당마다 비용이 들고 메모리도 더 쓰므로, /debug/memory?action=start 로
+  명시적으로 켰을 때만 추적하고 action=stop 으로 끕니다.
+- action=top 은 현재 할당 위치 상위 N 개를, action=diff 는 직전 스냅샷(start 또는 이전 diff) 대비
+  늘어난 위치 상위 N 개를 반환합니다. 몇 분 간격으로 diff 를 반복하면 계속 커지는 곳이 보입니다.
+- discord.py 캐시 크기는 DiscordCacheCollector(discord_bot.py) 가 discord_bot_cache_entries 로 노출합니다.
+"""
+
+import resource
+import threading
+import tracemalloc
+
+ACTIONS = ('top', 'diff', 'start', 'stop')
+GROUPS = ('lineno', 'filename', 'traceback')
+MAX_LIMIT = 200
+MAX_FRAMES = 50
+
+# 추적 자체나 임포트 시스템의 할당은 결과에서 뺌
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def rss_mb() -> float:
+    """현재 RSS (MB)"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize() / 2 ** 20
+    except OSError:
+        # /proc 이 없는 환경에서는 최대 RSS 로 대신함 (Linux 기준 KB)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def parse_memory_params(args) -> tuple:
+    """쿼리 파라미터에서 (action, limit, group, frames) 를 읽음 (잘못되면 ValueError)"""
+    action = args.get('action', 'top')
+    limit = int(args.get('limit', '20'))
+    group = args.get('group', 'lineno')
+    frames = int(args.get('frames', '1'))
+    if action not in ACTIONS:
+        raise ValueError(f"action must be one of {', '.join(ACTIONS)}")
+    if not 0 < limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be in (0, {MAX_LIMIT}]")
+    if group not in GROUPS:
+        raise ValueError(f"group must be one of {', '.join(GROUPS)}")
+    if not 0 < frames <= MAX_FRAMES:
+        raise ValueError(f"frames must be in (0, {MAX_FRAMES}]")
+    return action, limit, group, frames
+
+
+def _stat_entry(stat) -> dict:
+    entry = {
+        "site": str(stat.traceback[0]) if len(stat.traceback) else '?',
+        "size_kb": round(stat.size / 1024, 1),
+        "count": stat.count,
+    }
+    if hasattr(stat, 'size_diff'):
+        entry["size_diff_kb"] = round(stat.size_diff / 1024, 1)
+        entry["count_diff"] = stat.count_diff
+    if len(stat.traceback) > 1:
+        entry["traceback"] = [str(frame) for frame in stat.traceback]
+    return entry
+
+
+class MemoryTracer:
+    """tracemalloc 시작/중지와 스냅샷 비교"""
+
+    def __init__(self):
+        self._baseline = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _snapshot():
+        return tracemalloc.take_snapshot().filter_traces(_IGNORED)
+
+    def status(self) -> dict:
+        traced, peak = tracemalloc.get_traced_memory()
+        return {
+            "tracing": tracemalloc.is_tracing(),
+            "frames": tracemalloc.get_traceback_limit(),
+            "traced_mb": round(traced / 2 ** 20, 2),
+            "peak_mb": round(peak / 2 ** 20, 2),
+            "rss_mb": round(rss_mb(), 1),
+        }
+
+    def start(self, frames: int = 1) -> dict:
+        """추적을 켜고 첫 스냅샷을 기준으로 저장 (이미 켜져 있으면 그대로 둠)"""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+                self._baseline = self._snapshot()
+            return self.status()
+
+    def stop(self) -> dict:
+        with self._lock:
+            tracemalloc.stop()
+            self._baseline = None
+            return self.status()
+
+    def top(self, limit: int = 20, group: str = 'lineno') -> dict:
+        """현재 할당 크기 상위 limit 개 위치"""
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not tracing, call action=start first")
+        stats = self._snapshot().statistics(group)[:limit]
+        return {**self.status(), "stats": [_stat_entry(stat) for stat in stats]}
+
+    def diff(self, limit: int = 20, group: str = 'lineno') -> dict:
+        """직전 스냅샷 대비 증가량 상위 limit 개 위치 (현재 스냅샷이 다음 비교의 기준이 됨)"""
+        with self._lock:
+            if not tracemalloc.is_tracing() or self._baseline is None:
+                raise RuntimeError("tracemalloc is not tracing, call action=start first")
+            current = self._snapshot()
+            stats = current.compare_to(self._baseline, group)[:limit]
+            self._baseline = current
+        return {**self.status(), "stats": [_stat_entry(stat) for stat in stats]}
+
+    def run(self, action: str, limit: int, group: str, frames: int) -> dict:
+        if action == 'start':
+            return self.start(frames)
+        if action == 'stop':
+            return self.stop()
+        if action == 'diff':
+            return self.diff(limit, group)
+        return self.top(limit, group)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Sampling Profiler
+=================
+운영 중인 봇의 CPU 사용처를 재배포 없이 확인하기 위한 샘플링 프로파일러
+
+- 요청이 들어왔을 때만 샘플링 스레드를 띄우므로 평소에는 비용이 없습니다.
+- 정해진 간격마다 sys._current_frames() 로 모든 스레드(봇 이벤트 루프, 메트릭 서버 스레드 등)의
+  스택을 읽어 집계합니다.
+- 결과는 collapsed stack(flamegraph.pl / speedscope 입력), pstats 텍스트, pstats 바이너리로 만들 수 있습니다.
+
+/debug/* 엔드포인트(프로파일, 메모리)는 DebugGate 로 보호합니다. DEBUG_ENDPOINT_TOKEN 이 없으면 꺼져 있고,
+있으면 Authorization: Bearer <token> 헤더가 필요하며 동시에 실행할 수 있는 개수에 상한이 있습니다.
+"""
+
+import collections
+import hmac
+import io
+import marshal
+import os
+import sys
+import threading
+import time
+
+MAX_SECONDS = 60
+DEFAULT_HZ = 100
+MAX_HZ = 1000
+FORMATS = ('collapsed', 'text', 'pstats')
+
+
+class DebugGate:
+    """/debug/* 엔드포인트 인증 토큰과 동시 실행 상한"""
+
+    def __init__(self, token: str, max_concurrent: int = 1):
+        self.token = token
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    @classmethod
+    def from_env(cls):
+        """DEBUG_ENDPOINT_TOKEN 이 있으면 DebugGate, 없으면 None (엔드포인트 비활성화)"""
+        token = os.environ.get('DEBUG_ENDPOINT_TOKEN')
+        if not token:
+            return None
+        return cls(token, int(os.environ.get('DEBUG_MAX_CONCURRENT', '1')))
+
+    def authorized(self, authorization: str) -> bool:
+        scheme, _, supplied = (authorization or '').partition(' ')
+        return scheme.lower() == 'bearer' and hmac.compare_digest(supplied.strip().encode(), self.token.encode())
+
+    def try_acquire(self) -> bool:
+        return self._slots.acquire(blocking=False)
+
+    def release(self):
+        self._slots.release()
+
+
+def parse_profile_params(args) -> tuple:
+    """쿼리 파라미터에서 (seconds, hz, format) 을 읽음 (잘못되면 ValueError)"""
+    seconds = float(args.get('seconds', '10'))
+    hz = float(args.get('hz', DEFAULT_HZ))
+    output = args.get('format', 'collapsed')
+    if not 0 < seconds <= MAX_SECONDS:
+        raise ValueError(f"seconds must be in (0, {MAX_SECONDS}]")
+    if not 0 < hz <= MAX_HZ:
+        raise ValueError(f"hz must be in (0, {MAX_HZ}]")
+    if output not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    return seconds, hz, output
+
+
+class Profile:
+    """샘플링 결과 (스택별 샘플 수)"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples = 0
+        # (스레드 이름, ((파일, 줄, 함수), ...)) -> 횟수, 스택은 바깥쪽부터
+        self.stacks = collections.Counter()
+
+    def collapsed(self) -> str:
+        """flamegraph 용 collapsed stack 형식 ("스레드;바깥;...;안쪽 횟수")"""
+        lines = []
+        for (thread_name, stack), count in self.stacks.most_common():
+            frames = ';'.join(f'{func} ({os.path.basename(filename)}:{line})' for filename, line, func in stack)
+            lines.append(f'{thread_name};{frames} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def create_stats(self):
+        """pstats.Stats 가 읽을 수 있는 stats 사전 생성 (시간 = 샘플 수 x 간격)"""
+        # 함수 단위 키: (파일, 첫 줄 대신 샘플된 함수 이름으로 묶기 위해 0, 함수)
+        self_time = collections.Counter()
+        total_time = collections.Counter()
+        callers = collections.defaultdict(collections.Counter)
+        for (_, stack), count in self.stacks.items():
+            funcs = [(filename, 0, func) for filename, _, func in stack]
+            if not funcs:
+                continue
+            self_time[funcs[-1]] += count
+            for func in set(funcs):
+                total_time[func] += count
+            for caller, callee in set(zip(funcs, funcs[1:])):
+                callers[callee][caller] += count
+        self.stats = {}
+        for func, count in total_time.items():
+            func_callers = {
+                caller: (n, n, 0.0, n * self.interval) for caller, n in callers[func].items()
+            }
+            self.stats[func] = (
+                count, count, self_time[func] * self.interval, count * self.interval, func_callers
+            )
+
+    def pstats_text(self, limit: int = 50) -> str:
+        if not self.stacks:
+            return 'no samples\n'
+        # 텍스트 출력을 요청할 때만 필요하므로 여기서 불러옴
+        import pstats
+        stream = io.StringIO()
+        stats = pstats.Stats(self, stream=stream)
+        stats.sort_stats('cumulative').print_stats(limit)
+        return stream.getvalue()
+
+    def pstats_dump(self) -> bytes:
+        """pstats.Stats(path) / snakeviz 로 열 수 있는 바이너리"""
+        self.create_stats()
+        return marshal.dumps(self.stats)
+
+    def render(self, output: str):
+        if output == 'collapsed':
+            return self.collapsed()
+        if output == 'text':
+            return self.pstats_text()
+        return self.pstats_dump()
+
+
+def sample(seconds: float, hz: float = DEFAULT_HZ) -> Profile:
+    """seconds 동안 hz 로 모든 스레드의 스택을 샘플링 (호출한 스레드에서 실행)"""
+    interval = 1.0 / hz
+    profile = Profile(interval)
+    me = threading.get_ident()
+    deadline = time.monotonic() + seconds
+    next_at = time.monotonic()
+    while next_at < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == me:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, frame.f_lineno, code.co_name))
+                frame = frame.f_back
+            stack.reverse()
+            profile.stacks[(names.get(thread_id, str(thread_id)), tuple(stack))] += 1
+        profile.samples += 1
+        next_at += interval
+        time.sleep(max(next_at - time.monotonic(), 0))
+    return profile
+
+
+def run_profile(seconds: float, hz: float, output: str):
+    """샘플링 후 output 형식으로 변환한 응답 본문"""
+    body = sample(seconds, hz).render(output)
+    return body.encode() if isinstance(body, str) else body
+
+
+def content_type(output: str) -> str:
+    return 'application/octet-stream' if output == 'pstats' else 'text/plain'
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Command Rate Limiter
+====================
+사용자/채널/길드 단위로 명령어 호출 빈도를 제한하는 모듈
+
+- 제한은 명령어별로 "범위=횟수/초" 형태로 설정합니다. (예: user=5/10 → 10초에 5번)
+- 각 제한은 슬라이딩 윈도우 카운터로 계산합니다. 현재/이전 두 세대의 카운트만 보관하고
+  윈도우가 지나면 세대를 통째로 교체하므로, 오래된 키는 한 번에 버려집니다.
+- 한 세대가 보관하는 키 수에 상한이 있어 서로 다른 사용자가 아무리 많아도 메모리가 일정합니다.
+  상한에 닿으면 윈도우를 일찍 넘겨 가장 오래된 세대를 버립니다.
+"""
+
+import time
+
+# 범위별로 명령어 컨텍스트에서 키를 뽑는 방법 (DM 은 채널/길드 대신 사용자 키 사용)
+SCOPES = ('user', 'channel', 'guild')
+
+DEFAULT_LIMITS = 'default:user=5/10,channel=15/10,guild=40/10;roll:user=3/5;odds:user=2/10'
+
+
+class RateLimit:
+    """per 초 동안 최대 rate 번"""
+
+    __slots__ = ('rate', 'per')
+
+    def __init__(self, rate: int, per: float):
+        if rate <= 0 or per <= 0:
+            raise ValueError(f"Invalid rate limit: {rate}/{per}")
+        self.rate = rate
+        self.per = per
+
+    def __eq__(self, other):
+        return isinstance(other, RateLimit) and (self.rate, self.per) == (other.rate, other.per)
+
+    def __repr__(self):
+        return f"RateLimit({self.rate}/{self.per:g}s)"
+
+
+def parse_limits(spec: str) -> dict:
+    """'default:user=5/10,guild=40/10;roll:user=3/5' → {명령어: {범위: RateLimit}}
+
+    명령어에 없는 범위는 default 의 값을 이어받습니다.
+    """
+    limits = {}
+    for entry in filter(None, (part.strip() for part in spec.split(';'))):
+        command, _, rules = entry.partition(':')
+        scoped = {}
+        for rule in filter(None, (part.strip() for part in rules.split(','))):
+            scope, _, value = rule.partition('=')
+            scope = scope.strip()
+            if scope not in SCOPES:
+                raise ValueError(f"Unknown rate limit scope: {scope}")
+            rate, _, per = value.partition('/')
+            scoped[scope] = RateLimit(int(rate), float(per))
+        limits[command.strip()] = scoped
+    default = limits.get('default', {})
+    return {command: {**default, **scoped} for command, scoped in limits.items()}
+
+
+class SlidingWindowCounter:
+    """두 세대 카운트로 근사하는 슬라이딩 윈도우 (키 수 상한 있음)"""
+
+    __slots__ = ('limit', 'max_keys', 'current', 'previous', 'window_start')
+
+    def __init__(self, limit: RateLimit, max_keys: int = 10000):
+        self.limit = limit
+        self.max_keys = max_keys
+        self.current = {}
+        self.previous = {}
+        self.window_start = time.monotonic()
+
+    def _rotate(self, now: float):
+        elapsed = now - self.window_start
+        if elapsed < self.limit.per:
+            return
+        # 두 윈도우 이상 지났다면 이전 세대도 의미가 없음
+        self.previous = self.current if elapsed < 2 * self.limit.per else {}
+        self.current = {}
+        self.window_start = now - elapsed % self.limit.per
+
+    def retry_after(self, key, now: float) -> float:
+        """지금 한 번 더 허용되면 0, 아니면 기다려야 할 대략의 시간(초)"""
+        self._rotate(now)
+        per = self.limit.per
+        weight = 1.0 - (now - self.window_start) / per
+        estimate = self.previous.get(key, 0) * weight + self.current.get(key, 0)
+        if estimate < self.limit.rate:
+            return 0.0
+        previous = self.previous.get(key, 0)
+        if previous and self.current.get(key, 0) < self.limit.rate:
+            # 이전 세대 가중치가 줄어 추정치가 rate 아래로 내려가는 시점
+            needed = 1.0 - (self.limit.rate - self.current.get(key, 0)) / previous
+            return max(needed - (1.0 - weight), 0.0) * per
+        return self.window_start + per - now
+
+    def hit(self, key, now: float):
+        if key not in self.current and len(self.current) >= self.max_keys:
+            # 키 상한에 닿으면 윈도우를 일찍 넘겨 가장 오래된 세대를 버림
+            self.previous = self.current
+            self.current = {}
+            self.window_start = now
+        self.current[key] = self.current.get(key, 0) + 1
+
+    def __len__(self):
+        return len(self.current) + len(self.previous)
+
+
+class RateLimiter:
+    """명령어별 사용자/채널/길드 제한을 적용하는 클래스"""
+
+    def __init__(self, limits: dict, max_keys: int = 10000):
+        self.limits = limits
+        self.max_keys = max_keys
+        self._windows = {}
+
+    def _windows_for(self, command: str) -> dict:
+        windows = self._windows.get(command)
+        if windows is None:
+            scoped = self.limits.get(command, self.limits.get('default', {}))
+            windows = {
+                scope: SlidingWindowCounter(limit, self.max_keys)
+                for scope, limit in scoped.items()
+            }
+            self._windows[command] = windows
+        return windows
+
+    def acquire(self, command: str, keys: dict, now: float = None):
+        """모든 범위를 통과하면 호출을 기록하고 None, 아니면 (막힌 범위, 재시도까지 초) 반환
+
+        한 범위라도 막히면 어느 범위에도 기록하지 않으므로 거절된 호출은 한도를 소모하지 않습니다.
+        """
+        if now is None:
+            now = time.monotonic()
+        windows = self._windows_for(command)
+        for scope, window in windows.items():
+            retry_after = window.retry_after(keys[scope], now)
+            if retry_after > 0:
+                return scope, retry_after
+        for scope, window in windows.items():
+            window.hit(keys[scope], now)
+        return None
+
+    def tracked_keys(self) -> int:
+        """현재 보관 중인 키 수 (메모리 사용량 확인용)"""
+        return sum(len(window) for windows in self._windows.values() for window in windows.values())
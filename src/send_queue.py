@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Outbound Send Queue
+===================
+Discord 레이트 리밋(429)에 걸리지 않도록 메시지 전송 속도를 맞추는 큐
+
+- 채널별 윈도우(기본 5초에 5회)와 전역 윈도우(기본 1초에 50회)를 모두 통과해야 API 를 호출합니다.
+  토큰 버킷(버스트 5, 초당 1 충전)은 어떤 5초 안에 10번까지 보내게 되어 Discord 의 5회/5초를 넘으므로,
+  직전 limit 번째 전송에서 per 초가 지나야 다음 전송을 허용하는 슬라이딩 윈도우를 씁니다.
+- 같은 채널에 쌓인 짧은 텍스트 응답은 2000자 안에서 한 메시지로 합칩니다.
+- 채널별 대기 개수에 상한이 있어, 가득 차면 명령어 핸들러가 기다리게 됩니다(backpressure).
+"""
+
+import asyncio
+import collections
+import time
+
+# Discord 메시지 최대 길이
+MAX_MESSAGE_LENGTH = 2000
+
+
+class SlidingWindow:
+    """어떤 per 초 구간에도 limit 번을 넘지 않는 속도 제한"""
+
+    def __init__(self, limit: int, per: float):
+        self.per = per
+        # 최근 limit 번의 전송 시각
+        self.times = collections.deque(maxlen=int(limit))
+
+    def acquire(self) -> float:
+        """지금 보낼 수 있으면 전송 시각을 기록하고 0, 아니면 다시 시도할 때까지 기다릴 시간(초)
+
+        예약해 둔 미래 시각으로 세면 깨어나는 시각이 태스크마다 밀려 실제 전송 간격이 per 보다
+        짧아질 수 있으므로, 실제로 통과한 시각만 기록합니다.
+        """
+        now = time.monotonic()
+        if len(self.times) == self.times.maxlen:
+            wait = self.times[0] + self.per - now
+            if wait > 0:
+                return wait
+        self.times.append(now)
+        return 0.0
+
+    def completed(self):
+        """마지막 전송 시각을 전송이 끝난 시각으로 바꿈
+
+        Discord 는 요청이 도착한 시각으로 세므로, 응답을 받은 시각부터 per 초를 재면
+        네트워크 지연이 달라져도 서버 쪽 구간에서 limit 를 넘지 않습니다. (한 번에 하나씩 보내는 채널 워커용)
+        """
+        if self.times:
+            self.times[-1] = max(self.times[-1], time.monotonic())
+
+    def is_full(self) -> bool:
+        """제한이 모두 풀린 상태 (정리해도 되는 유휴 채널)"""
+        return not self.times or self.times[-1] + self.per <= time.monotonic()
+
+
+class _PendingMessage:
+    __slots__ = ('content', 'kwargs', 'future', 'enqueued_at')
+
+    def __init__(self, content, kwargs, future):
+        self.content = content
+        self.kwargs = kwargs
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+    @property
+    def coalescible(self) -> bool:
+        # 임베드/파일/답장 등 옵션이 없는 순수 텍스트만 합칠 수 있음
+        return not self.kwargs and isinstance(self.content, str)
+
+
+class _ChannelState:
+    __slots__ = ('channel', 'items', 'bucket', 'slots', 'waiting', 'worker')
+
+    def __init__(self, channel, bucket: SlidingWindow, max_pending: int):
+        self.channel = channel
+        self.items = collections.deque()
+        self.bucket = bucket
+        self.slots = asyncio.Semaphore(max_pending)
+        self.waiting = 0
+        self.worker = None
+
+    @property
+    def idle(self) -> bool:
+        return not self.items and not self.waiting and self.worker is None
+
+
+class OutboundQueue:
+    """채널별/전역 속도 제한과 응답 합치기를 적용하는 전송 파이프라인"""
+
+    def __init__(self, metrics=None, global_rate: int = 50, channel_limit: int = 5,
+                 channel_per: float = 5.0, max_pending: int = 20, coalesce: bool = True,
+                 max_idle_channels: int = 10000):
+        self.metrics = metrics
+        self.global_bucket = SlidingWindow(global_rate, 1.0)
+        self.channel_limit = channel_limit
+        self.channel_per = channel_per
+        self.max_pending = max_pending
+        self.coalesce = coalesce
+        self.max_idle_channels = max_idle_channels
+        self.depth = 0
+        self._channels = {}
+
+    def _state_for(self, channel) -> _ChannelState:
+        state = self._channels.get(channel.id)
+        if state is None:
+            if len(self._channels) >= self.max_idle_channels:
+                self._prune()
+            state = _ChannelState(
+                channel,
+                SlidingWindow(self.channel_limit, self.channel_per),
+                self.max_pending
+            )
+            self._channels[channel.id] = state
+        return state
+
+    def _prune(self):
+        """버킷이 다 찬 유휴 채널 상태를 정리해 메모리를 일정하게 유지"""
+        for channel_id in [cid for cid, st in self._channels.items() if st.idle and st.bucket.is_full()]:
+            del self._channels[channel_id]
+
+    def _set_depth(self, delta: int):
+        self.depth += delta
+        if self.metrics is not None:
+            self.metrics.send_queue_depth.set(self.depth)
+
+    async def send(self, channel, content=None, **kwargs):
+        """메시지를 큐에 넣고 실제로 전송된 Message 를 반환 (큐가 가득 차면 대기)"""
+        state = self._state_for(channel)
+        # 클라이언트를 다시 만들면(샤드 재배치) 채널 객체도 새 HTTP 세션의 것으로 바뀜
+        state.channel = channel
+        state.waiting += 1
+        try:
+            await state.slots.acquire()
+        finally:
+            state.waiting -= 1
+
+        future = asyncio.get_running_loop().create_future()
+        state.items.append(_PendingMessage(content, kwargs, future))
+        self._set_depth(1)
+        if state.worker is None:
+            state.worker = asyncio.create_task(self._drain(state))
+        return await future
+
+    def _take_batch(self, items) -> list:
+        batch = [items.popleft()]
+        if not (self.coalesce and batch[0].coalescible):
+            return batch
+        length = len(batch[0].content)
+        while items and items[0].coalescible and length + 1 + len(items[0].content) <= MAX_MESSAGE_LENGTH:
+            item = items.popleft()
+            length += 1 + len(item.content)
+            batch.append(item)
+        return batch
+
+    async def _wait_for(self, bucket: SlidingWindow):
+        delay = bucket.acquire()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = bucket.acquire()
+
+    async def _drain(self, state: _ChannelState):
+        """채널 하나의 대기 메시지를 순서대로 전송하는 워커"""
+        try:
+            while state.items:
+                await self._wait_for(state.bucket)
+                await self._wait_for(self.global_bucket)
+                batch = self._take_batch(state.items)
+
+                now = time.monotonic()
+                if self.metrics is not None:
+                    for item in batch:
+                        self.metrics.send_wait.observe(now - item.enqueued_at)
+
+                if len(batch) > 1:
+                    args, kwargs = ('\n'.join(item.content for item in batch),), {}
+                else:
+                    args, kwargs = (batch[0].content,), batch[0].kwargs
+                try:
+                    message = await state.channel.send(*args, **kwargs)
+                except Exception as e:
+                    for item in batch:
+                        if not item.future.done():
+                            item.future.set_exception(e)
+                else:
+                    if self.metrics is not None:
+                        self.metrics.messages_sent.inc()
+                        if len(batch) > 1:
+                            self.metrics.send_coalesced.inc(len(batch) - 1)
+                    for item in batch:
+                        if not item.future.done():
+                            item.future.set_result(message)
+                finally:
+                    # 실패한 요청도 Discord 에 도착했을 수 있으므로 구간에 셈
+                    state.bucket.completed()
+                    for _ in batch:
+                        state.slots.release()
+                    self._set_depth(-len(batch))
+        finally:
+            state.worker = None
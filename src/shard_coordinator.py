@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Shard Coordinator
+=================
+여러 Pod 가 같은 봇 토큰으로 실행될 때 샤드를 나눠 갖도록 조정하는 모듈
+
+동작 방식:
+- 각 Pod 는 멤버로 등록하고 TTL 이 있는 멤버십을 주기적으로 갱신합니다.
+- 살아있는 멤버 목록을 정렬해 샤드를 연속 구간으로 나누고,
+  자기 구간의 샤드에 대해 리스(lease)를 획득/갱신합니다.
+- 구간에서 빠진 샤드는 먼저 연결을 끊은 뒤 리스를 반납하므로 두 Pod 가
+  같은 샤드를 동시에 처리하지 않습니다.
+- 종료 시 리스와 멤버십을 즉시 반납해 남은 Pod 가 TTL 만료를 기다리지 않고 넘겨받습니다.
+  (DiscordBot 은 할당이 바뀔 때마다 클라이언트를 다시 만들므로 계속 맡는 샤드도 다시 연결됩니다.
+  DiscordBot.apply_shard_assignment 참고)
+- 저장소 오류 등으로 마지막 갱신 성공 후 TTL 이 지나면 리스가 만료돼 다른 Pod 가 가져갈 수 있으므로
+  갱신이 다시 될 때까지 모든 샤드의 연결을 끊습니다.
+
+리스 저장소는 LeaseStore 인터페이스를 구현하면 교체할 수 있습니다.
+SQLiteLeaseStore 는 로컬 테스트나 단일 노드(hostPath 공유)용 구현입니다.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import time
+
+
+class LeaseStore:
+    """샤드 리스 저장소 인터페이스 (동기 API, 코디네이터가 스레드에서 호출)"""
+
+    def heartbeat(self, member_id: str, ttl: float):
+        """멤버십 등록/갱신"""
+        raise NotImplementedError
+
+    def leave(self, member_id: str):
+        """멤버십 반납"""
+        raise NotImplementedError
+
+    def members(self) -> list:
+        """살아있는 멤버 ID 목록"""
+        raise NotImplementedError
+
+    def acquire(self, shard_id: int, member_id: str, ttl: float) -> bool:
+        """비어 있거나 만료됐거나 이미 내 것인 리스를 획득/갱신"""
+        raise NotImplementedError
+
+    def release(self, shard_id: int, member_id: str):
+        """내 리스 반납"""
+        raise NotImplementedError
+
+    def owners(self) -> dict:
+        """유효한 리스의 {shard_id: member_id}"""
+        raise NotImplementedError
+
+
+class SQLiteLeaseStore(LeaseStore):
+    """SQLite 기반 리스 저장소 (여러 프로세스가 같은 파일을 공유)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS members (member_id TEXT PRIMARY KEY, expires_at REAL NOT NULL)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS leases '
+                '(shard_id INTEGER PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10, isolation_level='IMMEDIATE')
+
+    def heartbeat(self, member_id, ttl):
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO members (member_id, expires_at) VALUES (?, ?) '
+                'ON CONFLICT(member_id) DO UPDATE SET expires_at = excluded.expires_at',
+                (member_id, time.time() + ttl)
+            )
+
+    def leave(self, member_id):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM members WHERE member_id = ?', (member_id,))
+            conn.execute('DELETE FROM leases WHERE owner = ?', (member_id,))
+
+    def members(self):
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT member_id FROM members WHERE expires_at > ? ORDER BY member_id',
+                (time.time(),)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def acquire(self, shard_id, member_id, ttl):
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                'INSERT INTO leases (shard_id, owner, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(shard_id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at '
+                'WHERE leases.owner = excluded.owner OR leases.expires_at <= ?',
+                (shard_id, member_id, now + ttl, now)
+            )
+            return cursor.rowcount == 1
+
+    def release(self, shard_id, member_id):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM leases WHERE shard_id = ? AND owner = ?', (shard_id, member_id))
+
+    def owners(self):
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT shard_id, owner FROM leases WHERE expires_at > ?', (time.time(),)
+            ).fetchall()
+        return dict(rows)
+
+
+def shard_range(member_id: str, members: list, shard_count: int) -> set:
+    """정렬된 멤버 목록에서 member_id 가 맡을 연속 샤드 구간"""
+    if member_id not in members:
+        return set()
+    index = sorted(members).index(member_id)
+    per_member, extra = divmod(shard_count, len(members))
+    start = index * per_member + min(index, extra)
+    end = start + per_member + (1 if index < extra else 0)
+    return set(range(start, end))
+
+
+class ShardCoordinator:
+    """리스 저장소를 통해 이 Pod 가 맡을 샤드를 결정하고 유지하는 클래스
+
+    on_change(shard_ids) 코루틴은 담당 샤드가 바뀔 때마다 호출되며,
+    반환 시점에는 빠진 샤드의 연결이 끊겨 있어야 합니다.
+    """
+
+    def __init__(self, store: LeaseStore, member_id: str, shard_count: int,
+                 lease_ttl: float = 15.0, renew_interval: float = 5.0, metrics=None):
+        self.store = store
+        self.member_id = member_id
+        self.shard_count = shard_count
+        self.lease_ttl = lease_ttl
+        self.renew_interval = renew_interval
+        self.metrics = metrics
+        self.logger = logging.getLogger(__name__)
+        self.on_change = None
+        self.owned = set()
+        self.members = []
+        self.rebalances = 0
+        self.last_rebalance = None
+        # 마지막으로 step() 이 성공한 시작 시각 (monotonic, 이때 갱신한 리스는 이 시각 + TTL 까지 유효)
+        self.renewed_at = None
+
+    async def _call(self, func, *args):
+        return await asyncio.to_thread(func, *args)
+
+    async def step(self):
+        """멤버십 갱신, 리스 획득/갱신/반납을 한 번 수행"""
+        started = time.monotonic()
+        await self._call(self.store.heartbeat, self.member_id, self.lease_ttl)
+        self.members = await self._call(self.store.members)
+        desired = shard_range(self.member_id, self.members, self.shard_count)
+
+        # 계속 맡을 샤드는 갱신, 실패하면 다른 멤버가 가져간 것
+        kept = set()
+        for shard_id in sorted(self.owned & desired):
+            if await self._call(self.store.acquire, shard_id, self.member_id, self.lease_ttl):
+                kept.add(shard_id)
+            else:
+                self.logger.warning("Lost lease for shard %s", shard_id)
+                if self.metrics is not None:
+                    self.metrics.shard_lease_lost.inc()
+
+        # 새로 맡을 샤드는 이전 주인이 반납했거나 만료된 경우에만 획득됨
+        acquired = set()
+        for shard_id in sorted(desired - self.owned):
+            if await self._call(self.store.acquire, shard_id, self.member_id, self.lease_ttl):
+                acquired.add(shard_id)
+
+        dropped = self.owned - kept
+        assignment = kept | acquired
+        if assignment != self.owned:
+            await self._apply(assignment)
+
+        # 연결을 끊은 뒤에 반납해야 두 Pod 가 같은 샤드를 동시에 처리하지 않음
+        for shard_id in sorted(dropped):
+            await self._call(self.store.release, shard_id, self.member_id)
+
+        if self.metrics is not None:
+            self.metrics.coordinator_members.set(len(self.members))
+        self.renewed_at = started
+
+    def leases_expired(self) -> bool:
+        """맡은 샤드의 리스를 TTL 안에 갱신하지 못함 (다른 Pod 가 이미 가져갔을 수 있음)"""
+        return bool(self.owned) and self.renewed_at is not None \
+            and time.monotonic() - self.renewed_at >= self.lease_ttl
+
+    async def _apply(self, assignment: set):
+        self.logger.info("Shard assignment changed: %s -> %s (%d members)",
+                         sorted(self.owned), sorted(assignment), len(self.members))
+        previous = self.owned
+        self.owned = assignment
+        self.rebalances += 1
+        self.last_rebalance = time.time()
+        if self.metrics is not None:
+            self.metrics.shard_rebalances.inc()
+            for shard_id in previous - assignment:
+                self.metrics.shard_owned.labels(shard=str(shard_id)).set(0)
+            for shard_id in assignment:
+                self.metrics.shard_owned.labels(shard=str(shard_id)).set(1)
+        if self.on_change is not None:
+            await self.on_change(sorted(assignment))
+
+    async def run(self):
+        """주기적으로 step() 실행 (갱신이 TTL 넘게 실패하면 모든 샤드 연결을 끊음)"""
+        while True:
+            try:
+                await self.step()
+            except Exception as e:
+                self.logger.error("Shard coordination step failed: %s", e)
+                if self.metrics is not None:
+                    self.metrics.error_count.labels(error_type='shard_coordination', shard='none').inc()
+            if self.leases_expired():
+                self.logger.error("Shard leases expired without renewal, disconnecting shards %s", sorted(self.owned))
+                if self.metrics is not None:
+                    self.metrics.shard_lease_lost.inc(len(self.owned))
+                try:
+                    await self._apply(set())
+                except Exception as e:
+                    self.logger.error("Failed to disconnect shards after lease expiry: %s", e)
+            await asyncio.sleep(self.renew_interval)
+
+    async def shutdown(self):
+        """샤드 연결을 끊고 리스와 멤버십을 즉시 반납 (롤링 업데이트 시 넘겨주기)"""
+        if self.owned:
+            await self._apply(set())
+        await self._call(self.store.leave, self.member_id)
+
+    def status(self) -> dict:
+        """헬스 체크용 할당 상태"""
+        return {
+            "member_id": self.member_id,
+            "members": list(self.members),
+            "shard_count": self.shard_count,
+            "owned_shards": sorted(self.owned),
+            "rebalances": self.rebalances,
+            "last_rebalance": self.last_rebalance,
+        }
@@ -6,27 +6,37 @@ Slack Bot for Kubernetes Log Monitoring
 import os
 import subprocess
 import json
+import functools
 from datetime import datetime, timedelta
 from flask import Flask, request, jsonify
-from slack_sdk import WebClient
-from slack_sdk.signature import SignatureVerifier
 import logging
 
-# 로깅 설정
-logging.basicConfig(level=logging.INFO)
+from log_pipeline import setup_logging
+
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
-# 슬랙 설정
-SLACK_BOT_TOKEN = os.environ.get('SLACK_BOT_TOKEN')
-SLACK_SIGNING_SECRET = os.environ.get('SLACK_SIGNING_SECRET')
 
-if not SLACK_BOT_TOKEN or not SLACK_SIGNING_SECRET:
-    logger.warning("SLACK_BOT_TOKEN 또는 SLACK_SIGNING_SECRET 환경변수가 설정되지 않았습니다. 테스트 모드로 실행됩니다.")
+# 슬랙 설정 (임포트할 때가 아니라 처음 쓸 때 환경변수를 읽고 slack_sdk 를 불러옴)
+@functools.lru_cache(maxsize=None)
+def get_slack_client():
+    """슬랙 WebClient (SLACK_BOT_TOKEN 이 없으면 None, 테스트 모드)"""
+    token = os.environ.get('SLACK_BOT_TOKEN')
+    if not token:
+        return None
+    from slack_sdk import WebClient
+    return WebClient(token=token)
+
 
-slack_client = WebClient(token=SLACK_BOT_TOKEN) if SLACK_BOT_TOKEN else None
-signature_verifier = SignatureVerifier(SLACK_SIGNING_SECRET) if SLACK_SIGNING_SECRET else None
+@functools.lru_cache(maxsize=None)
+def get_signature_verifier():
+    """슬랙 요청 서명 검증기 (SLACK_SIGNING_SECRET 이 없으면 None)"""
+    secret = os.environ.get('SLACK_SIGNING_SECRET')
+    if not secret:
+        return None
+    from slack_sdk.signature import SignatureVerifier
+    return SignatureVerifier(secret)
 
 def get_pod_logs(namespace="monitoring", pod_name=None, lines=20):
     """쿠버네티스 Pod 로그를 가져오는 함수"""
@@ -116,7 +126,8 @@ def handle_slack_command():
     """슬랙 슬래시 명령어 처리"""
     
     # 슬랙 서명 검증 (개발 환경에서는 우회)
-    # if SLACK_SIGNING_SECRET and not signature_verifier.is_valid_request(request.get_data(), request.headers):
+    # verifier = get_signature_verifier()
+    # if verifier and not verifier.is_valid_request(request.get_data(), request.headers):
     #     return jsonify({"error": "Invalid request signature"}), 403
     
     # 슬래시 명령어 데이터 파싱
@@ -126,7 +137,7 @@ def handle_slack_command():
     user_id = command_data.get('user_id')
     channel_id = command_data.get('channel_id')
     
-    logger.info(f"슬래시 명령어 수신: {command} {text} from user {user_id}")
+    logger.info("슬래시 명령어 수신: %s %s from user %s", command, text, user_id)
     
     # 즉시 응답 (슬랙 3초 제한)
     immediate_response = {"response_type": "ephemeral", "text": "🔍 로그를 조회 중입니다..."}
@@ -176,6 +187,7 @@ def handle_slack_command():
         
         # 슬랙으로 메시지 전송
         try:
+            slack_client = get_slack_client()
             if slack_client:
                 slack_client.chat_postMessage(
                     channel=channel_id,
@@ -185,10 +197,10 @@ def handle_slack_command():
                 return jsonify({"response_type": "in_channel", "text": "✅ 로그를 확인했습니다!"})
             else:
                 # 테스트 모드: 메시지를 콘솔에 출력
-                logger.info(f"테스트 모드 - 메시지: {message}")
+                logger.info("테스트 모드 - 메시지: %s", message)
                 return jsonify({"response_type": "in_channel", "text": message})
         except Exception as e:
-            logger.error(f"슬랙 메시지 전송 실패: {e}")
+            logger.error("슬랙 메시지 전송 실패: %s", e)
             return jsonify({"response_type": "ephemeral", "text": f"❌ 메시지 전송 실패: {str(e)}"})
     
     return jsonify(immediate_response)
@@ -199,5 +211,9 @@ def health():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
 if __name__ == '__main__':
+    # 로깅 설정 (포맷팅과 출력은 백그라운드 스레드에서)
+    setup_logging(logging.INFO)
+    if not os.environ.get('SLACK_BOT_TOKEN') or not os.environ.get('SLACK_SIGNING_SECRET'):
+        logger.warning("SLACK_BOT_TOKEN 또는 SLACK_SIGNING_SECRET 환경변수가 설정되지 않았습니다. 테스트 모드로 실행됩니다.")
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=True)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Startup Report
+==============
+봇 프로세스의 콜드 스타트 시간을 모듈별 import 시간과 초기화 단계별 시간으로 나눠 보여주는 도구
+
+- import: 새 파이썬 프로세스에서 `python -X importtime -c "import discord_bot"` 을 실행하고
+  각 모듈의 자체(self) 시간을 최상위 패키지별로 합칩니다. 합계는 import 전체 시간과 같습니다.
+- init: 새 프로세스에서 import 후 main() 이 하는 초기화(메트릭, 봇 객체, 메트릭 서버, 설정 로드)를
+  단계별로 잽니다. 게이트웨이 연결(login/connect/hydrate)은 네트워크가 필요하므로 포함하지 않고,
+  실행 중인 봇의 discord_bot_startup_phase_seconds 메트릭으로 봅니다.
+- 측정은 --repeat 번 해서 가장 빠른 실행을 씁니다. (다른 프로세스 때문에 느려진 실행 제외)
+- 측정할 때마다 새 프로세스를 쓰므로 파이썬 바이트코드 캐시(.pyc)는 데워진 상태입니다.
+  (컨테이너 첫 실행처럼 .pyc 가 없으면 더 느림)
+
+사용법:
+    python startup_report.py [--module discord_bot] [--top 15] [--repeat 3] [--budget 2.0]
+
+프로세스 전체 시간이 --budget 을 넘거나 지연 로딩 모듈이 미리 불러와지면 종료 코드 1 로 끝납니다.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# import + 초기화 시간 예산 (넘으면 main() 이 종료 코드 1, STARTUP_BUDGET_SECONDS 로 조정)
+# 머신 부하에 따라 달라지는 벽시계 시간이므로 단위 테스트가 아니라 이 스크립트(Jenkins 테스트 단계)에서 검사
+COLD_START_BUDGET = float(os.environ.get('STARTUP_BUDGET_SECONDS', '2.0'))
+
+# 첫 사용 전까지 불러오지 않는 모듈 (import discord_bot 후 봇 객체를 만들어도 sys.modules 에 없어야 함)
+LAZY_MODULES = ('flask', 'pytz', 'slack_sdk', 'pstats')
+
+# 새 프로세스에서 초기화 단계별 시간을 JSON 으로 출력하는 스크립트
+_INIT_SCRIPT = '''
+import json, sys, time
+started = time.perf_counter()
+import discord_bot
+steps = {"import": time.perf_counter() - started}
+
+def step(name, func):
+    global started
+    started = time.perf_counter()
+    result = func()
+    steps[name] = time.perf_counter() - started
+    return result
+
+metrics = step("metrics", discord_bot.DiscordBotMetrics)
+bot = step("bot", lambda: discord_bot.DiscordBot("startup_report_token", metrics))
+step("metrics_server", lambda: discord_bot.AsyncMetricsServer(metrics, discord_bot=bot))
+step("settings", lambda: discord_bot.asyncio.run(bot.settings.load_prefixes()))
+print(json.dumps({"steps": steps, "modules": sorted(m for m in %r if m in sys.modules)}))
+'''
+
+
+def _run(args: list) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=SRC_DIR, capture_output=True, text=True, check=True)
+
+
+def _import_times(module: str) -> dict:
+    stderr = _run(['-X', 'importtime', '-c', f'import {module}']).stderr
+    totals = {}
+    for line in stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        totals[package] = totals.get(package, 0.0) + int(self_us) / 1e6
+    return totals
+
+
+def import_breakdown(module: str = 'discord_bot', repeat: int = 1) -> dict:
+    """{최상위 패키지: import 자체 시간(초)} (큰 순서, repeat 번 중 합계가 가장 작은 실행)"""
+    totals = min((_import_times(module) for _ in range(repeat)), key=lambda times: sum(times.values()))
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def _init_times() -> dict:
+    started = time.perf_counter()
+    report = json.loads(_run(['-c', _INIT_SCRIPT % (LAZY_MODULES,)]).stdout.strip().splitlines()[-1])
+    # 인터프리터 시작까지 포함한 프로세스 전체 시간
+    report['total'] = time.perf_counter() - started
+    return report
+
+
+def init_breakdown(repeat: int = 1) -> dict:
+    """{'steps': {단계: 초}, 'modules': 불러와진 LAZY_MODULES 목록, 'total': 전체 초}"""
+    return min((_init_times() for _ in range(repeat)), key=lambda report: report['total'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='콜드 스타트 import/초기화 시간 보고서')
+    parser.add_argument('--module', default='discord_bot', help='import 시간을 나눠 볼 모듈')
+    parser.add_argument('--top', type=int, default=15, help='보여줄 패키지 수')
+    parser.add_argument('--repeat', type=int, default=3, help='측정 횟수 (가장 빠른 실행을 보고)')
+    parser.add_argument('--budget', type=float, default=COLD_START_BUDGET, help='import + 초기화 예산(초)')
+    args = parser.parse_args()
+
+    imports = import_breakdown(args.module, args.repeat)
+    print(f"import {args.module}: {sum(imports.values()) * 1000:,.0f} ms")
+    for package, seconds in list(imports.items())[:args.top]:
+        print(f"  {package:<24} {seconds * 1000:>8,.1f} ms")
+
+    report = init_breakdown(args.repeat)
+    print("초기화 단계:")
+    for name, seconds in report['steps'].items():
+        print(f"  {name:<24} {seconds * 1000:>8,.1f} ms")
+    print(f"프로세스 전체: {report['total'] * 1000:,.0f} ms (예산 {args.budget * 1000:,.0f} ms)")
+    if report['modules']:
+        print("미리 불러와진 지연 로딩 모듈: " + ', '.join(report['modules']))
+    if report['total'] > args.budget or report['modules']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+import asyncio
+import os
+import signal
+import time
+import unittest
+
+import dice
+from cpu_pool import CPUPool, CPUPoolRejected
+from discord_bot import DiscordBotMetrics
+
+
+class TestCPUPool(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.metrics = DiscordBotMetrics()
+        self.pool = CPUPool(self.metrics, workers=1, max_pending=1, timeout=0.2)
+        await self.pool.start()
+
+    async def asyncTearDown(self):
+        self.pool.close()
+
+    def sample(self, name, labels=None):
+        return self.metrics.registry.get_sample_value(name, labels or {})
+
+    # 워커에서 계산한 결과를 돌려받고 실행 시간이 기록됨
+    async def test_run(self):
+        result = await self.pool.run('odds', dice.odds, '3d6 >= 10')
+        self.assertEqual((result.favorable, result.total), (135, 216))
+        self.assertEqual(self.sample('discord_bot_cpu_pool_exec_seconds_count', {'command': 'odds'}), 1.0)
+        self.assertEqual(self.pool.pending, 0)
+
+    # 작업 함수의 예외는 호출자에게 그대로 전달됨
+    async def test_exception(self):
+        with self.assertRaises(dice.DiceError):
+            await self.pool.run('roll', dice.roll, '0d6')
+
+    # 제한 시간을 넘으면 거절되고, 실행 중인 작업이 끝날 때까지 새 작업은 full 로 거절됨
+    async def test_timeout_then_full(self):
+        with self.assertRaises(CPUPoolRejected) as caught:
+            await self.pool.run('odds', time.sleep, 0.6)
+        self.assertEqual(caught.exception.reason, 'timeout')
+        self.assertEqual(self.pool.pending, 1)
+        with self.assertRaises(CPUPoolRejected) as caught:
+            await self.pool.run('odds', dice.odds, '2d6')
+        self.assertEqual(caught.exception.reason, 'full')
+        for reason in ('timeout', 'full'):
+            self.assertEqual(self.sample('discord_bot_cpu_pool_rejected_total', {'command': 'odds', 'reason': reason}), 1.0)
+
+        # 워커가 비면 다시 받음
+        for _ in range(100):
+            if not self.pool.pending:
+                break
+            await asyncio.sleep(0.02)
+        self.assertEqual(self.sample('discord_bot_cpu_pool_pending'), 0.0)
+        self.assertEqual((await self.pool.run('odds', dice.odds, '1d6')).total, 6)
+
+    # 작업 중에 워커가 죽으면 그 작업은 거절되고, 풀을 새로 만들어 다음 작업은 처리됨
+    async def test_worker_died(self):
+        with self.assertRaises(CPUPoolRejected) as caught:
+            await self.pool.run('roll', os._exit, 1)
+        self.assertEqual(caught.exception.reason, 'broken')
+        self.assertEqual((await self.pool.run('odds', dice.odds, '1d6')).total, 6)
+        self.assertEqual(self.sample('discord_bot_cpu_pool_restarts_total'), 1.0)
+
+        # 쉬고 있던 워커가 죽어도(OOM kill) 다음 작업이 새 풀에서 실행됨
+        for pid in list(self.pool._executor._processes):
+            os.kill(pid, signal.SIGKILL)
+        await asyncio.sleep(0.2)
+        self.assertEqual((await self.pool.run('odds', dice.odds, '2d6')).total, 36)
+        self.assertEqual(self.sample('discord_bot_cpu_pool_restarts_total'), 2.0)
+        self.assertEqual(self.pool.pending, 0)
+
+
+class TestPrefork(unittest.TestCase):
+    # main() 처럼 루프 없이 관리 스레드보다 먼저 워커를 모두 fork 하고, 이후 루프에서는 새로 fork 하지 않음
+    def test_prefork(self):
+        pool = CPUPool(workers=2)
+        try:
+            pool.prefork()
+            workers = set(pool._executor._processes)
+            self.assertEqual(len(workers), 2)
+            result = asyncio.run(pool.run('odds', dice.odds, '3d6 >= 10'))
+            self.assertEqual(result.favorable, 135)
+            self.assertEqual(set(pool._executor._processes), workers)
+        finally:
+            pool.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
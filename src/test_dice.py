@@ -0,0 +1,155 @@
+import random
+import unittest
+from unittest.mock import MagicMock, patch
+
+import dice
+
+
+def fixed_rng(*batches):
+    """choices 호출마다 정해진 눈 목록을 돌려주는 가짜 RNG"""
+    rng = MagicMock()
+    rng.choices.side_effect = [list(batch) for batch in batches]
+    return rng
+
+
+class TestCompile(unittest.TestCase):
+    # 여러 항과 상수를 해석
+    def test_terms_and_constant(self):
+        plan = dice.compile_expression('3d8 + 1d4 - 2')
+        self.assertEqual([t.notation for t in plan.terms], ['3d8', '1d4'])
+        self.assertEqual(plan.constant, -2)
+
+    # 같은 식은 캐시된 계획을 재사용
+    def test_cache(self):
+        self.assertIs(dice.compile_expression('4d6kh3'), dice.compile_expression('4d6kh3'))
+
+    # 개수 생략, 대문자 허용
+    def test_implicit_count(self):
+        plan = dice.compile_expression('D20')
+        self.assertEqual((plan.terms[0].count, plan.terms[0].sides), (1, 20))
+
+    # 잘못된 식은 DiceError
+    def test_invalid(self):
+        for expression in ('', 'abc', '0d6', '2d', '2d6+', '2d6kh5', 'd1!', '5000d5000', '1d6' + '+1d6' * 20):
+            with self.assertRaises(dice.DiceError, msg=expression):
+                dice.compile_expression(expression)
+
+
+class TestRoll(unittest.TestCase):
+    # 높은 3개 유지
+    def test_keep_highest(self):
+        result = dice.compile_expression('4d6kh3+2').roll(fixed_rng([1, 5, 3, 6]))
+        self.assertEqual(result.total, 16)
+        self.assertEqual(result.describe(), '[~~1~~, 5, 3, 6] + 2')
+
+    # 낮은 1개 버림
+    def test_drop_lowest(self):
+        result = dice.compile_expression('4d6dl1').roll(fixed_rng([2, 2, 4, 6]))
+        self.assertEqual(result.total, 12)
+
+    # 최댓값이 나오면 추가로 굴림
+    def test_explode(self):
+        result = dice.compile_expression('3d6!').roll(fixed_rng([6, 2, 6], [6, 1], [3]))
+        self.assertEqual(result.terms[0].rolls, [6, 2, 6, 6, 1, 3])
+        self.assertEqual(result.total, 24)
+
+    # 기존 NdN 출력 형식 유지
+    def test_plain_format(self):
+        result = dice.compile_expression('2d6').roll(fixed_rng([4, 4]))
+        self.assertEqual(result.describe(), '4, 4')
+        self.assertEqual(result.total, 8)
+
+    # 많은 주사위는 면별 개수로 집계
+    def test_aggregate(self):
+        result = dice.roll('1000000d6', random.Random(42))
+        term = result.terms[0]
+        self.assertIsNone(term.rolls)
+        self.assertEqual(sum(term.counts.values()), 1000000)
+        self.assertAlmostEqual(result.total / 1000000, 3.5, places=1)
+        self.assertIn('1,000,000개', result.describe())
+
+    # 집계 방식에서도 유지 개수 적용
+    def test_aggregate_keep(self):
+        result = dice.roll('100000d6kh3', random.Random(1))
+        self.assertEqual(result.total, 18)
+
+    # 집계 방식 폭발 주사위는 주사위 수가 늘어남
+    def test_aggregate_explode(self):
+        result = dice.roll('60000d6!', random.Random(7))
+        self.assertGreater(result.terms[0].dice, 60000)
+
+
+class TestBinomial(unittest.TestCase):
+    # 이항 표본 평균이 기대값에 가까움
+    def test_mean(self):
+        rng = random.Random(3)
+        for n, p in ((50, 0.1), (10000, 0.5), (200, 0.9)):
+            samples = [dice._binomial(n, p, rng) for _ in range(2000)]
+            self.assertAlmostEqual(sum(samples) / len(samples) / n, p, delta=0.02)
+            self.assertTrue(all(0 <= s <= n for s in samples))
+
+
+class TestOdds(unittest.TestCase):
+    # 2d6 에서 7 이 나올 확률은 정확히 1/6
+    def test_exact(self):
+        result = dice.odds('2d6 = 7')
+        self.assertEqual((result.favorable, result.total), (6, 36))
+        self.assertEqual((result.low, result.high), (2, 12))
+
+    # 유지 주사위 분포는 전수 조사와 일치
+    def test_keep_matches_enumeration(self):
+        result = dice.odds('4d6kh3 >= 15')
+        self.assertEqual((result.favorable, result.total), (300, 1296))
+        self.assertEqual(dice.odds('3d6kl1 >= 4').favorable, 27)
+
+    # 빼는 항과 상수 반영
+    def test_negative_term(self):
+        result = dice.odds('1d6-1d4+1 > 0')
+        self.assertEqual((result.low, result.high), (-2, 6))
+        self.assertAlmostEqual(result.mean, 2.0)
+        self.assertEqual(result.favorable, 18)
+
+    # 조건이 없으면 요약만 출력
+    def test_summary_only(self):
+        text = dice.odds('10d6').describe()
+        self.assertIn('평균 35.00', text)
+        self.assertIn('범위 10~60', text)
+
+    # 큰 풀도 정밀도 한도 안에서 정확도를 유지
+    def test_large_pool(self):
+        result = dice.odds('1000d6 >= 3500')
+        self.assertAlmostEqual(result.probability, 0.50369, places=4)
+        self.assertAlmostEqual(result.mean, 3500.0, places=6)
+
+    # 잘린 계수의 오차보다 작은 꼬리 확률은 정확한 값을 포함하는 상한으로 표시
+    def test_truncated_tail(self):
+        with patch.object(dice, 'ODDS_PRECISION_BITS', 10 ** 6):
+            dice.sum_distribution.cache_clear()
+            exact = dice.odds('100d6 >= 500')
+        dice.sum_distribution.cache_clear()
+        self.assertEqual(exact.error, 0)
+        for query in ('100d6 >= 500', '60d6 >= 330', '100d6 >= 590'):
+            self.assertIn('**< ', dice.odds(query).describe(), query)
+        low, high = dice.odds('100d6 >= 500').bounds
+        self.assertLessEqual(low, exact.probability)
+        self.assertLessEqual(exact.probability, high)
+        # 범위 밖의 값은 오차와 관계없이 정확히 0%
+        self.assertIn('**0.0000%**', dice.odds('100d6 >= 601').describe())
+
+    # (개수, 면 수) 분포는 캐시되고 2의 거듭제곱 단위로 재사용
+    def test_cached(self):
+        self.assertIs(dice.sum_distribution(12, 6), dice.sum_distribution(12, 6))
+        dice.sum_distribution(16, 6)
+        hits = dice.sum_distribution.cache_info().hits
+        dice.sum_distribution(24, 6)
+        self.assertGreater(dice.sum_distribution.cache_info().hits, hits)
+
+    # 지원하지 않는 식은 DiceError
+    def test_invalid(self):
+        for query in ('3d6! >= 10', '1000d100+1000d100', '30d100kh15', '2d6 >= x'):
+            with self.assertRaises(dice.DiceError, msg=query):
+                dice.odds(query)
+
+
+if __name__ == '__main__':
+    unittest.main()
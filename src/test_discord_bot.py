@@ -1,181 +1,292 @@
-import unittest
-import asyncio
-from unittest.mock import AsyncMock, patch, MagicMock
-import discord
-from discord.ext import commands
-import os
-import pytest
 import datetime
-import pytz
+import os
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from discord_bot import DiscordBot, DiscordBotMetrics
+from gateway_harness import FakeHTTP, GatewayHarness, make_message, make_user
+from guild_settings import GUILD
 
-# Patch the Discord client before importing the bot
-with patch('discord.Client.run'):
-    with patch('discord.Client.login'):
-        os.environ['BOT_TOKEN'] = 'test_token'
-        from discord_bot import bot
 
-class TestDiscordBot(unittest.TestCase):
-    def setUp(self):
-        self.loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self.loop)
-        self.ctx = MagicMock()
-        self.ctx.send = AsyncMock()
+class TestDiscordBot(unittest.IsolatedAsyncioTestCase):
+    """가짜 게이트웨이로 메시지를 넣어 실제 명령어 디스패치 경로를 테스트"""
 
-    def tearDown(self):
-        self.loop.close()
+    async def asyncSetUp(self):
+        self.metrics = DiscordBotMetrics()
+        self.discord_bot = DiscordBot('test_token', self.metrics)
+        self.harness = GatewayHarness(self.discord_bot, guilds=2)
+        await self.harness.setup()
+
+    async def send(self, content: str, user_id: int = 1000) -> list:
+        """메시지 하나를 넣고 봇이 보낸 응답 내용 목록을 반환"""
+        before = len(self.harness.http.sent)
+        self.harness.inject(content, guild_id=1, user_id=user_id)
+        await self.harness.drain(timeout=2)
+        return [content for _, content, _ in self.harness.http.sent[before:]]
+
+    def command_count(self, command: str, status: str) -> float:
+        return self.metrics.registry.get_sample_value(
+            'discord_bot_commands_total', {'command': command, 'status': status, 'shard': '0'}
+        )
 
     # 기존 add 명령어 테스트
-    def test_add_command(self):
-        async def run_test():
-            await bot.get_command('add').callback(self.ctx, 2, 3)
-            self.ctx.send.assert_called_once_with(5)
-        self.loop.run_until_complete(run_test())
+    async def test_add_command(self):
+        self.assertEqual(await self.send('?add 2 3'), ['2 + 3 = 5'])
+        self.assertEqual(self.command_count('add', 'success'), 1.0)
 
     # add 명령어 음수 테스트
-    def test_add_command_negative(self):
-        async def run_test():
-            await bot.get_command('add').callback(self.ctx, -2, -3)
-            self.ctx.send.assert_called_once_with(-5)
-        self.loop.run_until_complete(run_test())
-
-    # add 명령어 큰 숫자 테스트
-    def test_add_command_large_numbers(self):
-        async def run_test():
-            await bot.get_command('add').callback(self.ctx, 999999, 999999)
-            self.ctx.send.assert_called_once_with(1999998)
-        self.loop.run_until_complete(run_test())
+    async def test_add_command_negative(self):
+        self.assertEqual(await self.send('?add -2 -3'), ['-2 + -3 = -5'])
+
+    # add 명령어 잘못된 인자는 명령어 에러로 기록
+    async def test_add_command_invalid(self):
+        await self.send('?add 2 abc')
+        self.assertEqual(self.command_count('add', 'error'), 1.0)
 
     # 기존 roll 명령어 테스트
-    def test_roll_command(self):
-        async def run_test():
-            with patch('random.randint', return_value=4):
-                await bot.get_command('roll').callback(self.ctx, '2d6')
-                self.ctx.send.assert_called_once_with('4, 4')
-        self.loop.run_until_complete(run_test())
+    async def test_roll_command(self):
+        replies = await self.send('?roll 2d6')
+        self.assertRegex(replies[0], r'^🎲 2d6: \d, \d \(총합: \d+\)$')
 
     # roll 명령어 잘못된 형식 테스트
-    def test_roll_command_invalid_format(self):
-        async def run_test():
-            await bot.get_command('roll').callback(self.ctx, 'invalid')
-            self.ctx.send.assert_called_once_with('Format has to be in NdN!')
-        self.loop.run_until_complete(run_test())
-
-    # roll 명령어 음수 주사위 테스트
-    def test_roll_command_negative_dice(self):
-        async def run_test():
-            await bot.get_command('roll').callback(self.ctx, '-1d6')
-            self.ctx.send.assert_called_once_with('Format has to be in NdN!')
-        self.loop.run_until_complete(run_test())
+    async def test_roll_command_invalid_format(self):
+        replies = await self.send('?roll invalid')
+        self.assertTrue(replies[0].startswith('올바른 형식이 아닙니다!'))
+
+    # 큰 주사위와 확률 계산은 프로세스 풀에서 실행됨
+    async def test_cpu_pool_commands(self):
+        try:
+            reply = (await self.send('?roll 5000d6'))[0]
+            self.assertIn('총합', reply)
+            reply = (await self.send('?odds 3d6 >= 10'))[0]
+            self.assertIn('62.5000%', reply)
+        finally:
+            self.discord_bot.cpu_pool.close()
+        for command in ('roll', 'odds'):
+            self.assertEqual(self.metrics.registry.get_sample_value(
+                'discord_bot_cpu_pool_exec_seconds_count', {'command': command}), 1.0)
 
     # 기존 choose 명령어 테스트
-    def test_choose_command(self):
-        async def run_test():
-            choices = ['option1', 'option2', 'option3']
-            with patch('random.choice', return_value='option2'):
-                await bot.get_command('choose').callback(self.ctx, *choices)
-            self.ctx.send.assert_called_once_with('option2')
-        self.loop.run_until_complete(run_test())
-
-    # choose 명령어 단일 선택지 테스트
-    def test_choose_command_single_option(self):
-        async def run_test():
-            choices = ['only_option']
-            with patch('random.choice', return_value='only_option'):
-                await bot.get_command('choose').callback(self.ctx, *choices)
-            self.ctx.send.assert_called_once_with('only_option')
-        self.loop.run_until_complete(run_test())
-
-    # choose 명령어 한글 선택지 테스트
-    def test_choose_command_korean(self):
-        async def run_test():
-            choices = ['김치', '비빔밥', '불고기']
-            with patch('random.choice', return_value='김치'):
-                await bot.get_command('choose').callback(self.ctx, *choices)
-            self.ctx.send.assert_called_once_with('김치')
-        self.loop.run_until_complete(run_test())
+    async def test_choose_command(self):
+        with patch('random.choice', return_value='바나나'):
+            self.assertEqual(await self.send('?choose 사과 바나나'), ['🎯 선택된 것: **바나나**'])
 
     # choose 명령어 빈 선택지 테스트
-    def test_choose_command_empty_choices(self):
-        async def run_test():
-            with self.assertRaises(IndexError):
-                await bot.get_command('choose').callback(self.ctx)
-        self.loop.run_until_complete(run_test())
-
-    # 기존 repeat 명령어 테스트
-    def test_repeat_command(self):
-        async def run_test():
-            await bot.get_command('repeat').callback(self.ctx, 2, 'test')
-            self.assertEqual(self.ctx.send.call_count, 2)
-            self.ctx.send.assert_called_with('test')
-        self.loop.run_until_complete(run_test())
-
-    # repeat 명령어 최대값 테스트
-    def test_repeat_command_max_times(self):
-        async def run_test():
-            await bot.get_command('repeat').callback(self.ctx, 5, 'test')
-            self.assertEqual(self.ctx.send.call_count, 5)
-        self.loop.run_until_complete(run_test())
-
-    # repeat 명령어 한글 테스트
-    def test_repeat_command_korean(self):
-        async def run_test():
-            await bot.get_command('repeat').callback(self.ctx, 2, '안녕하세요')
-            self.assertEqual(self.ctx.send.call_count, 2)
-            self.ctx.send.assert_called_with('안녕하세요')
-        self.loop.run_until_complete(run_test())
-
-    # repeat 명령어 음수 테스트
-    def test_repeat_command_negative_times(self):
-        async def run_test():
-            await bot.get_command('repeat').callback(self.ctx, -1, 'test')
-            self.ctx.send.assert_called_once_with('Number of repeats must be positive!')
-        self.loop.run_until_complete(run_test())
-
-
-    # 기존 joined 명령어 테스트
-    def test_joined_command(self):
-        async def run_test():
-            with patch('discord.utils.format_dt') as mock_format_dt:
-                member = MagicMock()
-                member.name = 'TestUser'
-                member.joined_at = '2023-01-01'
-                formatted_date = '2023년 1월 1일'
-                mock_format_dt.return_value = formatted_date
-                await bot.get_command('joined').callback(self.ctx, member)
-                self.ctx.send.assert_called_once_with(f'TestUser joined {formatted_date}')
-        self.loop.run_until_complete(run_test())
-
-    # joined 명령어 한글 이름 테스트
-    def test_joined_command_korean_name(self):
-        async def run_test():
-            with patch('discord.utils.format_dt') as mock_format_dt:
-                member = MagicMock()
-                member.name = '홍길동'
-                member.joined_at = '2023-01-01'
-                formatted_date = '2023년 1월 1일'
-                mock_format_dt.return_value = formatted_date
-                await bot.get_command('joined').callback(self.ctx, member)
-                self.ctx.send.assert_called_once_with(f'홍길동 joined {formatted_date}')
-        self.loop.run_until_complete(run_test())
-
-@pytest.mark.asyncio
-async def test_time():
-    # 가상의 컨텍스트 생성
-    ctx = MockContext()
-    
-    # time 명령어 실행
-    await bot.get_command('time').callback(ctx)
-    
-    # 응답 확인
-    assert ctx.sent_message is not None
-    assert '현재 한국 시간:' in ctx.sent_message
-    
-    # 시간 형식 확인
-    time_str = ctx.sent_message.split('현재 한국 시간: ')[1]
-    try:
+    async def test_choose_command_empty_choices(self):
+        self.assertEqual(await self.send('?choose'), ['선택지를 입력해주세요! 예: `?choose 사과 바나나 오렌지`'])
+
+    # time 명령어는 기본값으로 한국 시간을 보여줌
+    async def test_time_command(self):
+        reply = (await self.send('?time'))[0]
+        self.assertIn('Asia/Seoul', reply)
+        time_str = reply.split('**')[1]
         datetime.datetime.strptime(time_str.split(' KST')[0], '%Y-%m-%d %H:%M:%S')
-    except ValueError:
-        pytest.fail("Invalid time format")
+
+    # 연결 전(지연시간 NaN)에도 ping 이 응답함
+    async def test_ping_command(self):
+        self.assertEqual(await self.send('?ping'), ['🏓 Pong! 지연시간: 측정 중'])
+
+    # info 명령어는 임베드로 응답
+    async def test_info_command(self):
+        await self.send('?info')
+        self.assertTrue(self.harness.http.sent[-1][2])
+
+    # 명령어가 아닌 메시지에는 응답하지 않음
+    async def test_ignores_non_commands(self):
+        self.assertEqual(await self.send('안녕하세요'), [])
+
+    # 명령어가 아닌 메시지는 Context 를 만들기 전에 걸러지고 결과별로 셈
+    async def test_message_filter(self):
+        self.harness.discord_bot.bot._connection.parse_message_create(
+            make_message(self.harness._next_id(), 10, 1, 2000, '?add 1 1', bot=True)
+        )
+        for content in ('안녕하세요', '?없는명령어 1', '? add 1 1', '?add 2 3'):
+            await self.send(content)
+        await self.send('!add 2 3')
+        await self.discord_bot.settings.update(GUILD, 1, prefix='!')
+        self.assertEqual(await self.send('!add 2 3'), ['2 + 3 = 5'])
+
+        def filtered(result):
+            return self.metrics.registry.get_sample_value('discord_bot_message_filter_total', {'result': result})
+        self.assertEqual(filtered('bot'), 1.0)
+        self.assertEqual(filtered('no_prefix'), 2.0)
+        self.assertEqual(filtered('unknown_command'), 2.0)
+        self.assertEqual(filtered('dispatched'), 2.0)
+        # 알 수 없는 명령어는 더 이상 CommandNotFound 에러로 세지 않음
+        self.assertEqual(self.metrics.registry.get_sample_value(
+            'discord_bot_errors_total', {'error_type': 'command_error', 'shard': '0'}), 0.0)
+
+    # 속도 제한에 걸린 호출은 응답 없이 별도 카운터로 셈
+    async def test_rate_limited(self):
+        for _ in range(4):
+            await self.send('?roll 1d6')
+        self.assertEqual(self.metrics.registry.get_sample_value(
+            'discord_bot_rate_limited_total', {'command': 'roll', 'scope': 'user'}), 1.0)
+
+    # discord.py 캐시 크기가 게이지로 노출됨
+    async def test_cache_entries(self):
+        for user_id in (1000, 1001, 1002):
+            await self.send('안녕하세요', user_id=user_id)
+        self.discord_bot.bot._connection.parse_guild_member_add({
+            'guild_id': '1', 'user': make_user(2000), 'roles': [], 'joined_at': None, 'deaf': False, 'mute': False, 'flags': 0,
+        })
+
+        def entries(cache):
+            return self.metrics.registry.get_sample_value('discord_bot_cache_entries', {'cache': cache})
+        # 스크레이프는 이벤트 루프에서 잰 스냅샷만 읽음
+        self.assertIsNone(entries('guilds'))
+        await self.discord_bot.update_metrics()
+        self.assertEqual(entries('guilds'), 2.0)
+        self.assertEqual(entries('members'), 1.0)
+        self.assertEqual(entries('users'), 4.0)
+        self.assertEqual(entries('messages'), 3.0)
+
+    # 클라이언트를 다시 만든 뒤의 응답은 이전 클라이언트가 아니라 새 클라이언트의 HTTP 로 나감
+    async def test_send_after_rebuild(self):
+        self.assertEqual(await self.send('?add 1 1'), ['1 + 1 = 2'])
+        old_http = self.harness.http
+        self.discord_bot._build_bot(None)
+        self.harness = GatewayHarness(self.discord_bot, guilds=2)
+        await self.harness.setup()
+        self.assertEqual(await self.send('?add 2 2'), ['2 + 2 = 4'])
+        self.assertEqual([content for _, content, _ in old_http.sent], ['1 + 1 = 2'])
+
+    # 게이트웨이 연결, 길드 사용 가능 비율, 캐시 준비가 모두 되어야 준비 상태
+    async def test_readiness(self):
+        def failing():
+            return sorted(name for name, check in self.discord_bot.readiness().items() if not check['ok'])
+        self.assertEqual(failing(), ['caches', 'gateway'])
+        self.discord_bot.bot.ws = MagicMock(latency=0.05)
+        self.discord_bot.bot._ready.set()
+        self.assertEqual(failing(), [])
+        self.discord_bot.bot.get_guild(1).unavailable = True
+        self.assertEqual(failing(), ['guilds'])
+        self.discord_bot.bot.get_guild(1).unavailable = False
+        self.discord_bot.draining = True
+        self.assertEqual(failing(), ['draining'])
+
+    # 시작 단계는 직전 단계가 끝난 뒤부터 잰 시간으로 한 번씩만 기록
+    async def test_startup_phases(self):
+        def phase(name):
+            return self.metrics.registry.get_sample_value('discord_bot_startup_phase_seconds', {'phase': name})
+        self.assertGreater(phase('import'), 0)
+        self.discord_bot._mark_phase('login')
+        self.assertIsNone(phase('login'))
+        self.discord_bot._phase_mark = time.monotonic() - 5
+        self.discord_bot._mark_phase('login')
+        self.discord_bot._mark_phase('connect')
+        self.discord_bot._mark_phase('login')
+        self.assertGreaterEqual(phase('login'), 5)
+        self.assertLess(phase('connect'), 1)
+
+
+class TestSlashCommands(unittest.IsolatedAsyncioTestCase):
+    """INTERACTION_CREATE 를 넣어 슬래시 명령어 경로를 테스트"""
+
+    async def asyncSetUp(self):
+        self.metrics = DiscordBotMetrics()
+        self.discord_bot = DiscordBot('test_token', self.metrics, message_content=False)
+        self.harness = GatewayHarness(self.discord_bot, guilds=1)
+        await self.harness.setup()
+
+    async def invoke(self, name: str, user_id: int = 1000, **options) -> list:
+        before = len(self.harness.http.sent)
+        self.harness.inject_interaction(name, options, guild_id=1, user_id=user_id)
+        await self.harness.drain(timeout=2)
+        return [content for _, content, _ in self.harness.http.sent[before:]]
+
+    # 접두사 명령어와 같은 구현으로 인터랙션에 응답하고 같은 메트릭을 기록
+    async def test_commands(self):
+        self.assertEqual(await self.invoke('add', left=2, right=3), ['2 + 3 = 5'])
+        self.assertEqual(await self.invoke('ping'), ['🏓 Pong! 지연시간: 측정 중'])
+        with patch('random.choice', side_effect=lambda choices: choices[0]):
+            self.assertEqual(await self.invoke('choose', choices='"사과 주스" 바나나'), ['🎯 선택된 것: **사과 주스**'])
+        await self.invoke('info')
+        self.assertTrue(self.harness.http.sent[-1][2])
+        self.assertEqual(self.metrics.registry.get_sample_value(
+            'discord_bot_commands_total', {'command': 'add', 'status': 'success', 'shard': '0'}), 1.0)
+        self.assertEqual(self.metrics.registry.get_sample_value(
+            'discord_bot_reply_latency_seconds_count', {'command': 'ping', 'shard': '0'}), 1.0)
+        # 인터랙션 응답도 보낸 메시지 수에 포함
+        self.assertEqual(self.metrics.registry.get_sample_value('discord_bot_messages_sent_total'), 4.0)
+
+    # 속도 제한에 걸리면 응답하지 않는 대신 본인에게만 보이는 안내로 응답
+    async def test_rate_limited(self):
+        for _ in range(3):
+            await self.invoke('roll', dice='1d6')
+        self.assertRegex((await self.invoke('roll', dice='1d6'))[0], r'^⏳ .*초 후에 다시 시도해주세요\.$')
+
+    # 메시지 내용 인텐트 없이는 봇 멘션만 접두사로 인식
+    async def test_mention_prefix(self):
+        self.assertFalse(self.discord_bot.bot.intents.message_content)
+        self.harness.inject('?add 2 3', guild_id=1, user_id=1000)
+        self.harness.inject('<@1> add 4 5', guild_id=1, user_id=1001)
+        await self.harness.drain(timeout=2)
+        self.assertEqual([content for _, content, _ in self.harness.http.sent], ['4 + 5 = 9'])
+
+
+class TestLeanMemberCache(unittest.IsolatedAsyncioTestCase):
+    # lean 모드는 멤버/메시지를 캐시하지 않지만 명령어와 길드 통계는 그대로 동작
+    async def test_lean(self):
+        metrics = DiscordBotMetrics()
+        discord_bot = DiscordBot('test_token', metrics, member_cache='lean')
+        harness = GatewayHarness(discord_bot, guilds=1)
+        await harness.setup()
+        harness.inject('?add 2 3', guild_id=1, user_id=1000)
+        await harness.drain(timeout=2)
+        self.assertEqual(harness.http.sent[-1][1], '2 + 3 = 5')
+        discord_bot.bot._connection.parse_guild_member_add({
+            'guild_id': '1', 'user': make_user(2000), 'roles': [], 'joined_at': None,
+            'deaf': False, 'mute': False, 'flags': 0,
+        })
+        await harness.drain(timeout=2)
+        caches = metrics.discord_caches.sizes()
+        self.assertEqual((caches['members'], caches['messages']), (0, 0))
+        self.assertEqual(metrics.guild_stats.member_total, harness.members_per_guild + 1)
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            DiscordBot('test_token', DiscordBotMetrics(), member_cache='none')
+
+
+class TestGatewayHarness(unittest.IsolatedAsyncioTestCase):
+    # 짧은 부하 실행이 오프라인으로 끝나고 결과를 보고함
+    async def test_run(self):
+        discord_bot = DiscordBot('test_token', DiscordBotMetrics())
+        harness = GatewayHarness(discord_bot, guilds=20, users=500)
+        await harness.setup()
+        result = await harness.run(rate=100, duration=0.5)
+        self.assertGreater(result['commands'], 0)
+        self.assertEqual(result['replies'], result['commands'])
+        self.assertGreater(result['latency_p99_ms'], 0)
+        self.assertGreaterEqual(result['loop_lag_max_ms'], 0)
+
+    # Discord 제한을 넘는 요청은 429 로 기록되고 재시도됨
+    async def test_fake_http_rate_limit(self):
+        http = FakeHTTP(channel_limit=(2, 0.05))
+        discord_bot = DiscordBot('test_token', DiscordBotMetrics())
+        harness = GatewayHarness(discord_bot, guilds=1, http=http)
+        await harness.setup()
+        channel = discord_bot.bot.get_channel(10)
+        for _ in range(3):
+            await channel.send('x')
+        self.assertEqual(len(http.sent), 3)
+        self.assertGreaterEqual(http.rate_limited, 1)
+
+    # 한 채널에 응답이 몰려도 전송 큐가 채널 제한 안에서 보내므로 429 가 나지 않음
+    async def test_no_429_under_load(self):
+        env = {'SEND_CHANNEL_PER': '0.2', 'SEND_COALESCE': '0', 'COMMAND_RATE_LIMITS': ''}
+        with patch.dict(os.environ, env):
+            discord_bot = DiscordBot('test_token', DiscordBotMetrics())
+        harness = GatewayHarness(discord_bot, guilds=2, http=FakeHTTP(channel_limit=(5, 0.2)))
+        await harness.setup()
+        for i in range(24):
+            harness.inject(f'?add {i} 1', guild_id=1 + i % 2)
+        await harness.drain()
+        self.assertEqual(len(harness.http.sent), 24)
+        self.assertEqual(harness.http.rate_limited, 0)
+
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import discord
+import yarl
+from discord.gateway import DiscordWebSocket, ReconnectWebSocket
+
+from discord_bot import DiscordBot, DiscordBotMetrics
+from gateway_harness import FakeHTTP, GatewayHarness
+from gateway_session import HANDOFF_CLOSE_CODE, SessionStore, guild_payload, token_fingerprint
+
+
+class FakeWebSocket:
+    """세션 정보와 종료 코드만 흉내 내는 게이트웨이 웹소켓"""
+
+    def __init__(self, poll=None):
+        self.session_id = 'session-1'
+        self.sequence = 42
+        self.gateway = yarl.URL('wss://resume.example.test')
+        self.open = True
+        self.close_code = None
+        self.poll = poll
+
+    async def close(self, code=4000):
+        self.open = False
+        self.close_code = code
+
+    async def poll_event(self):
+        await self.poll()
+
+
+class TestSessionStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'session.json')
+        self.store = SessionStore(self.path, max_age=60)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    # 저장한 세션을 한 번만 읽을 수 있음
+    def test_round_trip(self):
+        self.store.save({'session_id': 'abc', 'sequence': 7, 'token': 'fp'})
+        session, reason = self.store.load('fp')
+        self.assertIsNone(reason)
+        self.assertEqual((session['session_id'], session['sequence']), ('abc', 7))
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(self.store.load('fp'), (None, None))
+
+    # 다른 토큰이나 오래된 세션은 버림
+    def test_stale(self):
+        self.store.save({'session_id': 'abc', 'sequence': 7, 'token': 'fp'})
+        self.assertEqual(self.store.load('other'), (None, 'mismatch'))
+        self.store.save({'session_id': 'abc', 'sequence': 7, 'token': 'fp'})
+        with open(self.path) as f:
+            data = json.load(f)
+        data['saved_at'] = time.time() - 300
+        with open(self.path, 'w') as f:
+            json.dump(data, f)
+        session, reason = self.store.load('fp')
+        self.assertIsNone(session)
+        self.assertTrue(reason.startswith('expired'))
+
+
+class TestHandoff(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'session.json')
+        self.metrics = DiscordBotMetrics()
+        with patch.dict(os.environ, {'SESSION_FILE': self.path}):
+            self.discord_bot = DiscordBot('test_token', self.metrics)
+        self.harness = GatewayHarness(self.discord_bot, guilds=2, http=FakeHTTP(latency=0.2))
+        await self.harness.setup()
+
+    async def asyncTearDown(self):
+        self.tmpdir.cleanup()
+
+    def resumes(self, result: str) -> float:
+        return self.metrics.registry.get_sample_value('discord_bot_session_resumes_total', {'result': result})
+
+    # 종료 중에는 새 명령어를 받지 않고, 처리 중인 응답을 보낸 뒤 세션을 남기고 4000 으로 닫음
+    async def test_drain_and_save(self):
+        ws = self.discord_bot.bot.ws = FakeWebSocket()
+        self.harness.inject('?add 2 3', guild_id=1)
+        await asyncio.sleep(0.05)
+        self.discord_bot.request_shutdown()
+        await asyncio.sleep(0)
+        self.harness.inject('?add 4 5', guild_id=1)
+        await self.discord_bot._shutdown_task
+
+        self.assertEqual([content for _, content, _ in self.harness.http.sent], ['2 + 3 = 5'])
+        self.assertEqual(self.metrics.message_filter.counts['draining'], 1)
+        self.assertEqual(ws.close_code, HANDOFF_CLOSE_CODE)
+        session, reason = SessionStore(self.path).load(token_fingerprint('test_token'))
+        self.assertEqual((session['session_id'], session['sequence']), ('session-1', 42))
+        self.assertEqual(len(session['guilds']), 2)
+
+    # 다음 프로세스는 스냅샷으로 길드 캐시를 채우고 RESUME, 놓친 이벤트를 받으면 준비 완료
+    async def test_resume(self):
+        bot = self.discord_bot.bot
+        snapshot = [guild_payload(guild) for guild in bot.guilds]
+        with patch.dict(os.environ, {'SESSION_FILE': self.path}):
+            discord_bot = DiscordBot('test_token', self.metrics)
+        resumed = discord_bot.bot
+        await resumed._async_setup_hook()
+        resumed._connection.user = bot.user
+        discord_bot._session_ready = lambda mode: None
+
+        async def poll():
+            resumed.dispatch('resumed')
+            await asyncio.sleep(0.01)
+            raise ReconnectWebSocket(None, resume=False)
+
+        resumed.resume_session = {'session_id': 'session-1', 'sequence': 42,
+                                  'gateway': 'wss://resume.example.test', 'guilds': snapshot}
+        from_client = AsyncMock(return_value=FakeWebSocket(poll))
+        with patch.object(DiscordWebSocket, 'from_client', from_client), \
+                patch.object(discord.Client, 'connect', AsyncMock()) as identify:
+            await resumed.connect()
+        params = from_client.call_args.kwargs
+        self.assertEqual((params['session'], params['sequence'], params['resume']), ('session-1', 42, True))
+        self.assertEqual(self.resumes('success'), 1.0)
+        self.assertEqual(self.resumes('invalid'), 0.0)
+        # 세션이 나중에 무효화되면 평소처럼 IDENTIFY
+        identify.assert_awaited_once()
+        channel = resumed.get_channel(10)
+        self.assertEqual((channel.name, channel.guild.id), ('general', 1))
+        self.assertEqual([role.name for role in channel.guild.roles], ['@everyone'])
+
+    # Discord 가 세션을 거절하면 결과를 기록하고 IDENTIFY
+    async def test_resume_invalid(self):
+        async def poll():
+            raise ReconnectWebSocket(None, resume=False)
+
+        bot = self.discord_bot.bot
+        bot.resume_session = {'session_id': 'session-1', 'sequence': 42,
+                              'gateway': 'wss://resume.example.test', 'guilds': []}
+        with patch.object(DiscordWebSocket, 'from_client', AsyncMock(return_value=FakeWebSocket(poll))), \
+                patch.object(discord.Client, 'connect', AsyncMock()) as identify:
+            await bot.connect()
+        self.assertEqual(self.resumes('invalid'), 1.0)
+        self.assertFalse(bot.replaying)
+        identify.assert_awaited_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
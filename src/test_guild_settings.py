@@ -0,0 +1,143 @@
+import asyncio
+import datetime
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+import guild_settings
+from guild_settings import (
+    EMPTY, GUILD, USER, GuildSettings, MemorySettingsStore, Settings, SQLiteSettingsStore, time_formatter
+)
+from discord_bot import CommandDisabled, DiscordBot, DiscordBotMetrics
+
+
+class CountingStore(MemorySettingsStore):
+    """load/save_many 호출 횟수를 세는 저장소"""
+
+    def __init__(self):
+        super().__init__()
+        self.loads = 0
+        self.saves = []
+
+    def load(self, scope, target_id):
+        self.loads += 1
+        return super().load(scope, target_id)
+
+    def save_many(self, items):
+        self.saves.append(len(items))
+        super().save_many(items)
+
+
+class TestGuildSettings(unittest.IsolatedAsyncioTestCase):
+    # 한 번 읽은 설정은 캐시에서 반환 (설정이 없으면 EMPTY 도 캐시)
+    async def test_cache_hit(self):
+        store = CountingStore()
+        settings = GuildSettings(store)
+        self.assertIs(await settings.get(GUILD, 1), EMPTY)
+        self.assertIs(await settings.get(GUILD, 1), EMPTY)
+        self.assertEqual(store.loads, 1)
+
+    # 동시에 같은 키를 찾으면 한 번만 읽음
+    async def test_concurrent_miss(self):
+        store = CountingStore()
+        settings = GuildSettings(store)
+        results = await asyncio.gather(*(settings.get(GUILD, 7) for _ in range(5)))
+        self.assertEqual(store.loads, 1)
+        self.assertTrue(all(result is EMPTY for result in results))
+
+    # 용량을 넘으면 가장 오래 쓰지 않은 항목부터 밀려남
+    async def test_lru_eviction(self):
+        store = CountingStore()
+        settings = GuildSettings(store, capacity=2)
+        await settings.get(GUILD, 1)
+        await settings.get(GUILD, 2)
+        await settings.get(GUILD, 1)
+        await settings.get(GUILD, 3)
+        self.assertIsNotNone(settings.cached(GUILD, 1))
+        self.assertIsNone(settings.cached(GUILD, 2))
+
+    # 변경 사항은 모아서 한 번에 저장되고, 밀려나도 저장 전까지 유지됨
+    async def test_batched_writes(self):
+        store = CountingStore()
+        settings = GuildSettings(store, capacity=1)
+        await settings.update(GUILD, 1, prefix='!')
+        await settings.update(USER, 2, timezone='UTC')
+        self.assertEqual(store.saves, [])
+        self.assertEqual((await settings.get(GUILD, 1)).prefix, '!')
+        await settings.flush()
+        self.assertEqual(store.saves, [2])
+        self.assertEqual(store.load(USER, 2).timezone, 'UTC')
+
+    # SQLite 저장소에 저장하고 다시 읽기
+    async def test_sqlite_roundtrip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = SQLiteSettingsStore(os.path.join(directory, 'settings.db'))
+            settings = GuildSettings(store)
+            await settings.update(GUILD, 1, timezone='UTC', disabled={'roll', 'odds'})
+            await settings.close()
+            reloaded = await GuildSettings(store).get(GUILD, 1)
+            self.assertEqual(reloaded, Settings(timezone='UTC', disabled={'odds', 'roll'}))
+
+    # 저장된 접두사와 새로 바꾼 접두사의 첫 글자가 사전 필터 목록에 들어감
+    async def test_prefix_initials(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = SQLiteSettingsStore(os.path.join(directory, 'settings.db'))
+            settings = GuildSettings(store)
+            await settings.update(GUILD, 1, prefix='!bot')
+            await settings.update(USER, 2, timezone='UTC')
+            self.assertEqual(settings.prefix_initials, ('?', '!'))
+            await settings.close()
+            self.assertEqual(store.prefixes(), {'!bot'})
+            reloaded = GuildSettings(store)
+            await reloaded.load_prefixes()
+            self.assertEqual(reloaded.prefix_initials, ('?', '!'))
+
+
+class TestTimeFormatter(unittest.TestCase):
+    # 시간대와 언어별 포맷터는 캐시되어 재사용
+    def test_cached(self):
+        self.assertIs(time_formatter('UTC', 'en'), time_formatter('UTC', 'en'))
+
+    # 사용자 설정이 서버 설정보다 우선
+    def test_effective(self):
+        formatter = GuildSettings.formatter_for(Settings(timezone='Asia/Tokyo'), Settings(locale='en'))
+        now = datetime.datetime(2024, 1, 1, 0, 0, tzinfo=datetime.timezone.utc)
+        self.assertEqual(formatter.format(now), '🕐 Current time (Asia/Tokyo): **2024-01-01 09:00:00 JST**')
+
+    # 기본값은 한국 시간
+    def test_default(self):
+        self.assertEqual(GuildSettings.formatter_for(EMPTY, EMPTY).zone, 'Asia/Seoul')
+
+    # 알 수 없는 시간대는 ValueError
+    def test_unknown_timezone(self):
+        with self.assertRaises(ValueError):
+            guild_settings.resolve_timezone('Mars/Olympus')
+
+
+class TestBotSettings(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.bot = DiscordBot('test_token', DiscordBotMetrics())
+
+    # 길드 설정의 접두사 사용
+    async def test_prefix(self):
+        message = MagicMock()
+        message.guild.id = 1
+        self.assertEqual(await self.bot._get_prefix(self.bot.bot, message), '?')
+        await self.bot.settings.update(GUILD, 1, prefix='!')
+        self.assertEqual(await self.bot._get_prefix(self.bot.bot, message), '!')
+
+    # 비활성화된 명령어는 CommandDisabled
+    async def test_disabled(self):
+        await self.bot.settings.update(GUILD, 1, disabled={'roll'})
+        ctx = MagicMock()
+        ctx.guild.id = 1
+        ctx.command = self.bot.bot.get_command('roll')
+        with self.assertRaises(CommandDisabled):
+            await self.bot._check_enabled(ctx)
+        ctx.command = self.bot.bot.get_command('ping')
+        self.assertTrue(await self.bot._check_enabled(ctx))
+
+
+if __name__ == '__main__':
+    unittest.main()
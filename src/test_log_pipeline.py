@@ -0,0 +1,113 @@
+import io
+import json
+import logging
+import time
+import unittest
+
+from discord_bot import LogSuppressionCollector
+from log_pipeline import DeferredQueueHandler, JSONFormatter, SamplingFilter, setup_logging
+from prometheus_client import CollectorRegistry
+
+
+def make_record(msg, *args, level=logging.ERROR, name='discord_bot'):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+class TestSamplingFilter(unittest.TestCase):
+    # 같은 템플릿은 burst 개까지만 통과하고, 인자가 달라도 같은 템플릿으로 묶임
+    def test_burst(self):
+        sampling = SamplingFilter(burst=2, window=60)
+        passed = [sampling.filter(make_record('Command error in %s: %s', 'roll', i)) for i in range(5)]
+        self.assertEqual(passed, [True, True, False, False, False])
+        self.assertEqual(sampling.suppressed, {'ERROR': 3})
+        self.assertTrue(sampling.filter(make_record('Other error: %s', 1)))
+
+    # 같은 템플릿이라도 sample_key(명령어)나 예외 타입이 다르면 따로 셈
+    def test_distinct_errors(self):
+        sampling = SamplingFilter(burst=1, window=60)
+
+        def command_error(command, error):
+            record = make_record('Command error in %s: %s', command, error)
+            record.sample_key = command
+            return sampling.filter(record)
+        self.assertEqual([command_error('roll', ValueError(i)) for i in range(3)], [True, False, False])
+        self.assertTrue(command_error('add', ValueError('x')))
+        self.assertTrue(command_error('roll', KeyError('x')))
+        self.assertFalse(command_error('roll', KeyError('y')))
+        self.assertTrue(sampling.filter(make_record('Error in odds command: %s', ValueError('x'))))
+        self.assertTrue(sampling.filter(make_record('Error in odds command: %s', TypeError('x'))))
+
+    # 윈도우가 지나면 다시 통과하고, 그동안 버린 개수가 레코드에 붙음
+    def test_window_reports_suppressed(self):
+        sampling = SamplingFilter(burst=1, window=0.05)
+        for _ in range(4):
+            sampling.filter(make_record('boom'))
+        time.sleep(0.06)
+        record = make_record('boom')
+        self.assertTrue(sampling.filter(record))
+        self.assertEqual(record.suppressed, 3)
+
+    # WARNING 미만은 샘플링하지 않음
+    def test_info_not_sampled(self):
+        sampling = SamplingFilter(burst=1)
+        self.assertTrue(all(sampling.filter(make_record('tick', level=logging.INFO)) for _ in range(10)))
+
+    def test_collector(self):
+        sampling = SamplingFilter(burst=0)
+        sampling.filter(make_record('boom'))
+        registry = CollectorRegistry()
+        registry.register(LogSuppressionCollector(sampling))
+        self.assertEqual(registry.get_sample_value('discord_bot_log_suppressed_total', {'level': 'ERROR'}), 1.0)
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        root = logging.getLogger()
+        self.saved = (root.handlers[:], root.level)
+
+    def tearDown(self):
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        for handler in self.saved[0]:
+            root.addHandler(handler)
+        root.setLevel(self.saved[1])
+
+    # 호출한 스레드에서는 메시지를 포맷팅하지 않음
+    def test_deferred_prepare(self):
+        record = make_record('value %s', 42)
+        prepared = DeferredQueueHandler(None).prepare(record)
+        self.assertIs(prepared, record)
+        self.assertFalse(hasattr(record, 'message'))
+
+    # 백그라운드 스레드가 JSON 한 줄씩 출력
+    def test_json_output(self):
+        stream = io.StringIO()
+        setup_logging(logging.INFO, fmt='json', burst=1, window=60, stream=stream)
+        logger = logging.getLogger('pipeline_test')
+        logger.info('시작 %s', 1)
+        try:
+            raise ValueError('bad')
+        except ValueError:
+            logger.exception('실패')
+        logger.exception('실패')
+        for _ in range(100):
+            if stream.getvalue().count('\n') >= 2:
+                break
+            time.sleep(0.01)
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([line['message'] for line in lines], ['시작 1', '실패'])
+        self.assertEqual(lines[0]['logger'], 'pipeline_test')
+        self.assertIn('ValueError: bad', lines[1]['exc_info'])
+
+
+class TestJSONFormatter(unittest.TestCase):
+    def test_suppressed_field(self):
+        record = make_record('boom %s', 1)
+        record.suppressed = 7
+        payload = json.loads(JSONFormatter().format(record))
+        self.assertEqual((payload['message'], payload['level'], payload['suppressed']), ('boom 1', 'ERROR', 7))
+
+
+if __name__ == '__main__':
+    unittest.main()
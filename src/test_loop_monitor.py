@@ -0,0 +1,50 @@
+import asyncio
+import time
+import unittest
+
+from discord_bot import DiscordBotMetrics
+from loop_monitor import LoopMonitor
+
+
+class TestLoopMonitor(unittest.IsolatedAsyncioTestCase):
+    # 루프를 막으면 지연이 히스토그램에 기록됨
+    async def test_lag_recorded(self):
+        metrics = DiscordBotMetrics()
+        monitor = LoopMonitor(metrics, interval=0.01, stall_timeout=10)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.02)
+            time.sleep(0.1)
+            await asyncio.sleep(0.03)
+        finally:
+            await monitor.stop()
+        self.assertGreaterEqual(metrics.registry.get_sample_value('discord_bot_event_loop_lag_seconds_sum'), 0.05)
+        self.assertGreater(metrics.registry.get_sample_value('discord_bot_event_loop_tasks'), 0)
+
+    # 워치독 스레드가 멈춘 루프의 스택을 남기고, 다시 진행하면 회복됨
+    async def test_watchdog_detects_stall(self):
+        metrics = DiscordBotMetrics()
+        monitor = LoopMonitor(metrics, interval=0.02, stall_timeout=0.1)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.05)
+            with self.assertLogs('loop_monitor', level='ERROR'):
+                time.sleep(0.4)
+            self.assertTrue(monitor.stalled)
+            self.assertIn('test_watchdog_detects_stall', monitor.stall_stack)
+            await asyncio.sleep(0.1)
+            self.assertFalse(monitor.stalled)
+        finally:
+            await monitor.stop()
+        self.assertEqual(metrics.registry.get_sample_value('discord_bot_event_loop_stalls_total'), 1.0)
+
+    # check() 는 마지막 진행 시각 기준으로 판단
+    def test_check(self):
+        monitor = LoopMonitor(stall_timeout=5)
+        self.assertFalse(monitor.check(monitor.last_progress + 4))
+        with self.assertLogs('loop_monitor', level='ERROR'):
+            self.assertTrue(monitor.check(monitor.last_progress + 6))
+
+
+if __name__ == '__main__':
+    unittest.main()
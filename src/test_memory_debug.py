@@ -0,0 +1,98 @@
+import tracemalloc
+import unittest
+
+from aiohttp.test_utils import TestClient, TestServer
+
+import memory_debug
+from discord_bot import AsyncMetricsServer, DiscordBotMetrics, MetricsServer
+from memory_debug import MemoryTracer
+from profiler import DebugGate
+
+AUTH = {'Authorization': 'Bearer secret'}
+
+
+def allocate_blocks():
+    return [bytearray(1024) for _ in range(2000)]
+
+
+class TestMemoryTracer(unittest.TestCase):
+    def tearDown(self):
+        tracemalloc.stop()
+
+    # 추적을 켜기 전에는 top/diff 를 거절
+    def test_requires_start(self):
+        tracer = MemoryTracer()
+        with self.assertRaises(RuntimeError):
+            tracer.top()
+        with self.assertRaises(RuntimeError):
+            tracer.diff()
+
+    # diff 는 직전 스냅샷 대비 늘어난 할당 위치를 보여주고, 다음 diff 의 기준이 됨
+    def test_diff(self):
+        tracer = MemoryTracer()
+        self.assertTrue(tracer.start()['tracing'])
+        blocks = allocate_blocks()
+        result = tracer.diff(limit=5)
+        top = result['stats'][0]
+        self.assertIn('test_memory_debug.py', top['site'])
+        self.assertGreaterEqual(top['size_diff_kb'], 2000)
+        self.assertLess(tracer.diff(limit=5)['stats'][0]['size_diff_kb'], 2000)
+        del blocks
+
+    # top 은 현재 할당 크기 순, traceback 그룹은 프레임 목록을 포함
+    def test_top_traceback(self):
+        tracer = MemoryTracer()
+        tracer.start(frames=5)
+        blocks = allocate_blocks()
+        stat = tracer.top(limit=1, group='traceback')['stats'][0]
+        self.assertGreaterEqual(stat['size_kb'], 2000)
+        self.assertGreater(len(stat['traceback']), 1)
+        self.assertFalse(tracer.stop()['tracing'])
+        del blocks
+
+    def test_parse_params(self):
+        self.assertEqual(memory_debug.parse_memory_params({}), ('top', 20, 'lineno', 1))
+        for args in ({'action': 'dump'}, {'limit': '0'}, {'group': 'module'}, {'frames': '100'}):
+            with self.assertRaises(ValueError):
+                memory_debug.parse_memory_params(args)
+
+
+class TestMemoryEndpoint(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = AsyncMetricsServer(DiscordBotMetrics(), debug_gate=DebugGate('secret'))
+        self.client = TestClient(TestServer(self.server.app))
+        await self.client.start_server()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        tracemalloc.stop()
+
+    async def test_start_top_stop(self):
+        self.assertEqual((await self.client.get('/debug/memory')).status, 401)
+        self.assertEqual((await self.client.get('/debug/memory', headers=AUTH)).status, 409)
+        resp = await self.client.get('/debug/memory?action=start', headers=AUTH)
+        self.assertTrue((await resp.json())['tracing'])
+        resp = await self.client.get('/debug/memory?action=diff&limit=3', headers=AUTH)
+        self.assertEqual(resp.status, 200)
+        self.assertLessEqual(len((await resp.json())['stats']), 3)
+        resp = await self.client.get('/debug/memory?action=stop', headers=AUTH)
+        self.assertFalse((await resp.json())['tracing'])
+
+    async def test_bad_params(self):
+        self.assertEqual((await self.client.get('/debug/memory?limit=x', headers=AUTH)).status, 400)
+
+
+class TestFlaskMemoryEndpoint(unittest.TestCase):
+    def tearDown(self):
+        tracemalloc.stop()
+
+    def test_start_top(self):
+        client = MetricsServer(DiscordBotMetrics(), debug_gate=DebugGate('secret')).app.test_client()
+        self.assertEqual(client.get('/debug/memory?action=start', headers=AUTH).status_code, 200)
+        resp = client.get('/debug/memory?action=top', headers=AUTH)
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('stats', resp.get_json())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,219 @@
+import asyncio
+import datetime
+import gzip
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from aiohttp.test_utils import TestClient, TestServer
+from prometheus_client import generate_latest
+
+from discord_bot import DiscordBotMetrics, AsyncMetricsServer, DiscordBot, GuildStats, InfoSnapshot, RateLimited
+
+metrics = DiscordBotMetrics()
+discord_bot = DiscordBot('test_token', metrics, shard_count=2, shard_ids=[0, 1])
+
+
+class TestAsyncMetricsServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = AsyncMetricsServer(metrics, discord_bot=discord_bot)
+        self.client = TestClient(TestServer(self.server.app))
+        await self.client.start_server()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+
+    # /metrics 엔드포인트 테스트
+    async def test_metrics(self):
+        resp = await self.client.get('/metrics')
+        self.assertEqual(resp.status, 200)
+        self.assertIn('discord_bot_commands_total', await resp.text())
+
+    # gzip 압축 협상 테스트
+    async def test_metrics_gzip(self):
+        resp = await self.client.get('/metrics', headers={'Accept-Encoding': 'gzip'}, auto_decompress=False)
+        self.assertEqual(resp.headers.get('Content-Encoding'), 'gzip')
+        body = gzip.decompress(await resp.read()).decode()
+        self.assertIn('discord_bot_heartbeat_timestamp_seconds', body)
+
+    # /health 엔드포인트 테스트
+    async def test_health(self):
+        resp = await self.client.get('/health')
+        self.assertEqual(resp.status, 200)
+        payload = await resp.json()
+        self.assertEqual(payload['status'], 'healthy')
+        # 연결 전이므로 아직 실행 중인 샤드가 없음
+        self.assertEqual(payload['shards'], {})
+
+    # 이벤트 루프가 멈추면 /health 가 503
+    async def test_health_stalled(self):
+        discord_bot.loop_monitor.stalled = True
+        try:
+            resp = await self.client.get('/health')
+        finally:
+            discord_bot.loop_monitor.stalled = False
+        self.assertEqual(resp.status, 503)
+        self.assertEqual((await resp.json())['status'], 'unhealthy')
+
+    # /livez 는 /health 와 같은 생존 검사
+    async def test_livez(self):
+        resp = await self.client.get('/livez')
+        self.assertEqual(resp.status, 200)
+        self.assertEqual((await resp.json())['status'], 'healthy')
+
+    # 게이트웨이에 연결되기 전에는 준비되지 않은 상태
+    async def test_readyz_not_connected(self):
+        resp = await self.client.get('/readyz')
+        self.assertEqual(resp.status, 503)
+        payload = await resp.json()
+        self.assertEqual(payload['status'], 'not_ready')
+        self.assertFalse(payload['checks']['gateway']['ok'])
+        self.assertFalse(payload['checks']['caches']['ok'])
+        self.assertTrue(payload['checks']['loop']['ok'])
+
+    # 샤딩하지 않은 봇은 샤드 0 하나로 보고됨
+    async def test_health_single_shard(self):
+        single = DiscordBot('test_token', metrics)
+        self.assertEqual(single.shard_status(), {'0': {'connected': False, 'latency_ms': None, 'ratelimited': False}})
+
+    # /test-error 엔드포인트 테스트
+    async def test_test_error(self):
+        resp = await self.client.get('/test-error')
+        self.assertEqual(resp.status, 500)
+
+
+def make_guild(guild_id, member_count, unavailable=False, shard_id=0):
+    guild = MagicMock()
+    guild.id = guild_id
+    guild.member_count = member_count
+    guild.unavailable = unavailable
+    guild.shard_id = shard_id
+    return guild
+
+
+class TestGuildStats(unittest.TestCase):
+    # 길드/멤버 이벤트에 따른 누적값 테스트
+    def test_events(self):
+        stats = GuildStats()
+        stats.add_guild(1, 10)
+        stats.add_guild(2, 5)
+        stats.member_joined(1)
+        stats.member_left(2)
+        self.assertEqual((stats.guild_count, stats.member_total), (2, 15))
+        stats.remove_guild(1)
+        self.assertEqual((stats.guild_count, stats.member_total), (1, 4))
+
+    # 같은 길드의 available 이벤트가 중복돼도 두 번 세지 않음
+    def test_add_guild_idempotent(self):
+        stats = GuildStats()
+        stats.add_guild(1, 10)
+        stats.add_guild(1, 12)
+        self.assertEqual((stats.guild_count, stats.member_total), (1, 12))
+
+    # 드리프트 보정 테스트
+    def test_reconcile(self):
+        stats = GuildStats()
+        stats.add_guild(1, 10)
+        drift = stats.reconcile([make_guild(1, 11), make_guild(2, 3), make_guild(3, 7, unavailable=True)])
+        self.assertEqual(drift, (1, 4))
+        self.assertEqual((stats.guild_count, stats.member_total), (2, 14))
+
+    # 컬렉터가 스크레이프 시점 값을 노출하는지 테스트
+    def test_collector(self):
+        metrics.guild_stats.reconcile([make_guild(1, 42)])
+        output = generate_latest(metrics.registry).decode()
+        self.assertIn('discord_bot_active_users{shard="0"} 42.0', output)
+
+    # 샤드별 누적값 테스트
+    def test_per_shard(self):
+        stats = GuildStats()
+        stats.reconcile([make_guild(1, 10, shard_id=0), make_guild(2, 20, shard_id=1)])
+        stats.member_joined(2)
+        self.assertEqual(stats.guilds_by_shard, {0: 1, 1: 1})
+        self.assertEqual(stats.members_by_shard, {0: 10, 1: 21})
+        self.assertEqual(stats.member_total, 31)
+
+
+class TestInfoSnapshot(unittest.TestCase):
+    # 입력이 같으면 같은 임베드를 재사용하고 적중으로 셈
+    def test_hit(self):
+        local = DiscordBotMetrics()
+        snapshot = InfoSnapshot(30.0, local)
+        first = snapshot.get(3, 120, 0.0421)
+        self.assertIs(snapshot.get(3, 120, 0.0424), first)
+        self.assertEqual(local.registry.get_sample_value('discord_bot_info_cache_total', {'result': 'hit'}), 1.0)
+        self.assertEqual(local.registry.get_sample_value('discord_bot_info_cache_total', {'result': 'refresh'}), 1.0)
+
+    # 바뀐 필드만 고쳐 씀
+    def test_refresh_changed_field(self):
+        snapshot = InfoSnapshot(30.0)
+        embed = snapshot.get(3, 120, 0.042)
+        snapshot.get(3, 121, 0.042)
+        self.assertEqual([field.value for field in embed.fields], ['3', '121', '42ms'])
+
+    # TTL 이 지나면 입력이 같아도 다시 만듦
+    def test_ttl(self):
+        local = DiscordBotMetrics()
+        snapshot = InfoSnapshot(0.0, local)
+        snapshot.get(1, 1, float('nan'))
+        embed = snapshot.get(1, 1, float('nan'))
+        self.assertEqual(embed.fields[2].value, '연결 중')
+        self.assertEqual(local.registry.get_sample_value('discord_bot_info_cache_total', {'result': 'refresh'}), 2.0)
+
+
+class TestDiscordBotMetrics(unittest.TestCase):
+    # 인스턴스마다 레지스트리가 분리되어 충돌하지 않음
+    def test_isolated_registries(self):
+        first, second = DiscordBotMetrics(), DiscordBotMetrics()
+        first.bind_error('command_error', '0').inc()
+        self.assertEqual(first.registry.get_sample_value('discord_bot_errors_total', {'error_type': 'command_error', 'shard': '0'}), 1.0)
+        self.assertIsNone(second.registry.get_sample_value('discord_bot_errors_total', {'error_type': 'command_error', 'shard': '0'}))
+
+    # 바인딩된 자식은 캐시되어 같은 객체가 반환됨
+    def test_bind_command_cached(self):
+        local = DiscordBotMetrics()
+        self.assertIs(local.bind_command('ping', '0'), local.bind_command('ping', '0'))
+        local.bind_command('ping', '0').success.inc()
+        self.assertEqual(local.registry.get_sample_value('discord_bot_commands_total', {'command': 'ping', 'status': 'success', 'shard': '0'}), 1.0)
+
+    # 명령어 등록 시점에 모든 명령어의 자식이 미리 만들어짐
+    def test_commands_prebound(self):
+        local = DiscordBotMetrics()
+        bot = DiscordBot('test_token', local)
+        for command in bot.bot.commands:
+            self.assertIn((command.name, '0'), local._command_children)
+
+
+    # 응답 전송 시 메시지 생성 시각부터의 종단 지연시간이 기록됨
+    def test_reply_latency(self):
+        local = DiscordBotMetrics()
+        bot = DiscordBot('test_token', local)
+        ctx = MagicMock()
+        ctx.channel.id = 1
+        ctx.channel.send = AsyncMock()
+        ctx.command.name = 'ping'
+        ctx.guild.shard_id = 0
+        ctx.message.created_at = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=0.2)
+        asyncio.run(bot._send(ctx, 'pong'))
+        labels = {'command': 'ping', 'shard': '0'}
+        self.assertEqual(local.registry.get_sample_value('discord_bot_reply_latency_seconds_count', labels), 1.0)
+        self.assertGreaterEqual(local.registry.get_sample_value('discord_bot_reply_latency_seconds_sum', labels), 0.2)
+        self.assertEqual(local.registry.get_sample_value('discord_bot_messages_sent_total'), 1.0)
+
+    # 속도 제한에 걸린 호출은 명령어 에러가 아닌 별도 카운터로 셈
+    def test_rate_limited(self):
+        local = DiscordBotMetrics()
+        bot = DiscordBot('test_token', local)
+        ctx = MagicMock()
+        ctx.command = bot.bot.get_command('odds')
+        ctx.guild.shard_id = 0
+        with self.assertRaises(RateLimited) as caught:
+            for _ in range(10):
+                bot._check_rate_limit(ctx)
+        self.assertEqual(caught.exception.scope, 'user')
+        asyncio.run(bot.bot.on_command_error(ctx, caught.exception))
+        self.assertEqual(local.registry.get_sample_value('discord_bot_rate_limited_total', {'command': 'odds', 'scope': 'user'}), 1.0)
+        self.assertEqual(local.registry.get_sample_value('discord_bot_errors_total', {'error_type': 'command_error', 'shard': '0'}), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
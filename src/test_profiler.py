@@ -0,0 +1,143 @@
+import asyncio
+import marshal
+import pstats
+import threading
+import unittest
+
+from aiohttp.test_utils import TestClient, TestServer
+
+import profiler
+from discord_bot import AsyncMetricsServer, DiscordBotMetrics, MetricsServer
+from profiler import DebugGate
+
+
+def busy_loop(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class BusyWorkerMixin:
+    """테스트 동안 CPU 를 쓰는 스레드를 하나 띄움"""
+
+    def setUp(self):
+        self.stop = threading.Event()
+        self.worker = threading.Thread(target=busy_loop, args=(self.stop,), name='busy-worker')
+        self.worker.start()
+
+    def tearDown(self):
+        self.stop.set()
+        self.worker.join()
+
+
+class TestSampler(BusyWorkerMixin, unittest.TestCase):
+    # 다른 스레드의 스택이 스레드 이름과 함께 잡히고, 샘플러 자신은 빠짐
+    def test_samples_other_threads(self):
+        profile = profiler.sample(0.2, hz=200)
+        self.assertGreater(profile.samples, 10)
+        collapsed = profile.collapsed()
+        self.assertIn('busy-worker;', collapsed)
+        self.assertIn('busy_loop (test_profiler.py:', collapsed)
+        self.assertNotIn('sample (profiler.py:', collapsed)
+
+    # pstats 출력은 표준 pstats 로 다시 읽을 수 있음
+    def test_pstats(self):
+        profile = profiler.sample(0.1, hz=200)
+        stats = pstats.Stats(profile)
+        functions = {func for _, _, func in stats.stats}
+        self.assertIn('busy_loop', functions)
+        self.assertEqual(marshal.loads(profile.pstats_dump()), profile.stats)
+        self.assertIn('cumulative', profile.pstats_text())
+        self.assertEqual(profiler.Profile(0.01).pstats_text(), 'no samples\n')
+
+    # 잘못된 파라미터는 ValueError
+    def test_parse_params(self):
+        self.assertEqual(profiler.parse_profile_params({'seconds': '2'}), (2.0, profiler.DEFAULT_HZ, 'collapsed'))
+        for args in ({'seconds': '0'}, {'seconds': '3600'}, {'seconds': 'x'}, {'hz': '5000'}, {'format': 'svg'}):
+            with self.assertRaises(ValueError):
+                profiler.parse_profile_params(args)
+
+
+class TestDebugGate(unittest.TestCase):
+    # Bearer 토큰이 정확히 맞아야 통과
+    def test_authorized(self):
+        gate = DebugGate('secret')
+        self.assertTrue(gate.authorized('Bearer secret'))
+        self.assertFalse(gate.authorized('Bearer wrong'))
+        self.assertFalse(gate.authorized('secret'))
+        self.assertFalse(gate.authorized(None))
+
+    # 동시 실행 상한을 넘으면 거절
+    def test_concurrency_cap(self):
+        gate = DebugGate('secret', max_concurrent=1)
+        self.assertTrue(gate.try_acquire())
+        self.assertFalse(gate.try_acquire())
+        gate.release()
+        self.assertTrue(gate.try_acquire())
+
+
+class TestProfileEndpoint(unittest.IsolatedAsyncioTestCase):
+    AUTH = {'Authorization': 'Bearer secret'}
+
+    async def asyncSetUp(self):
+        self.gate = DebugGate('secret')
+        self.server = AsyncMetricsServer(DiscordBotMetrics(), debug_gate=self.gate)
+        self.client = TestClient(TestServer(self.server.app))
+        await self.client.start_server()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+
+    # 프로파일 중에도 이벤트 루프 스레드가 샘플에 잡힘
+    async def test_profile(self):
+        resp = await self.client.get('/debug/profile?seconds=0.2', headers=self.AUTH)
+        self.assertEqual(resp.status, 200)
+        self.assertIn('MainThread;', await resp.text())
+
+    async def test_profile_pstats(self):
+        resp = await self.client.get('/debug/profile?seconds=0.1&format=pstats', headers=self.AUTH)
+        self.assertEqual(resp.headers['Content-Type'], 'application/octet-stream')
+        self.assertIsInstance(marshal.loads(await resp.read()), dict)
+
+    async def test_unauthorized(self):
+        resp = await self.client.get('/debug/profile?seconds=0.1')
+        self.assertEqual(resp.status, 401)
+
+    async def test_bad_params(self):
+        resp = await self.client.get('/debug/profile?seconds=600', headers=self.AUTH)
+        self.assertEqual(resp.status, 400)
+
+    # 이미 실행 중인 프로파일이 있으면 429
+    async def test_concurrent(self):
+        first = asyncio.create_task(self.client.get('/debug/profile?seconds=0.3', headers=self.AUTH))
+        await asyncio.sleep(0.1)
+        second = await self.client.get('/debug/profile?seconds=0.1', headers=self.AUTH)
+        self.assertEqual(second.status, 429)
+        self.assertEqual((await first).status, 200)
+
+    # 토큰이 없으면 엔드포인트 자체가 없음
+    async def test_disabled_by_default(self):
+        server = AsyncMetricsServer(DiscordBotMetrics())
+        client = TestClient(TestServer(server.app))
+        await client.start_server()
+        try:
+            self.assertEqual((await client.get('/debug/profile', headers=self.AUTH)).status, 404)
+        finally:
+            await client.close()
+
+
+class TestFlaskProfileEndpoint(BusyWorkerMixin, unittest.TestCase):
+    # 요청 스레드 밖의 스레드가 샘플에 잡힘
+    def test_profile(self):
+        client = MetricsServer(DiscordBotMetrics(), debug_gate=DebugGate('secret')).app.test_client()
+        self.assertEqual(client.get('/debug/profile?seconds=0.1').status_code, 401)
+        resp = client.get('/debug/profile?seconds=0.1&format=text', headers={'Authorization': 'Bearer secret'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn(b'busy_loop', resp.data)
+
+    def test_disabled_by_default(self):
+        client = MetricsServer(DiscordBotMetrics()).app.test_client()
+        self.assertEqual(client.get('/debug/profile').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+
+from rate_limiter import RateLimit, RateLimiter, SlidingWindowCounter, parse_limits
+
+
+def keys(user=1, channel=10, guild=100):
+    return {'user': user, 'channel': channel, 'guild': guild}
+
+
+class TestParseLimits(unittest.TestCase):
+    # 명령어별 설정은 default 를 이어받고 덮어씀
+    def test_inherit_default(self):
+        limits = parse_limits('default:user=5/10,guild=40/10; roll:user=3/5')
+        self.assertEqual(limits['roll'], {'user': RateLimit(3, 5), 'guild': RateLimit(40, 10)})
+        self.assertEqual(limits['default']['user'], RateLimit(5, 10))
+
+    # 알 수 없는 범위나 잘못된 값은 ValueError
+    def test_invalid(self):
+        for spec in ('default:role=5/10', 'default:user=0/10', 'default:user=x/10'):
+            with self.assertRaises(ValueError, msg=spec):
+                parse_limits(spec)
+
+
+class TestSlidingWindowCounter(unittest.TestCase):
+    # 윈도우 안에서 rate 번까지만 허용
+    def test_limit(self):
+        window = SlidingWindowCounter(RateLimit(3, 10))
+        now = window.window_start
+        for _ in range(3):
+            self.assertEqual(window.retry_after('a', now), 0.0)
+            window.hit('a', now)
+        self.assertGreater(window.retry_after('a', now), 0.0)
+        self.assertEqual(window.retry_after('b', now), 0.0)
+
+    # 이전 세대 가중치가 줄어들며 점차 다시 허용됨
+    def test_slides(self):
+        window = SlidingWindowCounter(RateLimit(2, 10))
+        start = window.window_start
+        for _ in range(4):
+            window.hit('a', start + 9)
+        # 다음 윈도우 초반에는 이전 세대 4회가 거의 그대로 반영됨
+        wait = window.retry_after('a', start + 11)
+        self.assertAlmostEqual(wait, 4.0)
+        self.assertEqual(window.retry_after('a', start + 15.5), 0.0)
+        # 두 윈도우 이상 지나면 기록이 모두 사라짐
+        window.retry_after('a', start + 30)
+        self.assertEqual(len(window), 0)
+
+    # 키 상한에 닿으면 오래된 세대를 버려 크기가 일정하게 유지됨
+    def test_bounded(self):
+        window = SlidingWindowCounter(RateLimit(5, 60), max_keys=100)
+        now = window.window_start
+        for user in range(10000):
+            window.hit(user, now)
+        self.assertLessEqual(len(window), 200)
+
+
+class TestRateLimiter(unittest.TestCase):
+    # 가장 좁은 범위에서 막히고, 거절된 호출은 한도를 소모하지 않음
+    def test_scopes(self):
+        limiter = RateLimiter(parse_limits('default:user=2/10,guild=3/10'))
+        self.assertIsNone(limiter.acquire('ping', keys(user=1), now=0))
+        self.assertIsNone(limiter.acquire('ping', keys(user=1), now=0))
+        self.assertEqual(limiter.acquire('ping', keys(user=1), now=0)[0], 'user')
+        self.assertIsNone(limiter.acquire('ping', keys(user=2), now=0))
+        self.assertEqual(limiter.acquire('ping', keys(user=3), now=0)[0], 'guild')
+
+    # 명령어마다 별도로 셈
+    def test_per_command(self):
+        limiter = RateLimiter(parse_limits('default:user=1/10;roll:user=1/10'))
+        self.assertIsNone(limiter.acquire('roll', keys(), now=0))
+        self.assertIsNone(limiter.acquire('ping', keys(), now=0))
+        self.assertIsNotNone(limiter.acquire('roll', keys(), now=0))
+
+    # 범위가 설정되지 않은 명령어는 제한 없음
+    def test_unlimited(self):
+        limiter = RateLimiter(parse_limits('roll:user=1/10'))
+        for _ in range(10):
+            self.assertIsNone(limiter.acquire('ping', keys(), now=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
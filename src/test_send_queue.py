@@ -0,0 +1,97 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from discord_bot import DiscordBotMetrics
+from send_queue import OutboundQueue, SlidingWindow
+
+
+def make_channel(channel_id=1):
+    channel = MagicMock()
+    channel.id = channel_id
+    channel.send = AsyncMock(side_effect=lambda *args, **kwargs: MagicMock(content=args[0] if args else None))
+    return channel
+
+
+class TestSlidingWindow(unittest.TestCase):
+    # limit 번을 쓰면 가장 오래된 전송에서 per 초가 지나야 다음 전송 가능
+    def test_acquire(self):
+        window = SlidingWindow(limit=2, per=0.1)
+        self.assertEqual(window.acquire(), 0.0)
+        self.assertEqual(window.acquire(), 0.0)
+        self.assertAlmostEqual(window.acquire(), 0.1, places=2)
+        # 기다리라는 응답은 기록하지 않음
+        self.assertEqual(len(window.times), 2)
+
+    # 통과한 시각들은 어떤 per 초 구간에도 limit 개를 넘지 않음 (토큰 버킷은 버스트 + 충전분까지 허용)
+    def test_never_exceeds_limit(self):
+        window = SlidingWindow(limit=5, per=5.0)
+        now = [0.0]
+        passed = []
+        with patch('time.monotonic', lambda: now[0]):
+            while now[0] < 20:
+                if window.acquire() == 0:
+                    passed.append(now[0])
+                now[0] += 0.25
+        self.assertEqual(len(passed), 20)
+        for i in range(len(passed) - 5):
+            self.assertGreaterEqual(passed[i + 5] - passed[i], 5.0)
+
+class TestOutboundQueue(unittest.IsolatedAsyncioTestCase):
+    # 같은 채널에 쌓인 짧은 응답은 한 번의 API 호출로 합쳐짐
+    async def test_coalesce(self):
+        metrics = DiscordBotMetrics()
+        queue = OutboundQueue(metrics)
+        channel = make_channel()
+        results = await asyncio.gather(*(queue.send(channel, f'reply {i}') for i in range(5)))
+        self.assertEqual(channel.send.await_count, 1)
+        self.assertEqual(channel.send.await_args.args[0], 'reply 0\nreply 1\nreply 2\nreply 3\nreply 4')
+        self.assertIs(results[0], results[4])
+        self.assertEqual(metrics.registry.get_sample_value('discord_bot_messages_sent_total'), 1.0)
+        self.assertEqual(metrics.registry.get_sample_value('discord_bot_send_coalesced_total'), 4.0)
+        self.assertEqual(queue.depth, 0)
+
+    # 임베드처럼 옵션이 있는 메시지는 합치지 않음
+    async def test_no_coalesce_with_embed(self):
+        queue = OutboundQueue(channel_limit=1, channel_per=0.001)
+        channel = make_channel()
+        await asyncio.gather(queue.send(channel, 'a'), queue.send(channel, embed='embed'), queue.send(channel, 'b'))
+        self.assertEqual(channel.send.await_count, 3)
+
+    # 채널 대기열이 가득 차면 보내는 쪽이 기다림
+    async def test_backpressure(self):
+        queue = OutboundQueue(channel_limit=1, channel_per=0.001, max_pending=2, coalesce=False)
+        gate = asyncio.Event()
+        channel = make_channel()
+
+        async def slow_send(*args, **kwargs):
+            await gate.wait()
+        channel.send = AsyncMock(side_effect=slow_send)
+
+        tasks = [asyncio.create_task(queue.send(channel, str(i))) for i in range(3)]
+        await asyncio.sleep(0.01)
+        self.assertEqual(queue.depth, 2)
+        gate.set()
+        await asyncio.gather(*tasks)
+        self.assertEqual(channel.send.await_count, 3)
+
+    # 전송 실패는 기다리던 호출자에게 전달됨
+    async def test_send_error(self):
+        queue = OutboundQueue()
+        channel = make_channel()
+        channel.send = AsyncMock(side_effect=RuntimeError('boom'))
+        with self.assertRaises(RuntimeError):
+            await queue.send(channel, 'hello')
+        self.assertEqual(queue.depth, 0)
+
+
+    # 2000자를 넘으면 여러 메시지로 나눠 보냄
+    async def test_coalesce_length_limit(self):
+        queue = OutboundQueue()
+        channel = make_channel()
+        await asyncio.gather(*(queue.send(channel, 'x' * 900) for _ in range(3)))
+        self.assertEqual(channel.send.await_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
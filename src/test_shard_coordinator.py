@@ -0,0 +1,122 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from shard_coordinator import ShardCoordinator, SQLiteLeaseStore, shard_range
+
+
+class FailingStore(SQLiteLeaseStore):
+    """failing 이 켜져 있으면 멤버십 갱신이 실패하는 저장소"""
+
+    failing = False
+
+    def heartbeat(self, member_id, ttl):
+        if self.failing:
+            raise sqlite3.OperationalError('database is locked')
+        super().heartbeat(member_id, ttl)
+
+
+class TestShardRange(unittest.TestCase):
+    # 샤드를 연속 구간으로 겹치지 않게 나누는지 테스트
+    def test_partition(self):
+        members = ['pod-b', 'pod-a', 'pod-c']
+        ranges = [shard_range(member, members, 8) for member in sorted(members)]
+        self.assertEqual(ranges, [{0, 1, 2}, {3, 4, 5}, {6, 7}])
+
+    # 멤버가 아니면 샤드를 받지 않음
+    def test_not_member(self):
+        self.assertEqual(shard_range('pod-x', ['pod-a'], 4), set())
+
+
+class TestShardCoordinator(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = SQLiteLeaseStore(os.path.join(self.tmpdir.name, 'leases.db'))
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        self.tmpdir.cleanup()
+
+    def make_coordinator(self, member_id):
+        coordinator = ShardCoordinator(self.store, member_id, shard_count=4)
+        coordinator.changes = []
+
+        async def on_change(shard_ids):
+            coordinator.changes.append(shard_ids)
+        coordinator.on_change = on_change
+        return coordinator
+
+    # 두 번째 Pod 가 들어오면 샤드를 넘겨주고, 나가면 다시 가져옴
+    def test_rebalance_and_handover(self):
+        async def run_test():
+            pod_a = self.make_coordinator('pod-a')
+            await pod_a.step()
+            self.assertEqual(pod_a.owned, {0, 1, 2, 3})
+
+            pod_b = self.make_coordinator('pod-b')
+            await pod_b.step()
+            # pod-a 가 아직 반납하지 않았으므로 pod-b 는 샤드를 얻지 못함
+            self.assertEqual(pod_b.owned, set())
+
+            await pod_a.step()
+            self.assertEqual(pod_a.owned, {0, 1})
+            await pod_b.step()
+            self.assertEqual(pod_b.owned, {2, 3})
+            self.assertEqual(self.store.owners(), {0: 'pod-a', 1: 'pod-a', 2: 'pod-b', 3: 'pod-b'})
+
+            # 롤링 업데이트로 pod-b 종료 → 리스 즉시 반납
+            await pod_b.shutdown()
+            self.assertEqual(pod_b.changes[-1], [])
+            await pod_a.step()
+            self.assertEqual(pod_a.owned, {0, 1, 2, 3})
+            self.assertEqual(pod_a.rebalances, 3)
+        self.loop.run_until_complete(run_test())
+
+    # 갱신이 TTL 넘게 실패하면 리스가 만료된 샤드의 연결을 끊고, 저장소가 돌아오면 다시 가져옴
+    def test_renewal_failure(self):
+        async def run_test():
+            store = FailingStore(os.path.join(self.tmpdir.name, 'failing.db'))
+            pod_a = ShardCoordinator(store, 'pod-a', shard_count=2, lease_ttl=0.3, renew_interval=0.05)
+            changes = []
+
+            async def on_change(shard_ids):
+                changes.append(shard_ids)
+            pod_a.on_change = on_change
+            task = asyncio.create_task(pod_a.run())
+            try:
+                await asyncio.sleep(0.1)
+                self.assertEqual(changes, [[0, 1]])
+                store.failing = True
+                # TTL 전에는 그대로 유지
+                await asyncio.sleep(0.1)
+                self.assertEqual(pod_a.owned, {0, 1})
+                await asyncio.sleep(0.3)
+                self.assertEqual(changes, [[0, 1], []])
+                store.failing = False
+                await asyncio.sleep(0.1)
+                self.assertEqual(changes, [[0, 1], [], [0, 1]])
+            finally:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self.loop.run_until_complete(run_test())
+
+    # 다른 멤버의 유효한 리스는 가져갈 수 없음
+    def test_acquire_conflict(self):
+        self.assertTrue(self.store.acquire(0, 'pod-a', 30))
+        self.assertFalse(self.store.acquire(0, 'pod-b', 30))
+        self.assertTrue(self.store.acquire(0, 'pod-a', 30))
+        self.store.release(0, 'pod-a')
+        self.assertTrue(self.store.acquire(0, 'pod-b', 30))
+
+    # 만료된 리스는 다른 멤버가 가져갈 수 있음
+    def test_expired_lease(self):
+        self.assertTrue(self.store.acquire(0, 'pod-a', -1))
+        self.assertTrue(self.store.acquire(0, 'pod-b', 30))
+
+
+if __name__ == '__main__':
+    unittest.main()
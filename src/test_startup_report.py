@@ -0,0 +1,34 @@
+import json
+import subprocess
+import sys
+import unittest
+
+import startup_report
+
+
+class TestStartupReport(unittest.TestCase):
+    # 패키지별 import 시간에 봇 모듈과 discord 가 들어 있음
+    def test_import_breakdown(self):
+        imports = startup_report.import_breakdown('discord_bot')
+        self.assertIn('discord', imports)
+        self.assertIn('discord_bot', imports)
+        self.assertEqual(list(imports.values()), sorted(imports.values(), reverse=True))
+
+    # 지연 로딩 모듈은 import 와 초기화 단계에서 불러오지 않음 (시간 예산은 Jenkins 에서 startup_report.py 가 검사)
+    def test_lazy_modules(self):
+        report = startup_report.init_breakdown()
+        self.assertEqual(list(report['steps']), ['import', 'metrics', 'bot', 'metrics_server', 'settings'])
+        self.assertEqual(report['modules'], [])
+
+    # slack_bot 은 임포트만으로 slack_sdk 를 불러오거나 로그 스레드를 띄우지 않음
+    def test_slack_bot_import(self):
+        output = subprocess.run(
+            [sys.executable, '-c', 'import json, sys, threading, slack_bot; '
+             'print(json.dumps(["slack_sdk" in sys.modules, threading.active_count()]))'],
+            cwd=startup_report.SRC_DIR, capture_output=True, text=True, check=True
+        ).stdout
+        self.assertEqual(json.loads(output), [False, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()